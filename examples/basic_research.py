@@ -1,68 +1,54 @@
 import asyncio
-from research.workflows.research_workflow import ResearchWorkflow, ProgressEvent
-from research.workflows.search_workflow import SearchWorkflow
+from research.workflows.research_workflow import ProgressEvent
+from research.workflows.factory import build_research_workflow
 from research.config.config import Config
-from llama_index.llms.openrouter import OpenRouter
+from research.utils.clients import get_client_registry
 
-async def run_research(topic: str, config=None):
+async def run_research(topic: str, config=None, embed_model=None, workflow=None):
     """Run the research workflow with the given topic.
-    
+
     Args:
         topic: The research topic
         config: Optional configuration object
-        
+        embed_model: Optional LlamaIndex embedding model for the semantic search cache
+        workflow: Optional prebuilt workflow to reuse across reports
+
     Returns:
         The final research report
     """
-    # Load configuration
-    if config is None:
-        config = Config()
-    llm_config = config.get_llm_config()
-    workflow_config = config.get_workflow_config()
-    search_config = config.get_search_config()
-    
-    # Initialize main workflow
-    workflow = ResearchWorkflow(
-        llm=OpenRouter(
-            api_key=llm_config["api_key"],
-            model=llm_config["model"],
-            max_tokens=llm_config["max_tokens"],
-            context_window=llm_config["context_window"],
-        ),
-        verbose=workflow_config["verbose"]
-    )
+    # Initialize main workflow with the nested search workflow
+    if workflow is None:
+        workflow = build_research_workflow(config, embed_model=embed_model)
 
-    # Initialize search workflow
-    search_workflow = SearchWorkflow(
-        llm=workflow.llm, 
-        config=search_config,
-        verbose=workflow._verbose
-    )
-    
-    # Add search workflow to main workflow
-    workflow.add_workflows(search_workflow=search_workflow)
-    
     # Run workflow with topic
     handler = workflow.run(input=topic)
-    
+
     # Return handler for further processing
     return handler
 
 async def main():
     # Example usage
     topic = "AI policy"
-    handler = await run_research(topic)
-    
+    config = Config.load()
+    registry = get_client_registry(config.get_pool_config())
+    await registry.startup()
+    workflow = build_research_workflow(config)
+    handler = await run_research(topic, workflow=workflow)
+
     # Process streaming events
     async for event in handler.stream_events():
         if isinstance(event, ProgressEvent):
             print(event.msg)
-    
+
     # Get final result
     final_result = await handler
     print("final_result:", final_result)
+    if workflow.section_broker:
+        await workflow.section_broker.stop()
+    workflow.tracer.shutdown()
+    await registry.shutdown()
     # draw_all_possible_flows(ResearchWorkflow, filename="workflow.html")
 
 # Example usage
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -2,10 +2,34 @@
 
 __version__ = '0.1.0'
 
-# Export main functionality
-from .workflows.research_workflow import ResearchWorkflow, ProgressEvent
-from .workflows.search_workflow import SearchWorkflow
-from .config.config import Config
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .workflows.research_workflow import ResearchWorkflow, ProgressEvent
+    from .workflows.search_workflow import SearchWorkflow
+    from .config.config import Config
+
+# Main functionality, imported on first access: the workflows pull in LlamaIndex,
+# so importing the package stays fast for code that only needs part of it
+_EXPORTS = {
+    'ResearchWorkflow': '.workflows.research_workflow',
+    'ProgressEvent': '.workflows.research_workflow',
+    'SearchWorkflow': '.workflows.search_workflow',
+    'Config': '.config.config'
+}
 
 # Make these classes and functions available when importing the package
-__all__ = ['ResearchWorkflow', 'SearchWorkflow', 'Config', 'ProgressEvent']
\ No newline at end of file
+__all__ = ['ResearchWorkflow', 'SearchWorkflow', 'Config', 'ProgressEvent']
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1 @@
+# Contains the offline benchmark harness and its stub LLM and search backends
@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import json
+
+from ..config.config import Config
+from ..utils.hedging import build_hedger
+from ..utils.prompt_cache import build_prompt_cache
+from ..utils.scheduler import build_scheduler
+from ..utils.single_flight import build_single_flight
+from .runner import run_benchmark, format_benchmark_results
+from .stubs import LatencyModel, StubLLM, StubSearchClient
+
+
+def main():
+    """Run the offline benchmark against stub LLM and search backends."""
+    parser = argparse.ArgumentParser(description="Offline research workflow benchmark")
+    parser.add_argument("--reports", type=int, default=10, help="Number of reports")
+    parser.add_argument("--sections", type=int, default=5, help="Sections per report")
+    parser.add_argument("--concurrency", type=int, default=None, help="Reports running at the same time (default: all)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Median LLM time to first token in seconds")
+    parser.add_argument("--llm-latency-p95", type=float, default=None,
+                        help="95th percentile LLM time to first token (default: 3x the median)")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="LLM streaming rate")
+    parser.add_argument("--section-tokens", type=int, default=300, help="Tokens written per section")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of LLM calls failing with a 429")
+    parser.add_argument("--search-latency", type=float, default=0.8, help="Median search latency in seconds")
+    parser.add_argument("--search-latency-p95", type=float, default=None,
+                        help="95th percentile search latency (default: 3x the median)")
+    parser.add_argument("--search-error-rate", type=float, default=0.0, help="Fraction of searches failing with a 429")
+    parser.add_argument("--stream-plan", action="store_true", help="Write sections while the plan streams")
+    parser.add_argument("--no-scheduler", action="store_true", help="Run without the configured scheduler")
+    parser.add_argument("--no-hedging", action="store_true", help="Run without hedged requests")
+    parser.add_argument("--no-coalescing", action="store_true", help="Run without sharing identical in-flight calls")
+    parser.add_argument("--no-prompt-cache", action="store_true",
+                        help="Run without recording cached prompt tokens (the stub LLM still caches)")
+    parser.add_argument("--track-memory", action="store_true", help="Measure the peak Python heap with tracemalloc")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the stub backends")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    config = Config.load()
+    search_config = config.get_search_config()
+    results = asyncio.run(run_benchmark(
+        num_reports=args.reports,
+        concurrency=args.concurrency,
+        llm=StubLLM(
+            num_sections=args.sections,
+            queries_per_section=search_config["max_queries"],
+            section_tokens=args.section_tokens,
+            latency=LatencyModel(args.llm_latency, args.llm_latency_p95 or args.llm_latency * 3),
+            tokens_per_second=args.tokens_per_second,
+            error_rate=args.llm_error_rate,
+            seed=args.seed
+        ),
+        search_client=StubSearchClient(
+            latency=LatencyModel(args.search_latency, args.search_latency_p95 or args.search_latency * 3),
+            error_rate=args.search_error_rate,
+            seed=args.seed
+        ),
+        scheduler=None if args.no_scheduler else build_scheduler(config.get_scheduler_config()),
+        hedger=None if args.no_hedging else build_hedger(config.get_hedging_config()),
+        single_flight=None if args.no_coalescing else build_single_flight(config.get_single_flight_config()),
+        prompt_cache=None if args.no_prompt_cache else build_prompt_cache(config.get_prompt_cache_config()),
+        search_config=search_config,
+        stream_plan=args.stream_plan,
+        context_token_budget=config.get_workflow_config()["context_token_budget"],
+        track_memory=args.track_memory
+    ))
+    print(json.dumps(results, indent=2) if args.json else format_benchmark_results(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from ..utils.hedging import Hedger
+from ..utils.prompt_cache import PromptCache
+from ..utils.routing import ModelRouter
+from ..utils.scheduler import Scheduler
+from ..utils.single_flight import SingleFlight
+from ..utils.tracing import Tracer
+from ..utils.utils import percentile
+from ..workflows.research_workflow import ResearchWorkflow
+from ..workflows.search_workflow import SearchWorkflow
+from .stubs import StubLLM, StubSearchClient
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class _FirstTokenCollector:
+    """Trace exporter remembering when the first streamed token of each trace arrived."""
+
+    def __init__(self):
+        self.first_token_at: Dict[str, float] = {}
+
+    def export(self, record: Dict[str, Any]) -> None:
+        if record["type"] != "span" or "time_to_first_token" not in record["attributes"]:
+            return
+        at = record["start"] + record["attributes"]["time_to_first_token"]
+        trace_id = record["trace_id"]
+        self.first_token_at[trace_id] = min(at, self.first_token_at.get(trace_id, at))
+
+
+def _distribution(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"mean": None, "p50": None, "p95": None, "p99": None}
+    return {
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99)
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_benchmark(num_reports: int = 10, num_sections: int = 5, concurrency: Optional[int] = None,
+                        llm: Optional[StubLLM] = None, search_client: Optional[StubSearchClient] = None,
+                        scheduler: Optional[Scheduler] = None, hedger: Optional[Hedger] = None, search_config: Optional[Dict[str, Any]] = None,
+                        stream_plan: bool = False, context_token_budget: Optional[int] = None,
+                        track_memory: bool = False, router: Optional[ModelRouter] = None,
+                        single_flight: Optional[SingleFlight] = None,
+                        prompt_cache: Optional[PromptCache] = None) -> Dict[str, Any]:
+    """Run reports against stub backends and measure throughput and latency.
+
+    Args:
+        num_reports: Number of reports to generate
+        num_sections: Number of sections planned per report (ignored if llm is given)
+        concurrency: Maximum number of reports running at the same time, all of them if None
+        llm: Stub LLM, a default one is created if None
+        search_client: Stub search client, a default one is created if None
+        scheduler: Optional shared scheduler for the workflows
+        hedger: Optional shared hedger for the workflows
+        search_config: Search configuration for the SearchWorkflow
+        stream_plan: Whether to write sections while the plan streams
+        context_token_budget: Optional token budget of the section writer context
+        track_memory: Whether to also measure the peak Python heap with tracemalloc (slows the run)
+        router: Optional model router assigning stub LLMs to steps
+        single_flight: Optional shared request coalescer for the workflows
+        prompt_cache: Optional shared prompt cache support recording cached prompt tokens
+
+    Returns:
+        Dictionary of benchmark results
+    """
+    llm = llm or StubLLM(num_sections=num_sections)
+    search_client = search_client or StubSearchClient()
+    collector = _FirstTokenCollector()
+    tracer = Tracer(enabled=True, exporters=[collector])
+
+    workflow = ResearchWorkflow(llm=llm, scheduler=scheduler, stream_plan=stream_plan,
+                                context_token_budget=context_token_budget, tracer=tracer, hedger=hedger, router=router,
+                                single_flight=single_flight, prompt_cache=prompt_cache)
+    search_workflow = SearchWorkflow(
+        llm=llm,
+        config=search_config or {"api_key": None, "search_depth": "basic", "max_results": 3, "max_queries": 3},
+        scheduler=scheduler,
+        search_client=search_client,
+        tracer=tracer,
+        hedger=hedger,
+        router=router,
+        single_flight=single_flight,
+        prompt_cache=prompt_cache
+    )
+    workflow.add_workflows(search_workflow=search_workflow)
+
+    semaphore = asyncio.Semaphore(concurrency or num_reports)
+    latencies = []
+    first_tokens = []
+    failures = 0
+
+    async def run_report(index: int) -> None:
+        nonlocal failures
+        async with semaphore:
+            started_at = time.time()
+            try:
+                handler = workflow.run(input=f"Benchmark topic {index}")
+                async for _ in handler.stream_events():
+                    pass
+                result = await handler
+                trace_id = await handler.ctx.get("trace_id", default=None)
+            except Exception as e:
+                print(f"Error running benchmark report {index}: {e}")
+                failures += 1
+                return
+            latencies.append(time.time() - started_at)
+            if not isinstance(result, str) or result.startswith("Error"):
+                failures += 1
+            if trace_id in collector.first_token_at:
+                first_tokens.append(collector.first_token_at[trace_id] - started_at)
+
+    if track_memory:
+        tracemalloc.start()
+    started_at = time.perf_counter()
+    await asyncio.gather(*(run_report(index) for index in range(num_reports)))
+    duration = time.perf_counter() - started_at
+    peak_traced_mb = None
+    if track_memory:
+        peak_traced_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    return {
+        "reports": num_reports,
+        "sections": llm.num_sections,
+        "concurrency": concurrency or num_reports,
+        "duration": duration,
+        "throughput": num_reports / duration if duration else 0.0,
+        "failed_reports": failures,
+        "latency": _distribution(latencies),
+        "time_to_first_token": _distribution(first_tokens),
+        "llm": llm.stats(),
+        "search": search_client.stats(),
+        "scheduler": scheduler.stats() if scheduler else None,
+        "hedging": hedger.stats() if hedger else None,
+        "models": router.stats() if router else None,
+        "coalescing": single_flight.stats() if single_flight else None,
+        "prompt_cache": prompt_cache.stats() if prompt_cache else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_traced_mb": peak_traced_mb
+    }
+
+
+def format_benchmark_results(results: Dict[str, Any]) -> str:
+    """Render benchmark results as a short human readable report."""
+    def seconds(value: Optional[float]) -> str:
+        return f"{value:.3f}s" if value is not None else "n/a"
+
+    lines = [
+        f"Reports: {results['reports']} x {results['sections']} sections, concurrency {results['concurrency']}",
+        f"Duration: {results['duration']:.2f}s, throughput {results['throughput']:.3f} reports/s, "
+        f"{results['failed_reports']} failed",
+    ]
+    for label, key in (("Latency", "latency"), ("Time to first token", "time_to_first_token")):
+        dist = results[key]
+        lines.append(f"{label}: p50 {seconds(dist['p50'])}, p95 {seconds(dist['p95'])}, "
+                     f"p99 {seconds(dist['p99'])}, mean {seconds(dist['mean'])}")
+    for name in ("llm", "search"):
+        stats = results[name]
+        lines.append(f"{name.upper()} calls: {stats['calls']} ({stats['errors']} errors)")
+    if results["scheduler"]:
+        lines.append(f"Scheduler retries: {results['scheduler']['retries']}")
+    if results["hedging"]:
+        lines.append(f"Hedged calls: {results['hedging']['hedged']} ({results['hedging']['hedge_wins']} won by the hedge)")
+    if results.get("coalescing"):
+        saved = results["coalescing"]["saved"]
+        lines.append(f"Coalesced calls: {sum(saved.values())} saved "
+                     f"({', '.join(f'{kind} {count}' for kind, count in sorted(saved.items())) or 'none'})")
+    for step, usage in (results.get("prompt_cache") or {}).items():
+        lines.append(f"Cached prompt tokens ({step}): {usage['cached_ratio']:.0%} of {usage['prompt_tokens']} "
+                     f"over {usage['calls']} calls")
+    for step, models in (results.get("models") or {}).items():
+        for model, stats in models.items():
+            lines.append(f"Model {model} ({step}): {stats['calls']} calls ({stats['errors']} errors), "
+                         f"p50 {seconds(stats['latency_p50'])}, p95 {seconds(stats['latency_p95'])}")
+    if results["peak_rss_mb"] is not None:
+        lines.append(f"Peak RSS: {results['peak_rss_mb']:.1f} MB")
+    if results["peak_traced_mb"] is not None:
+        lines.append(f"Peak Python heap: {results['peak_traced_mb']:.1f} MB")
+    return "\n".join(lines)
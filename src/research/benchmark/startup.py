@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+from ..utils.utils import percentile
+
+# Import time of the bare package that cold starts should stay under
+IMPORT_TARGET = 0.1
+
+# Modules timed on their own, from the bare package to the full workflow stack
+MODULES = ["research", "research.config.config", "research.workflows.factory"]
+
+_IMPORT_PROBE = """
+import json, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - started}}))
+"""
+
+_FIRST_REPORT_PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+from research.benchmark.stubs import LatencyModel, StubLLM, StubSearchClient
+from research.workflows.research_workflow import ResearchWorkflow
+from research.workflows.search_workflow import SearchWorkflow
+imported = time.perf_counter()
+
+async def first_report():
+    llm = StubLLM(num_sections={sections}, latency=LatencyModel(0.0), tokens_per_second=1e6)
+    workflow = ResearchWorkflow(llm=llm)
+    workflow.add_workflows(search_workflow=SearchWorkflow(
+        llm=llm,
+        config={{"api_key": None, "search_depth": "basic", "max_results": 3, "max_queries": 3}},
+        search_client=StubSearchClient(latency=LatencyModel(0.0))
+    ))
+    return await workflow.run(input="Startup benchmark topic")
+
+asyncio.run(first_report())
+print(json.dumps({{"seconds": time.perf_counter() - imported, "total": time.perf_counter() - started}}))
+"""
+
+
+def _probe(code: str) -> Dict[str, float]:
+    """Run a probe in a fresh interpreter, so every measurement is a cold start."""
+    env = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _median(values: List[float]) -> Optional[float]:
+    return percentile(values, 50) if values else None
+
+
+def run_startup_benchmark(repeats: int = 5, num_sections: int = 3) -> Dict[str, Any]:
+    """Measure cold import times and the latency of a first report against zero-latency stubs.
+
+    Args:
+        repeats: Fresh interpreters started per measurement; medians are reported
+        num_sections: Sections planned by the first report
+
+    Returns:
+        Dictionary of startup benchmark results
+    """
+    imports = {module: _median([_probe(_IMPORT_PROBE.format(module=module))["seconds"] for _ in range(repeats)])
+               for module in MODULES}
+    reports = [_probe(_FIRST_REPORT_PROBE.format(sections=num_sections)) for _ in range(repeats)]
+    return {
+        "repeats": repeats,
+        "imports": imports,
+        "import_target": IMPORT_TARGET,
+        "import_within_target": imports["research"] <= IMPORT_TARGET,
+        # From the first import to the finished report, and the report run alone
+        "first_report": _median([report["total"] for report in reports]),
+        "first_report_run": _median([report["seconds"] for report in reports])
+    }
+
+
+def format_startup_results(results: Dict[str, Any]) -> str:
+    """Render startup benchmark results as a short human readable report."""
+    lines = [f"Cold import times (median of {results['repeats']}):"]
+    for module, seconds in results["imports"].items():
+        lines.append(f"  {module}: {seconds * 1000:.1f}ms")
+    verdict = "within" if results["import_within_target"] else "over"
+    lines.append(f"import research is {verdict} the {results['import_target'] * 1000:.0f}ms target")
+    lines.append(f"First report: {results['first_report'] * 1000:.1f}ms from the first import, "
+                 f"{results['first_report_run'] * 1000:.1f}ms to run")
+    return "\n".join(lines)
+
+
+def main():
+    """Run the startup benchmark."""
+    parser = argparse.ArgumentParser(description="Cold start benchmark of the research package")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--sections", type=int, default=3, help="Sections of the first report")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = run_startup_benchmark(args.repeats, args.sections)
+    print(json.dumps(results, indent=2) if args.json else format_startup_results(results))
+    if not results["import_within_target"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from llama_index.core.llms import CompletionResponse
+
+_WORDS = (
+    "research analysis data model system result method approach study evidence trend market "
+    "performance impact growth policy design process network signal source report finding"
+).split()
+
+
+class LatencyModel:
+    """Log-normal latency distribution described by its median and 95th percentile in seconds."""
+
+    def __init__(self, median: float, p95: Optional[float] = None):
+        self.median = median
+        self.p95 = p95 if p95 is not None else median
+        # z-score of the 95th percentile of a standard normal distribution
+        self.sigma = math.log(self.p95 / median) / 1.645 if median > 0 and self.p95 > median else 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(rng.gauss(0, self.sigma)) if self.sigma else self.median
+
+
+class StubAPIError(Exception):
+    """Error raised by the stubs; carries a status code so the scheduler treats it like an upstream error."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Stub upstream error {status_code}")
+        self.status_code = status_code
+
+
+class _StubBackend:
+    """Seeded randomness shared by the stubs.
+
+    Every call draws from a generator seeded by the seed, the request and the
+    number of times that request was made, so runs are reproducible no matter
+    how concurrent calls interleave.
+    """
+
+    def __init__(self, error_rate: float, error_status: int, seed: int):
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        self.calls = 0
+        self.errors = 0
+        self._attempts: Dict[str, int] = {}
+
+    def _rng(self, request: str) -> random.Random:
+        attempt = self._attempts.get(request, 0)
+        self._attempts[request] = attempt + 1
+        digest = hashlib.sha256(f"{self.seed}:{attempt}:{request}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _maybe_fail(self, rng: random.Random) -> None:
+        self.calls += 1
+        if rng.random() < self.error_rate:
+            self.errors += 1
+            raise StubAPIError(self.error_status)
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "errors": self.errors}
+
+
+class StubLLM(_StubBackend):
+    """Drop-in replacement for the LLM with configurable latency, streaming rate and error rate.
+
+    Answers the report planner with a plan of num_sections sections (the first
+    and last without research), the query generator with queries_per_section
+    queries, the section writer with section_tokens words of filler and the
+    final writer with a report containing the [section] placeholder.
+
+    Like an OpenAI-compatible provider with prefix caching, every answer reports
+    its prompt tokens (counted as words) and how many of them were cached: the
+    longest prefix, in whole blocks of cache_block_tokens, sent before. A value
+    of 0 turns the simulated cache off.
+    """
+
+    model = "stub"
+
+    def __init__(self, num_sections: int = 5, queries_per_section: int = 3, section_tokens: int = 300,
+                 latency: Optional[LatencyModel] = None, tokens_per_second: float = 100.0, chunk_tokens: int = 4,
+                 error_rate: float = 0.0, error_status: int = 429, seed: int = 0, cache_block_tokens: int = 128):
+        super().__init__(error_rate, error_status, seed)
+        self.num_sections = num_sections
+        self.queries_per_section = queries_per_section
+        self.section_tokens = section_tokens
+        self.latency = latency or LatencyModel(0.5, 1.5)
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = max(chunk_tokens, 1)
+        self.cache_block_tokens = cache_block_tokens
+        self._cached_blocks = set()
+
+    def _usage(self, prompt: str) -> Dict[str, Any]:
+        """Report the prompt tokens and cached prompt tokens of a call, caching the prompt's blocks."""
+        words = prompt.split()
+        cached = 0
+        if self.cache_block_tokens > 0:
+            digest = hashlib.sha1()
+            hit = True
+            for end in range(self.cache_block_tokens, len(words) + 1, self.cache_block_tokens):
+                digest.update(" ".join(words[end - self.cache_block_tokens:end]).encode("utf-8"))
+                block = digest.copy().hexdigest()
+                if hit and block in self._cached_blocks:
+                    cached = end
+                else:
+                    hit = False
+                    self._cached_blocks.add(block)
+        return {"usage": {"prompt_tokens": len(words), "prompt_tokens_details": {"cached_tokens": cached}}}
+
+    def _respond(self, prompt: str, rng: random.Random) -> str:
+        if "I want a plan for a report" in prompt:
+            return json.dumps([
+                {
+                    "name": f"Section {index + 1}",
+                    "description": f"Section {index + 1} of the report: {' '.join(rng.choices(_WORDS, k=6))}",
+                    "research": 0 < index < self.num_sections - 1,
+                    "content": ""
+                } for index in range(self.num_sections)
+            ])
+        if "search engine queries" in prompt:
+            digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+            return ", ".join(f"'{digest} {' '.join(rng.choices(_WORDS, k=3))}'" for _ in range(self.queries_per_section))
+        text = " ".join(rng.choices(_WORDS, k=self.section_tokens))
+        if "<Available report content>" in prompt:
+            return f"# Report\n\n[section]\n\n## Conclusion\n\n{text}"
+        return f"## Section\n\n{text}"
+
+    def _chunks(self, text: str) -> List[str]:
+        words = text.split(" ")
+        return [" ".join(words[i:i + self.chunk_tokens]) + (" " if i + self.chunk_tokens < len(words) else "")
+                for i in range(0, len(words), self.chunk_tokens)]
+
+    async def acomplete(self, prompt: str, **kwargs: Any) -> CompletionResponse:
+        rng = self._rng(prompt)
+        await asyncio.sleep(self.latency.sample(rng))
+        self._maybe_fail(rng)
+        text = self._respond(prompt, rng)
+        if self.tokens_per_second > 0:
+            await asyncio.sleep(len(text.split(" ")) / self.tokens_per_second)
+        return CompletionResponse(text=text, raw=self._usage(prompt))
+
+    async def astream_complete(self, prompt: str, **kwargs: Any) -> AsyncGenerator[CompletionResponse, None]:
+        rng = self._rng(prompt)
+        await asyncio.sleep(self.latency.sample(rng))
+        self._maybe_fail(rng)
+        chunks = self._chunks(self._respond(prompt, rng))
+        delay = self.chunk_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        usage = self._usage(prompt)
+
+        async def gen():
+            text = ""
+            for index, chunk in enumerate(chunks):
+                if index and delay:
+                    await asyncio.sleep(delay)
+                text += chunk
+                # Usage comes with the last chunk, as with stream_options={"include_usage": True}
+                yield CompletionResponse(text=text, delta=chunk, raw=usage if index == len(chunks) - 1 else None)
+
+        return gen()
+
+
+class StubSearchClient(_StubBackend):
+    """Drop-in replacement for AsyncTavilyClient with configurable latency and error rate.
+
+    Advanced searches take advanced_factor times as long as basic ones.
+    """
+
+    def __init__(self, latency: Optional[LatencyModel] = None, advanced_factor: float = 2.0,
+                 content_tokens: int = 200, error_rate: float = 0.0, error_status: int = 429, seed: int = 0):
+        super().__init__(error_rate, error_status, seed)
+        self.latency = latency or LatencyModel(0.8, 2.0)
+        self.advanced_factor = advanced_factor
+        self.content_tokens = content_tokens
+
+    async def search(self, query: str, search_depth: str = "basic", max_results: int = 5,
+                     **kwargs: Any) -> Dict[str, Any]:
+        rng = self._rng(f"{search_depth}:{max_results}:{query}")
+        latency = self.latency.sample(rng) * (self.advanced_factor if search_depth == "advanced" else 1)
+        await asyncio.sleep(latency)
+        self._maybe_fail(rng)
+        slug = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+        return {
+            "query": query,
+            "response_time": latency,
+            "results": [
+                {
+                    "title": f"{query} ({index + 1})",
+                    "url": f"https://example.com/{slug}/{index}",
+                    "content": " ".join(rng.choices(_WORDS, k=self.content_tokens)),
+                    "score": round(rng.uniform(0.6, 1.0), 3)
+                } for index in range(max_results)
+            ]
+        }
@@ -1,9 +1,5 @@
 import os
-from dotenv import load_dotenv
-from typing import Dict, Any
-
-# Load environment variables
-load_dotenv()
+from typing import Dict, Any, List, Optional
 
 class Config:
     """Centralized configuration management for the research workflow.
@@ -11,8 +7,27 @@ class Config:
     This class provides a single source of truth for all configuration settings
     used throughout the application, including API keys, model parameters, and
     workflow settings.
+    
+    Config() reads the process environment only; use Config.load() to also read
+    a .env file first.
     """
     
+    @classmethod
+    def load(cls, env_file: Optional[str] = None) -> "Config":
+        """Load environment variables from a .env file, then read the configuration.
+        
+        Variables already set in the environment take precedence over the file.
+        
+        Args:
+            env_file: Path of the .env file, searched for upwards from this package if None
+            
+        Returns:
+            Configuration
+        """
+        from dotenv import load_dotenv
+        load_dotenv(env_file)
+        return cls()
+    
     def __init__(self):
         # LLM Configuration
         self.open_router_api_key = os.getenv("OPEN_ROUTER_API_KEY")
@@ -20,16 +35,124 @@ class Config:
         self.max_tokens = int(os.getenv("MAX_TOKENS", "48096"))
         self.context_window = int(os.getenv("CONTEXT_WINDOW", "1000000"))
         
+        # Model Routing Configuration: comma separated models per step, tried in order
+        self.plan_models = os.getenv("PLAN_MODELS", "")
+        self.query_models = os.getenv("QUERY_MODELS", "")
+        self.section_models = os.getenv("SECTION_MODELS", "")
+        self.final_models = os.getenv("FINAL_MODELS", "")
+        self.fallback_models = os.getenv("FALLBACK_MODELS", "")
+        
         # Search Configuration
         self.tavily_api_key = os.getenv("TAVILY_API_KEY")
         self.search_depth = os.getenv("SEARCH_DEPTH", "advanced")
         self.max_search_results = int(os.getenv("MAX_SEARCH_RESULTS", "1"))
         self.max_queries_per_section = int(os.getenv("MAX_QUERIES_PER_SECTION", "3"))
+        self.search_mode = os.getenv("SEARCH_MODE", "live").lower()
+        self.search_fanout = os.getenv("SEARCH_FANOUT", "fixed").lower()
+        self.search_evidence_budget = int(os.getenv("SEARCH_EVIDENCE_BUDGET", "4"))
+        self.search_initial_queries = int(os.getenv("SEARCH_INITIAL_QUERIES", "1"))
+        self.search_min_evidence_score = float(os.getenv("SEARCH_MIN_EVIDENCE_SCORE", "0.7"))
+        self.search_max_overlap = float(os.getenv("SEARCH_MAX_OVERLAP", "0.8"))
+        self.context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+        
+        # Search Cache Configuration
+        self.search_cache_enabled = os.getenv("SEARCH_CACHE_ENABLED", "False").lower() == "true"
+        self.search_cache_path = os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.sqlite3")
+        self.search_cache_ttl = int(os.getenv("SEARCH_CACHE_TTL", "86400"))
+        self.search_cache_max_entries = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "10000"))
+        self.search_cache_max_bytes = int(os.getenv("SEARCH_CACHE_MAX_BYTES", "0"))
+        self.semantic_cache_enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "False").lower() == "true"
+        self.semantic_cache_threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+        self.semantic_cache_max_entries = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+        
+        # Embedding Configuration, used by the semantic search cache and local index vectors
+        self.embed_model = os.getenv("EMBED_MODEL", "")
+        self.embed_api_key = os.getenv("EMBED_API_KEY")
+        self.embed_api_base = os.getenv("EMBED_API_BASE", "")
+        
+        # Local Source Index Configuration
+        self.local_index_enabled = os.getenv("LOCAL_INDEX_ENABLED", "False").lower() == "true"
+        self.local_index_path = os.getenv("LOCAL_INDEX_PATH", ".cache/local_index.sqlite3")
+        self.local_index_freshness = int(os.getenv("LOCAL_INDEX_FRESHNESS", "604800"))
+        self.local_index_min_recall = float(os.getenv("LOCAL_INDEX_MIN_RECALL", "0.6"))
+        self.local_index_min_coverage = float(os.getenv("LOCAL_INDEX_MIN_COVERAGE", "0.5"))
+        self.local_index_max_entries = int(os.getenv("LOCAL_INDEX_MAX_ENTRIES", "100000"))
+        self.local_index_vectors = os.getenv("LOCAL_INDEX_VECTORS", "False").lower() == "true"
+        
+        # LLM Cache Configuration
+        self.llm_cache_enabled = os.getenv("LLM_CACHE_ENABLED", "False").lower() == "true"
+        self.llm_cache_path = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+        self.llm_cache_ttl = int(os.getenv("LLM_CACHE_TTL", "604800"))
+        self.llm_cache_max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+        self.llm_cache_max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES", "0"))
+        
+        # Scheduler Configuration
+        self.scheduler_enabled = os.getenv("SCHEDULER_ENABLED", "False").lower() == "true"
+        self.scheduler_max_in_flight = int(os.getenv("SCHEDULER_MAX_IN_FLIGHT", "16"))
+        self.llm_rate_limit = float(os.getenv("LLM_RATE_LIMIT", "5"))
+        self.llm_rate_burst = int(os.getenv("LLM_RATE_BURST", "10"))
+        self.search_rate_limit = float(os.getenv("SEARCH_RATE_LIMIT", "5"))
+        self.search_rate_burst = int(os.getenv("SEARCH_RATE_BURST", "10"))
+        self.scheduler_max_retries = int(os.getenv("SCHEDULER_MAX_RETRIES", "3"))
+        self.scheduler_backoff_base = float(os.getenv("SCHEDULER_BACKOFF_BASE", "1.0"))
+        self.scheduler_backoff_max = float(os.getenv("SCHEDULER_BACKOFF_MAX", "30.0"))
+        
+        # HTTP Connection Pool Configuration
+        self.http_max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+        self.http_max_keepalive = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+        self.http_keepalive_expiry = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+        self.http_timeout = float(os.getenv("HTTP_TIMEOUT", "60"))
+        self.http2 = os.getenv("HTTP2", "True").lower() == "true"
+        
+        # Server Configuration
+        self.server_host = os.getenv("SERVER_HOST", "0.0.0.0")
+        self.server_port = int(os.getenv("SERVER_PORT", "8000"))
+        self.server_workers = int(os.getenv("SERVER_WORKERS", "8"))
+        self.server_queue_size = int(os.getenv("SERVER_QUEUE_SIZE", "100"))
+        self.server_retry_after = int(os.getenv("SERVER_RETRY_AFTER", "10"))
+        self.server_max_events = int(os.getenv("SERVER_MAX_EVENTS", "1000"))
+        self.server_max_pending_events = int(os.getenv("SERVER_MAX_PENDING_EVENTS", "1000"))
+        
+        # Distributed Configuration
+        self.distributed_broker = os.getenv("DISTRIBUTED_BROKER", "")
+        self.distributed_workers = int(os.getenv("DISTRIBUTED_WORKERS", "0"))
+        self.distributed_worker_concurrency = int(os.getenv("DISTRIBUTED_WORKER_CONCURRENCY", "4"))
+        
+        # Checkpoint Configuration
+        self.checkpoint_enabled = os.getenv("CHECKPOINT_ENABLED", "False").lower() == "true"
+        self.checkpoint_path = os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite3")
+        self.checkpoint_ttl = int(os.getenv("CHECKPOINT_TTL", "604800"))
+        
+        # Hedged Request Configuration
+        self.hedging_enabled = os.getenv("HEDGING_ENABLED", "False").lower() == "true"
+        self.hedge_percentile = float(os.getenv("HEDGE_PERCENTILE", "95"))
+        self.hedge_min_samples = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_window = int(os.getenv("HEDGE_WINDOW", "200"))
+        
+        # Request Coalescing Configuration
+        self.single_flight_enabled = os.getenv("SINGLE_FLIGHT_ENABLED", "False").lower() == "true"
+        
+        # Prompt Caching Configuration
+        self.prompt_cache_enabled = os.getenv("PROMPT_CACHE_ENABLED", "False").lower() == "true"
+        self.prompt_cache_hints = os.getenv("PROMPT_CACHE_HINTS", "True").lower() == "true"
+        
+        # Tracing Configuration
+        self.tracing_enabled = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+        self.tracing_exporters = os.getenv("TRACING_EXPORTERS", "jsonl")
+        self.tracing_path = os.getenv("TRACING_PATH", ".cache/traces.jsonl")
         
         # Workflow Configuration
         self.workflow_timeout = int(os.getenv("WORKFLOW_TIMEOUT", "300"))
         self.search_workflow_timeout = int(os.getenv("SEARCH_WORKFLOW_TIMEOUT", "60"))
+        self.deadline_reserve = float(os.getenv("DEADLINE_RESERVE", "30"))
+        self.batch_timeout = int(os.getenv("BATCH_TIMEOUT", "1800"))
         self.verbose = os.getenv("VERBOSE", "True").lower() == "true"
+        self.stream_plan = os.getenv("STREAM_PLAN", "False").lower() == "true"
+        self.progress_interval = float(os.getenv("PROGRESS_INTERVAL", "0.1"))
+        self.progress_max_chars = int(os.getenv("PROGRESS_MAX_CHARS", "1024"))
+        self.progress_max_buffer = int(os.getenv("PROGRESS_MAX_BUFFER", "65536"))
+        self.max_pending_events = int(os.getenv("PROGRESS_MAX_PENDING", "1000"))
+        self.overflow_policy = os.getenv("PROGRESS_OVERFLOW", "coalesce").lower()
     
     def get_llm_config(self) -> Dict[str, Any]:
         """Get LLM configuration parameters."""
@@ -40,13 +163,151 @@ class Config:
             "context_window": self.context_window
         }
     
+    def get_routing_config(self) -> Dict[str, Any]:
+        """Get per-step model chain configuration parameters."""
+        def models(value: str) -> List[str]:
+            return [model.strip() for model in value.split(",") if model.strip()]
+        return {
+            "plan": models(self.plan_models),
+            "queries": models(self.query_models),
+            "section": models(self.section_models),
+            "final": models(self.final_models),
+            "fallbacks": models(self.fallback_models)
+        }
+    
     def get_search_config(self) -> Dict[str, Any]:
         """Get search configuration parameters."""
         return {
             "api_key": self.tavily_api_key,
             "search_depth": self.search_depth,
             "max_results": self.max_search_results,
-            "max_queries": self.max_queries_per_section
+            "max_queries": self.max_queries_per_section,
+            "mode": self.search_mode,
+            "fanout": self.search_fanout,
+            "evidence_budget": self.search_evidence_budget,
+            "initial_queries": self.search_initial_queries,
+            "min_evidence_score": self.search_min_evidence_score,
+            "max_overlap": self.search_max_overlap
+        }
+    
+    def get_cache_config(self) -> Dict[str, Any]:
+        """Get search result and LLM response cache configuration parameters."""
+        return {
+            "enabled": self.search_cache_enabled,
+            "path": self.search_cache_path,
+            "ttl": self.search_cache_ttl,
+            "max_entries": self.search_cache_max_entries,
+            "max_bytes": self.search_cache_max_bytes,
+            "semantic_enabled": self.semantic_cache_enabled,
+            "semantic_threshold": self.semantic_cache_threshold,
+            "semantic_max_entries": self.semantic_cache_max_entries,
+            "llm_enabled": self.llm_cache_enabled,
+            "llm_path": self.llm_cache_path,
+            "llm_ttl": self.llm_cache_ttl,
+            "llm_max_entries": self.llm_cache_max_entries,
+            "llm_max_bytes": self.llm_cache_max_bytes
+        }
+    
+    def get_embedding_config(self) -> Dict[str, Any]:
+        """Get embedding model configuration parameters."""
+        return {
+            "model": self.embed_model,
+            "api_key": self.embed_api_key,
+            "api_base": self.embed_api_base
+        }
+    
+    def get_scheduler_config(self) -> Dict[str, Any]:
+        """Get concurrency and rate limit configuration parameters."""
+        return {
+            "enabled": self.scheduler_enabled,
+            "max_in_flight": self.scheduler_max_in_flight,
+            "llm_rate": self.llm_rate_limit,
+            "llm_burst": self.llm_rate_burst,
+            "search_rate": self.search_rate_limit,
+            "search_burst": self.search_rate_burst,
+            "max_retries": self.scheduler_max_retries,
+            "backoff_base": self.scheduler_backoff_base,
+            "backoff_max": self.scheduler_backoff_max
+        }
+    
+    def get_pool_config(self) -> Dict[str, Any]:
+        """Get HTTP connection pool configuration parameters."""
+        return {
+            "max_connections": self.http_max_connections,
+            "max_keepalive": self.http_max_keepalive,
+            "keepalive_expiry": self.http_keepalive_expiry,
+            "timeout": self.http_timeout,
+            "http2": self.http2
+        }
+    
+    def get_server_config(self) -> Dict[str, Any]:
+        """Get research service configuration parameters."""
+        return {
+            "host": self.server_host,
+            "port": self.server_port,
+            "workers": self.server_workers,
+            "queue_size": self.server_queue_size,
+            "retry_after": self.server_retry_after,
+            "max_events": self.server_max_events,
+            "max_pending_events": self.server_max_pending_events
+        }
+    
+    def get_distributed_config(self) -> Dict[str, Any]:
+        """Get distributed section research configuration parameters."""
+        return {
+            "broker": self.distributed_broker,
+            "workers": self.distributed_workers,
+            "worker_concurrency": self.distributed_worker_concurrency
+        }
+    
+    def get_local_index_config(self) -> Dict[str, Any]:
+        """Get local source index configuration parameters."""
+        return {
+            "enabled": self.local_index_enabled,
+            "path": self.local_index_path,
+            "freshness": self.local_index_freshness,
+            "min_recall": self.local_index_min_recall,
+            "min_coverage": self.local_index_min_coverage,
+            "max_entries": self.local_index_max_entries,
+            "vectors": self.local_index_vectors
+        }
+    
+    def get_checkpoint_config(self) -> Dict[str, Any]:
+        """Get report checkpoint configuration parameters."""
+        return {
+            "enabled": self.checkpoint_enabled,
+            "path": self.checkpoint_path,
+            "ttl": self.checkpoint_ttl
+        }
+    
+    def get_single_flight_config(self) -> Dict[str, Any]:
+        """Get request coalescing configuration parameters."""
+        return {
+            "enabled": self.single_flight_enabled
+        }
+    
+    def get_prompt_cache_config(self) -> Dict[str, Any]:
+        """Get prompt caching configuration parameters."""
+        return {
+            "enabled": self.prompt_cache_enabled,
+            "hints": self.prompt_cache_hints
+        }
+    
+    def get_hedging_config(self) -> Dict[str, Any]:
+        """Get hedged request configuration parameters."""
+        return {
+            "enabled": self.hedging_enabled,
+            "percentile": self.hedge_percentile,
+            "min_samples": self.hedge_min_samples,
+            "window": self.hedge_window
+        }
+    
+    def get_tracing_config(self) -> Dict[str, Any]:
+        """Get tracing configuration parameters."""
+        return {
+            "enabled": self.tracing_enabled,
+            "exporters": [name.strip() for name in self.tracing_exporters.split(",") if name.strip()],
+            "path": self.tracing_path
         }
     
     def get_workflow_config(self) -> Dict[str, Any]:
@@ -54,5 +315,14 @@ class Config:
         return {
             "timeout": self.workflow_timeout,
             "search_timeout": self.search_workflow_timeout,
-            "verbose": self.verbose
+            "deadline_reserve": self.deadline_reserve,
+            "batch_timeout": self.batch_timeout,
+            "verbose": self.verbose,
+            "stream_plan": self.stream_plan,
+            "context_token_budget": self.context_token_budget,
+            "progress_interval": self.progress_interval,
+            "progress_max_chars": self.progress_max_chars,
+            "progress_max_buffer": self.progress_max_buffer,
+            "max_pending_events": self.max_pending_events,
+            "overflow_policy": self.overflow_policy
         }
\ No newline at end of file
@@ -0,0 +1 @@
+# Contains brokers and workers for running section research in other processes
\ No newline at end of file
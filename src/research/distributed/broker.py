@@ -0,0 +1,207 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+from ..models.models import Section
+from ..utils.deadline import remaining
+
+# Seconds to wait past a section's deadline for the worker to send what it has
+RESULT_GRACE_PERIOD = 5.0
+
+
+class SectionBroker(ABC):
+    """Sends section jobs to worker processes and relays their progress back.
+
+    A job carries a planned Section; workers search and write it and answer with
+    "progress" messages for each streamed chunk followed by one "result" (or
+    "error") message.
+    """
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def _submit(self, job: Dict[str, Any]) -> asyncio.Queue:
+        """Send a job and return the queue its messages will arrive on."""
+
+    async def _done(self, job_id: str) -> None:
+        """Release any resources held for a finished job."""
+
+    async def run_section(self, section: Section, emit: Callable[[str], None], deadline: Optional[float] = None,
+                          topic: Optional[str] = None) -> str:
+        """Research and write a section on a worker, recording its queries, source fingerprint and search statistics on it.
+
+        Args:
+            section: Section to write
+            emit: Callback receiving each streamed chunk of the section content
+            deadline: Optional time by which the worker has to finish the section;
+                if it has not answered shortly after, the content streamed so far is returned
+            topic: Topic of the report the section belongs to
+
+        Returns:
+            Section content
+        """
+        job = {"job_id": uuid.uuid4().hex, "section": section.model_dump(), "deadline": deadline, "topic": topic}
+        messages = await self._submit(job)
+        parts = []
+        try:
+            while True:
+                timeout = remaining(deadline + RESULT_GRACE_PERIOD) if deadline is not None else None
+                try:
+                    message = await asyncio.wait_for(messages.get(), timeout)
+                except asyncio.TimeoutError:
+                    print(f"Section worker missed the deadline for '{section.name}'")
+                    return "".join(parts)
+                if message["type"] == "progress":
+                    parts.append(message["msg"])
+                    emit(message["msg"])
+                elif message["type"] == "result":
+                    section.queries = message.get("queries", [])
+                    section.query_depths = message.get("query_depths", {})
+                    section.fingerprint = message.get("fingerprint")
+                    section.search_stats = message.get("search_stats")
+                    return message["content"]
+                else:
+                    raise RuntimeError(f"Section worker failed: {message.get('error')}")
+        finally:
+            await self._done(job["job_id"])
+
+
+class MultiprocessingBroker(SectionBroker):
+    """Runs section jobs on local worker processes connected by multiprocessing queues."""
+
+    def __init__(self, num_workers: Optional[int] = None, worker_concurrency: int = 4):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.worker_concurrency = worker_concurrency
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks = None
+        self._results = None
+        self._processes = []
+        self._reader: Optional[asyncio.Task] = None
+        self._jobs: Dict[str, asyncio.Queue] = {}
+
+    async def start(self) -> None:
+        if self._processes:
+            return
+        from .worker import run_worker_process
+
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        processes = [
+            self._context.Process(
+                target=run_worker_process,
+                args=(self._tasks, self._results, self.worker_concurrency, self.num_workers),
+                daemon=True
+            ) for _ in range(self.num_workers)
+        ]
+        for process in processes:
+            process.start()
+        self._processes = processes
+        self._reader = asyncio.create_task(self._read_results())
+
+    async def stop(self) -> None:
+        if not self._processes:
+            return
+        for _ in self._processes:
+            self._tasks.put(None)
+        self._results.put(None)
+        await self._reader
+        for process in self._processes:
+            await asyncio.to_thread(process.join, 5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    async def _read_results(self) -> None:
+        while True:
+            message = await asyncio.to_thread(self._results.get)
+            if message is None:
+                return
+            queue = self._jobs.get(message["job_id"])
+            if queue is not None:
+                queue.put_nowait(message)
+
+    async def _submit(self, job: Dict[str, Any]) -> asyncio.Queue:
+        await self.start()
+        queue: asyncio.Queue = asyncio.Queue()
+        self._jobs[job["job_id"]] = queue
+        self._tasks.put(job)
+        return queue
+
+    async def _done(self, job_id: str) -> None:
+        self._jobs.pop(job_id, None)
+
+
+class RedisBroker(SectionBroker):
+    """Runs section jobs on workers on any machine sharing a Redis-compatible server.
+
+    Jobs are pushed to one list that every worker pops from; each job's messages
+    come back on a list of its own. Start workers with
+    `python -m research.distributed.worker --broker redis://host:6379/0`.
+    """
+
+    def __init__(self, url: str, prefix: str = "research", result_ttl: int = 3600):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ImportError("RedisBroker requires the redis package: pip install redis")
+        self._redis = redis.from_url(url)
+        self.tasks_key = f"{prefix}:sections"
+        self.results_prefix = f"{prefix}:results:"
+        self.result_ttl = result_ttl
+        self._readers: Dict[str, asyncio.Task] = {}
+
+    async def stop(self) -> None:
+        for reader in self._readers.values():
+            reader.cancel()
+        await self._redis.aclose()
+
+    async def _submit(self, job: Dict[str, Any]) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._readers[job["job_id"]] = asyncio.create_task(self._read_results(job["job_id"], queue))
+        await self._redis.rpush(self.tasks_key, json.dumps(job, ensure_ascii=False))
+        return queue
+
+    async def _read_results(self, job_id: str, queue: asyncio.Queue) -> None:
+        key = self.results_prefix + job_id
+        while True:
+            _, raw = await self._redis.blpop([key])
+            message = json.loads(raw)
+            queue.put_nowait(message)
+            if message["type"] != "progress":
+                return
+
+    async def _done(self, job_id: str) -> None:
+        reader = self._readers.pop(job_id, None)
+        if reader:
+            reader.cancel()
+        await self._redis.delete(self.results_prefix + job_id)
+
+
+def build_section_broker(distributed_config: Dict[str, Any]) -> Optional[SectionBroker]:
+    """Create the section broker described by the distributed configuration.
+
+    Args:
+        distributed_config: Dictionary returned by Config.get_distributed_config()
+
+    Returns:
+        Section broker, or None if distributed mode is disabled
+    """
+    broker = distributed_config.get("broker")
+    if not broker:
+        return None
+    if broker == "multiprocessing":
+        return MultiprocessingBroker(
+            num_workers=distributed_config.get("workers") or None,
+            worker_concurrency=distributed_config["worker_concurrency"]
+        )
+    if broker.startswith(("redis://", "rediss://")):
+        return RedisBroker(broker)
+    raise ValueError(f"Unknown section broker: {broker}")
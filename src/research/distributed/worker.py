@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import json
+from typing import Any, Callable, Dict
+
+from ..config.config import Config
+from ..models.models import Section
+from ..utils.streaming import ProgressCoalescer
+from ..workflows.factory import build_workflows
+
+
+async def process_job(workflows, job: Dict[str, Any], send: Callable[[Dict[str, Any]], Any]) -> None:
+    """Search and write one section job, sending progress and the result back.
+
+    Args:
+        workflows: Tuple of the worker's ResearchWorkflow and SearchWorkflow
+        job: Section job sent by the broker
+        send: Callback delivering a message to the coordinator
+    """
+    workflow, search_workflow = workflows
+    job_id = job["job_id"]
+
+    def send_progress(msg: str) -> None:
+        send({"job_id": job_id, "type": "progress", "msg": msg})
+
+    # Coalesced before they are sent, so the broker carries a few messages per section instead of one per token
+    emit = ProgressCoalescer(send_progress, workflow.progress_interval, workflow.progress_max_chars,
+                             max_buffer=workflow.progress_max_buffer)
+    try:
+        section = Section(**job["section"])
+        try:
+            content = await workflow.write_section(section, search_workflow, emit, job.get("deadline"),
+                                                 topic=job.get("topic"))
+        finally:
+            emit.flush()
+        send({"job_id": job_id, "type": "result", "content": content, "queries": section.queries,
+              "query_depths": section.query_depths, "fingerprint": section.fingerprint,
+              "search_stats": section.search_stats})
+    except Exception as e:
+        print(f"Error processing section job {job_id}: {e}")
+        send({"job_id": job_id, "type": "error", "error": str(e)})
+
+
+async def _serve(next_job, send, concurrency: int, num_workers: int = 1) -> None:
+    """Run jobs from next_job() with bounded concurrency until it returns None.
+
+    The configured scheduler limits are for the whole deployment, so each of the
+    num_workers worker processes schedules its calls with an equal share of them.
+    """
+    workflows = build_workflows(Config.load(), distributed=False, scheduler_shares=num_workers)
+    semaphore = asyncio.Semaphore(concurrency)
+    running = set()
+
+    async def run(job):
+        try:
+            await process_job(workflows, job, send)
+        finally:
+            semaphore.release()
+
+    while True:
+        await semaphore.acquire()
+        job = await next_job()
+        if job is None:
+            break
+        task = asyncio.create_task(run(job))
+        running.add(task)
+        task.add_done_callback(running.discard)
+    await asyncio.gather(*running)
+    workflows[0].tracer.shutdown()
+
+
+def run_worker_process(tasks, results, concurrency: int, num_workers: int = 1) -> None:
+    """Entry point of worker processes started by MultiprocessingBroker."""
+    async def next_job():
+        return await asyncio.to_thread(tasks.get)
+
+    asyncio.run(_serve(next_job, results.put, concurrency, num_workers))
+
+
+async def serve_redis(url: str, concurrency: int, prefix: str = "research", result_ttl: int = 3600,
+                      num_workers: int = 1) -> None:
+    """Process section jobs from a Redis-compatible broker until interrupted.
+
+    num_workers is the total number of worker processes serving the broker, which
+    split the configured scheduler limits between them.
+    """
+    import redis.asyncio as redis
+
+    client = redis.from_url(url)
+    outbox: asyncio.Queue = asyncio.Queue()
+
+    async def next_job():
+        _, raw = await client.blpop([f"{prefix}:sections"])
+        return json.loads(raw)
+
+    async def publish():
+        # A single publisher keeps each job's messages in order
+        while True:
+            message = await outbox.get()
+            if message is None:
+                return
+            key = f"{prefix}:results:{message['job_id']}"
+            await client.rpush(key, json.dumps(message, ensure_ascii=False))
+            await client.expire(key, result_ttl)
+
+    publisher = asyncio.create_task(publish())
+    try:
+        await _serve(next_job, outbox.put_nowait, concurrency, num_workers)
+    finally:
+        outbox.put_nowait(None)
+        await publisher
+        await client.aclose()
+
+
+def main():
+    """Run a section worker against a Redis-compatible broker."""
+    config = Config.load()
+    parser = argparse.ArgumentParser(description="Research section worker")
+    parser.add_argument("--broker", required=True, help="Broker URL, e.g. redis://localhost:6379/0")
+    parser.add_argument("--concurrency", type=int, default=config.distributed_worker_concurrency,
+                        help="Number of sections processed at the same time")
+    parser.add_argument("--workers", type=int, default=config.distributed_workers or 1,
+                        help="Total number of worker processes, which split the configured rate limits")
+    args = parser.parse_args()
+    asyncio.run(serve_redis(args.broker, args.concurrency, num_workers=args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List, Optional
 
 class Section(BaseModel):
     name: str
     description: str
     research: bool
     content: str
+    # Search queries and source fingerprint the content was written from, used to refresh the report
+    queries: List[str] = []
+    fingerprint: Optional[str] = None
+    # Depths each query was searched at, deeper results merged first; the configured depth if missing
+    query_depths: Dict[str, List[str]] = {}
+    # How the section was searched: queries searched and skipped, escalations and evidence found
+    search_stats: Optional[Dict[str, Any]] = None
 
 class Report(BaseModel):
     sections: List[Section]
\ No newline at end of file
@@ -0,0 +1 @@
+# Contains the long-running research service
\ No newline at end of file
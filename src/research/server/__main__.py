@@ -0,0 +1,15 @@
+import uvicorn
+
+from ..config.config import Config
+from .app import create_app
+
+
+def main():
+    """Run the research service with uvicorn."""
+    config = Config.load()
+    server_config = config.get_server_config()
+    uvicorn.run(create_app(config), host=server_config["host"], port=server_config["port"])
+
+
+if __name__ == "__main__":
+    main()
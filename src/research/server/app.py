@@ -0,0 +1,144 @@
+import json
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from ..config.config import Config
+from ..utils.clients import get_client_registry
+from ..workflows.factory import build_research_workflow
+from .jobs import FINISHED_STATUSES, JobManager, QueueFullError
+
+
+class ReportRequest(BaseModel):
+    topic: str
+
+
+def create_app(config: Optional[Config] = None, workflow=None) -> FastAPI:
+    """Create the research service application.
+
+    The service holds one shared ResearchWorkflow and feeds report jobs to it
+    through a bounded queue processed by a pool of async workers.
+
+    Args:
+        config: Optional configuration object
+        workflow: Optional prebuilt ResearchWorkflow to serve
+
+    Returns:
+        FastAPI application
+    """
+    if config is None:
+        config = Config.load()
+    server_config = config.get_server_config()
+    registry = get_client_registry(config.get_pool_config())
+    workflow = workflow or build_research_workflow(config)
+    manager = JobManager(
+        workflow,
+        num_workers=server_config["workers"],
+        max_queue_size=server_config["queue_size"],
+        max_events=server_config["max_events"],
+        max_pending_events=server_config["max_pending_events"]
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await registry.startup()
+        await manager.start()
+        yield
+        await manager.stop()
+        if workflow.section_broker:
+            await workflow.section_broker.stop()
+        workflow.tracer.shutdown()
+        await registry.shutdown()
+
+    app = FastAPI(title="Open Deep Research", lifespan=lifespan)
+    app.state.jobs = manager
+
+    def get_job(job_id: str):
+        job = manager.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown report job: {job_id}")
+        return job
+
+    @app.post("/reports", status_code=202)
+    async def submit_report(request: ReportRequest):
+        try:
+            job = manager.submit(request.topic)
+        except QueueFullError as e:
+            return JSONResponse(status_code=429, content={"detail": str(e)},
+                                headers={"Retry-After": str(server_config["retry_after"])})
+        return job.to_dict()
+
+    @app.post("/reports/{job_id}/resume", status_code=202)
+    async def resume_report(job_id: str):
+        if not workflow.checkpoint_store:
+            raise HTTPException(status_code=409, detail="Report checkpoints are disabled")
+        job = manager.get(job_id)
+        if job is not None and job.status not in FINISHED_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Report job already {job.status.value}")
+        checkpoint = await workflow.checkpoint_store.aload(job_id)
+        if checkpoint is None:
+            raise HTTPException(status_code=404, detail=f"No checkpoint for report job: {job_id}")
+        try:
+            job = manager.submit(checkpoint["topic"], job_id=job_id, resume=True)
+        except QueueFullError as e:
+            return JSONResponse(status_code=429, content={"detail": str(e)},
+                                headers={"Retry-After": str(server_config["retry_after"])})
+        return job.to_dict()
+
+    @app.post("/reports/{job_id}/refresh", status_code=202)
+    async def refresh_report(job_id: str):
+        if not workflow.checkpoint_store:
+            raise HTTPException(status_code=409, detail="Report checkpoints are disabled")
+        job = manager.get(job_id)
+        if job is not None and job.status not in FINISHED_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Report job already {job.status.value}")
+        checkpoint = await workflow.checkpoint_store.aload(job_id)
+        if checkpoint is None:
+            raise HTTPException(status_code=404, detail=f"No checkpoint for report job: {job_id}")
+        if checkpoint["result"] is None:
+            raise HTTPException(status_code=409, detail="Report is not finished, resume it instead")
+        try:
+            job = manager.submit(checkpoint["topic"], job_id=job_id, refresh=True)
+        except QueueFullError as e:
+            return JSONResponse(status_code=429, content={"detail": str(e)},
+                                headers={"Retry-After": str(server_config["retry_after"])})
+        return job.to_dict()
+
+    @app.get("/reports/{job_id}")
+    async def get_report(job_id: str):
+        return get_job(job_id).to_dict()
+
+    @app.get("/reports/{job_id}/events")
+    async def stream_report_events(job_id: str):
+        job = get_job(job_id)
+
+        async def event_stream():
+            async for msg in job.subscribe():
+                yield f"data: {json.dumps({'msg': msg}, ensure_ascii=False)}\n\n"
+            yield f"event: done\ndata: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    @app.delete("/reports/{job_id}")
+    async def cancel_report(job_id: str):
+        job = get_job(job_id)
+        if not manager.cancel(job_id):
+            raise HTTPException(status_code=409, detail=f"Report job already {job.status.value}")
+        return job.to_dict()
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "ok",
+            "jobs": manager.stats(),
+            "connections": registry.stats(),
+            "hedging": workflow.hedger.stats() if workflow.hedger else None,
+            "coalescing": workflow.single_flight.stats() if workflow.single_flight else None,
+            "prompt_cache": workflow.prompt_cache.stats() if workflow.prompt_cache else None,
+            "models": workflow.router.stats() if workflow.router else None
+        }
+
+    return app
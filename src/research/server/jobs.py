@@ -0,0 +1,230 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from enum import Enum
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+from ..workflows.research_workflow import ProgressEvent
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class QueueFullError(Exception):
+    """Raised when a report job is submitted while the job queue is full."""
+
+
+class Job:
+    """A report request and the latest progress streamed about it.
+
+    Only the last max_events progress messages are kept for replay, and each
+    subscriber queue holds at most max_pending messages: a subscriber reading
+    slower than the job streams loses the oldest messages it has not read yet
+    rather than growing its queue without limit.
+    """
+
+    def __init__(self, topic: str, job_id: Optional[str] = None, resume: bool = False, refresh: bool = False,
+                 max_events: int = 1000, max_pending: int = 1000):
+        self.id = job_id or uuid.uuid4().hex
+        self.topic = topic
+        self.resume = resume
+        self.refresh = refresh
+        self.status = JobStatus.QUEUED
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: Deque[str] = deque(maxlen=max_events or None)
+        self.max_pending = max_pending
+        self.dropped_events = 0
+        self.task: Optional[asyncio.Task] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def publish(self, msg: Optional[str]) -> None:
+        """Record a progress message and forward it to every subscriber; None ends the stream."""
+        if msg is not None:
+            self.events.append(msg)
+        for queue in self._subscribers:
+            self._put(queue, msg)
+
+    def _put(self, queue: asyncio.Queue, msg: Optional[str]) -> None:
+        """Queue a message for a subscriber, dropping its oldest unread message if the queue is full."""
+        if queue.full():
+            queue.get_nowait()
+            self.dropped_events += 1
+        queue.put_nowait(msg)
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Replay the recent progress messages, then follow new ones until the job finishes."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending or 0)
+        for msg in self.events:
+            self._put(queue, msg)
+        if self.status in FINISHED_STATUSES:
+            self._put(queue, None)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                msg = await queue.get()
+                if msg is None:
+                    return
+                yield msg
+        finally:
+            self._subscribers.discard(queue)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "topic": self.topic,
+            "status": self.status.value,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "dropped_events": self.dropped_events
+        }
+
+
+class JobManager:
+    """Bounded queue of report jobs processed by a pool of async workers.
+
+    All jobs run on the same shared ResearchWorkflow instance. Submitting while
+    the queue is full raises QueueFullError so callers can apply backpressure.
+    """
+
+    def __init__(self, workflow, num_workers: int = 8, max_queue_size: int = 100, max_finished_jobs: int = 1000,
+                 max_events: int = 1000, max_pending_events: int = 1000):
+        self.workflow = workflow
+        self.num_workers = num_workers
+        self.max_finished_jobs = max_finished_jobs
+        self.max_events = max_events
+        self.max_pending_events = max_pending_events
+        self.jobs: Dict[str, Job] = {}
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._workers: List[asyncio.Task] = []
+        self._finished: List[str] = []
+
+    async def start(self) -> None:
+        """Start the worker pool."""
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def stop(self) -> None:
+        """Cancel running jobs and stop the worker pool."""
+        for job in self.jobs.values():
+            if job.task:
+                job.task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, topic: str, job_id: Optional[str] = None, resume: bool = False, refresh: bool = False) -> Job:
+        """Queue a report job.
+
+        Args:
+            topic: The research topic
+            job_id: Optional job id, also used as the report id for checkpoints
+            resume: Whether to resume the checkpointed report with this id
+            refresh: Whether to refresh the finished checkpointed report with this id
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If the job queue is full
+        """
+        job = Job(topic, job_id, resume, refresh, self.max_events, self.max_pending_events)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self._queue.maxsize} jobs)")
+        if job.id in self._finished:
+            # A finished job is being resumed or refreshed under the same id
+            self._finished.remove(job.id)
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job.
+
+        Returns:
+            True if the job was cancelled, False if it had already finished
+        """
+        job = self.jobs[job_id]
+        if job.status in FINISHED_STATUSES:
+            return False
+        if job.task:
+            job.task.cancel()
+        else:
+            # Still queued; the worker that picks it up will skip it
+            self._finish(job, JobStatus.CANCELLED)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status.value] = counts.get(job.status.value, 0) + 1
+        return {
+            "workers": self.num_workers,
+            "queued": self._queue.qsize(),
+            "max_queue_size": self._queue.maxsize,
+            "jobs": counts
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == JobStatus.QUEUED:
+                    job.task = asyncio.create_task(self._run(job))
+                    await asyncio.wait([job.task])
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        handler = None
+        try:
+            if job.resume:
+                handler = self.workflow.resume(job.id)
+            elif job.refresh:
+                handler = self.workflow.refresh(job.id)
+            else:
+                handler = self.workflow.run(input=job.topic, report_id=job.id)
+            async for event in handler.stream_events():
+                if isinstance(event, ProgressEvent):
+                    job.publish(event.msg)
+            job.result = await handler
+            self._finish(job, JobStatus.COMPLETED)
+        except asyncio.CancelledError:
+            if handler is not None:
+                await handler.cancel_run()
+            self._finish(job, JobStatus.CANCELLED)
+        except Exception as e:
+            print(f"Error running report job {job.id}: {e}")
+            job.error = str(e)
+            self._finish(job, JobStatus.FAILED)
+
+    def _finish(self, job: Job, status: JobStatus) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        job.publish(None)
+
+        # Forget the oldest finished jobs so memory stays bounded
+        self._finished.append(job.id)
+        while len(self._finished) > self.max_finished_jobs:
+            self.jobs.pop(self._finished.pop(0), None)
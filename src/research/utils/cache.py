@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Build a content-addressed cache key from arbitrary JSON-serializable parts.
+
+    Args:
+        parts: Values that together identify the cached entry
+
+    Returns:
+        Hex encoded SHA-256 digest of the parts
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so trivially different spellings share a cache entry.
+
+    Args:
+        query: Raw search query
+
+    Returns:
+        Lowercased query with surrounding quotes/punctuation and repeated whitespace removed
+    """
+    query = query.strip().strip('\'"`').strip()
+    query = re.sub(r'\s+', ' ', query)
+    return query.rstrip('.?!;:,').lower()
+
+
+class CacheBackend(ABC):
+    """Interface for key/value stores used by the research caches.
+
+    Backends store JSON-serializable values and keep hit/miss/eviction counters.
+    get() and set() may block; async code calls aget() and aset(), which backends
+    doing I/O run off the event loop.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on a miss."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Store a value."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Get the number of entries."""
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get a cached value from async code."""
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """Store a value from async code."""
+        self.set(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self)
+        }
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with optional TTL."""
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        super().__init__()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        created_at, value = entry
+        if self.ttl and time.time() - created_at > self.ttl:
+            del self._data[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.time(), value)
+        self._data.move_to_end(key)
+        while self.max_entries and len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(CacheBackend):
+    """Persistent SQLite cache with TTL and LRU eviction by entry count or total size.
+
+    Values are stored as zlib-compressed JSON so large payloads stay compact on disk.
+    aget() and aset() run the database access, compression and eviction in a worker
+    thread so they never block the event loop.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache(accessed_at)")
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(zlib.decompress(value).decode('utf-8'))
+
+    def set(self, key: str, value: Any) -> None:
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now)
+            )
+            self._evict()
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until limits are met."""
+        if self.ttl:
+            cursor = self._conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl,))
+            self.evictions += max(cursor.rowcount, 0)
+        if self.max_entries:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+        if self.max_bytes:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            while total > self.max_bytes:
+                row = self._conn.execute(
+                    "SELECT key, size FROM cache ORDER BY accessed_at ASC LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    break
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (row[0],))
+                total -= row[1]
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class SearchResultCache:
+    """Cache of cleaned search result items keyed on the normalized query and search settings."""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    @staticmethod
+    def key(query: str, search_depth: str, max_results: int) -> str:
+        return make_cache_key("search", normalize_query(query), search_depth, max_results)
+
+    def get(self, query: str, search_depth: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """Get cached cleaned items for a query, or None on a miss."""
+        return self.backend.get(self.key(query, search_depth, max_results))
+
+    def set(self, query: str, search_depth: str, max_results: int, items: List[Dict[str, Any]]) -> None:
+        """Store cleaned items for a query."""
+        self.backend.set(self.key(query, search_depth, max_results), items)
+
+    async def aget(self, query: str, search_depth: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """Get cached cleaned items for a query from async code, or None on a miss."""
+        return await self.backend.aget(self.key(query, search_depth, max_results))
+
+    async def aset(self, query: str, search_depth: str, max_results: int, items: List[Dict[str, Any]]) -> None:
+        """Store cleaned items for a query from async code."""
+        await self.backend.aset(self.key(query, search_depth, max_results), items)
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
+
+
+def build_search_cache(cache_config: Dict[str, Any]) -> Optional[SearchResultCache]:
+    """Create the search result cache described by the cache configuration.
+
+    Args:
+        cache_config: Dictionary returned by Config.get_cache_config()
+
+    Returns:
+        Search result cache, or None if caching is disabled
+    """
+    if not cache_config.get("enabled"):
+        return None
+    backend = SQLiteCache(
+        cache_config["path"],
+        ttl=cache_config.get("ttl") or None,
+        max_entries=cache_config.get("max_entries") or None,
+        max_bytes=cache_config.get("max_bytes") or None
+    )
+    return SearchResultCache(backend)
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ..models.models import Section, Report
+
+
+class CheckpointStore:
+    """Local SQLite store of report progress at section granularity.
+
+    A report is recorded when it starts planning, its plan once the plan is
+    complete, each section as soon as it is written (in streaming plan mode that
+    can be before the plan is complete) and the final result once formatted.
+    Loading a checkpoint gives back the planned report with every finished
+    section filled in, so a rerun only has to write the missing ones.
+
+    Async code uses the a-prefixed variants, which run the SQLite calls on a
+    worker thread instead of blocking the event loop.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "report_id TEXT PRIMARY KEY, topic TEXT NOT NULL, planned INTEGER NOT NULL DEFAULT 0, "
+            "result TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            "report_id TEXT NOT NULL, idx INTEGER NOT NULL, section TEXT NOT NULL, done INTEGER NOT NULL, "
+            "PRIMARY KEY (report_id, idx))"
+        )
+
+    def start(self, report_id: str, topic: str) -> None:
+        """Record a report that is about to be (re)planned.
+
+        Sections saved under an earlier plan of the report, e.g. by a streamed plan
+        that failed before it was complete, are dropped along with that plan, so a
+        new plan never gets sections of the old one served as finished.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM sections WHERE report_id = ?", (report_id,))
+                self._conn.execute(
+                    "INSERT INTO reports (report_id, topic, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(report_id) DO UPDATE SET topic = excluded.topic, planned = 0, result = NULL, "
+                    "updated_at = excluded.updated_at",
+                    (report_id, topic, time.time())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._expire()
+
+    def save_plan(self, report_id: str, report: Report) -> None:
+        """Record the complete plan; sections of it already written are left untouched."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO sections (report_id, idx, section, done) VALUES (?, ?, ?, 0) "
+                    "ON CONFLICT(report_id, idx) DO NOTHING",
+                    [(report_id, index, section.model_dump_json()) for index, section in enumerate(report.sections)]
+                )
+                self._conn.execute(
+                    "UPDATE reports SET planned = ?, updated_at = ? WHERE report_id = ?",
+                    (len(report.sections), time.time(), report_id)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def save_section(self, report_id: str, index: int, section: Section) -> None:
+        """Record a written section."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sections (report_id, idx, section, done) VALUES (?, ?, ?, 1)",
+                (report_id, index, section.model_dump_json())
+            )
+            self._conn.execute("UPDATE reports SET updated_at = ? WHERE report_id = ?", (time.time(), report_id))
+
+    def save_result(self, report_id: str, result: str) -> None:
+        """Record the final report."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE reports SET result = ?, updated_at = ? WHERE report_id = ?",
+                (result, time.time(), report_id)
+            )
+
+    def load(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """Get the stored progress of a report.
+
+        Returns:
+            Dictionary with the topic, the planned report (None if planning never
+            finished), the number of finished sections and the final result (None
+            if not formatted yet), or None if the report is unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT topic, planned, result FROM reports WHERE report_id = ?", (report_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT idx, section, done FROM sections WHERE report_id = ? ORDER BY idx", (report_id,)
+            ).fetchall()
+        topic, planned, result = row
+        report = None
+        finished = sum(done for _, _, done in rows)
+        if planned and len(rows) >= planned:
+            report = Report(sections=[Section(**json.loads(section)) for _, section, _ in rows[:planned]])
+        return {"report_id": report_id, "topic": topic, "report": report, "finished_sections": finished,
+                "result": result}
+
+    async def astart(self, report_id: str, topic: str) -> None:
+        await asyncio.to_thread(self.start, report_id, topic)
+
+    async def asave_plan(self, report_id: str, report: Report) -> None:
+        await asyncio.to_thread(self.save_plan, report_id, report)
+
+    async def asave_section(self, report_id: str, index: int, section: Section) -> None:
+        await asyncio.to_thread(self.save_section, report_id, index, section)
+
+    async def asave_result(self, report_id: str, result: str) -> None:
+        await asyncio.to_thread(self.save_result, report_id, result)
+
+    async def aload(self, report_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.load, report_id)
+
+    def delete(self, report_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sections WHERE report_id = ?", (report_id,))
+            self._conn.execute("DELETE FROM reports WHERE report_id = ?", (report_id,))
+
+    def _expire(self) -> None:
+        """Drop reports not updated within the TTL."""
+        if not self.ttl:
+            return
+        cutoff = time.time() - self.ttl
+        self._conn.execute(
+            "DELETE FROM sections WHERE report_id IN (SELECT report_id FROM reports WHERE updated_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM reports WHERE updated_at < ?", (cutoff,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def build_checkpoint_store(checkpoint_config: Dict[str, Any]) -> Optional[CheckpointStore]:
+    """Create the checkpoint store described by the checkpoint configuration.
+
+    Args:
+        checkpoint_config: Dictionary returned by Config.get_checkpoint_config()
+
+    Returns:
+        Checkpoint store, or None if checkpointing is disabled
+    """
+    if not checkpoint_config.get("enabled"):
+        return None
+    return CheckpointStore(checkpoint_config["path"], ttl=checkpoint_config.get("ttl") or None)
@@ -0,0 +1,134 @@
+import hashlib
+import importlib.util
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    from tavily import AsyncTavilyClient
+
+
+class ClientRegistry:
+    """Process-wide registry of pooled HTTP clients and the API clients built on them.
+
+    Workflow instances and reports share one keep-alive connection pool per
+    upstream, so TLS handshakes are paid once per connection rather than once per
+    workflow. HTTP/2 is used when the h2 package is installed. Call startup() and
+    shutdown() from the application's lifecycle hooks.
+    """
+
+    def __init__(self, pool_config: Optional[Dict[str, Any]] = None):
+        pool_config = pool_config or {}
+        self.max_connections = pool_config.get("max_connections", 100)
+        self.max_keepalive = pool_config.get("max_keepalive", 20)
+        self.keepalive_expiry = pool_config.get("keepalive_expiry", 30.0)
+        self.timeout = pool_config.get("timeout", 60.0)
+        self.http2 = pool_config.get("http2", True) and importlib.util.find_spec("h2") is not None
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        self._requests: Dict[str, Counter] = {}
+        self._tavily_clients: Dict[str, "AsyncTavilyClient"] = {}
+        self._llms: Dict[str, Any] = {}
+        self._embed_models: Dict[str, Any] = {}
+
+    def http_client(self, name: str) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for an upstream, creating it on first use."""
+        if name not in self._http_clients:
+            requests = self._requests.setdefault(name, Counter())
+
+            async def count_request(response: httpx.Response) -> None:
+                # The network stream identifies the pooled connection that served the request
+                requests[id(response.extensions.get("network_stream"))] += 1
+
+            self._http_clients[name] = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                event_hooks={"response": [count_request]}
+            )
+        return self._http_clients[name]
+
+    def tavily_client(self, api_key: str) -> "AsyncTavilyClient":
+        """Get a Tavily client for an API key, backed by a pooled HTTP client."""
+        from tavily import AsyncTavilyClient
+        key = hashlib.sha256((api_key or "").encode('utf-8')).hexdigest()[:12]
+        if key not in self._tavily_clients:
+            self._tavily_clients[key] = AsyncTavilyClient(
+                api_key=api_key, client=self.http_client(f"tavily-{key}")
+            )
+        return self._tavily_clients[key]
+
+    def llm(self, api_key: str, model: str, max_tokens: int, context_window: int):
+        """Get an OpenRouter LLM for a model, backed by a pooled HTTP client."""
+        from llama_index.llms.openrouter import OpenRouter
+
+        key = hashlib.sha256(f"{api_key}:{model}:{max_tokens}:{context_window}".encode('utf-8')).hexdigest()[:12]
+        if key not in self._llms:
+            self._llms[key] = OpenRouter(
+                api_key=api_key,
+                model=model,
+                max_tokens=max_tokens,
+                context_window=context_window,
+                async_http_client=self.http_client("openrouter")
+            )
+        return self._llms[key]
+
+    def embed_model(self, api_key: str, model: str, api_base: Optional[str] = None):
+        """Get an OpenAI embedding model, backed by a pooled HTTP client."""
+        from llama_index.embeddings.openai import OpenAIEmbedding
+
+        key = hashlib.sha256(f"{api_key}:{model}:{api_base}".encode('utf-8')).hexdigest()[:12]
+        if key not in self._embed_models:
+            self._embed_models[key] = OpenAIEmbedding(
+                model=model,
+                api_key=api_key,
+                api_base=api_base or None,
+                async_http_client=self.http_client("embeddings")
+            )
+        return self._embed_models[key]
+
+    async def startup(self) -> None:
+        """Create the shared pools up front so the first report does not pay for it."""
+        self.http_client("openrouter")
+
+    async def shutdown(self) -> None:
+        """Close every pooled connection."""
+        for client in self._http_clients.values():
+            await client.aclose()
+        self._http_clients.clear()
+        self._tavily_clients.clear()
+        self._llms.clear()
+        self._embed_models.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get request counts per upstream and per pooled connection."""
+        stats = {}
+        for name, requests in self._requests.items():
+            stats[name] = {
+                "requests": sum(requests.values()),
+                "connections": len(requests),
+                "requests_per_connection": sorted(requests.values(), reverse=True)
+            }
+        return stats
+
+
+_registry: Optional[ClientRegistry] = None
+
+
+def get_client_registry(pool_config: Optional[Dict[str, Any]] = None) -> ClientRegistry:
+    """Get the process-wide client registry, creating it on first use.
+
+    Args:
+        pool_config: Dictionary returned by Config.get_pool_config(), used on first call
+
+    Returns:
+        Shared client registry
+    """
+    global _registry
+    if _registry is None:
+        _registry = ClientRegistry(pool_config)
+    return _registry
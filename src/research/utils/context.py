@@ -0,0 +1,126 @@
+import hashlib
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List
+from urllib.parse import urlsplit, urlunsplit
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text with a local tokenizer.
+
+    Uses tiktoken's cl100k_base encoding when available and falls back to
+    roughly four characters per token.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ''))
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha1(re.sub(r'\s+', ' ', content).strip().lower().encode('utf-8')).hexdigest()
+
+
+def _parse_items(results: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Parse the JSON lines produced by SearchWorkflow back into search items."""
+    items = []
+    for text in results.values():
+        for line in text.splitlines():
+            try:
+                item = json.loads(line)
+            except ValueError:
+                # Error and "no results" messages are not sources
+                continue
+            if isinstance(item, dict) and item.get('content'):
+                items.append(item)
+    return items
+
+
+def _render(item: Dict[str, Any], content: str) -> str:
+    return f"Title: {item.get('title', '')}\nURL: {item.get('url', '')}\nContent: {content}\n"
+
+
+def pack_context(results: Dict[str, str], token_budget: int) -> str:
+    """Pack search results into a section writer context that fits a token budget.
+
+    Sources are deduplicated by URL and by content, ranked by their relevance
+    score and added best first until the budget is used up. The first source
+    that does not fit is truncated to the remaining budget.
+
+    Args:
+        results: Search results returned by SearchWorkflow, keyed by query
+        token_budget: Maximum number of tokens of the packed context
+
+    Returns:
+        Formatted source material
+    """
+    # Rank first so the best scored copy of a duplicate is the one kept; sorted()
+    # is stable, so equally scored sources keep their query order
+    ranked_items = sorted(_parse_items(results), key=lambda item: item.get('score') or 0.0, reverse=True)
+
+    seen_urls = set()
+    seen_contents = set()
+    unique_items = []
+    for item in ranked_items:
+        url = _normalize_url(item.get('url', ''))
+        content_hash = _content_hash(item['content'])
+        if (url and url in seen_urls) or content_hash in seen_contents:
+            continue
+        seen_urls.add(url)
+        seen_contents.add(content_hash)
+        unique_items.append(item)
+
+    blocks = []
+    used = 0
+    for item in unique_items:
+        block = _render(item, item['content'])
+        tokens = estimate_tokens(block)
+        if used + tokens <= token_budget:
+            blocks.append(block)
+            used += tokens
+            continue
+
+        header_tokens = estimate_tokens(_render(item, ''))
+        remaining = token_budget - used - header_tokens
+        if remaining > 50:
+            # Cut the content proportionally, leaving a margin for the estimate
+            content = item['content']
+            content = content[:int(len(content) * remaining / max(tokens - header_tokens, 1) * 0.9)]
+            blocks.append(_render(item, content + '...'))
+        break
+
+    return "\n".join(blocks) if blocks else "No search results available."
+
+
+def fingerprint_sources(results: Dict[str, str]) -> str:
+    """Fingerprint the sources behind a section's search results.
+
+    The fingerprint only depends on which URLs were found and what they say, not
+    on result order, relevance scores or which query found them, so re-running the
+    same searches gives the same fingerprint unless the evidence itself changed.
+
+    Args:
+        results: Formatted search results by query, as returned by SearchWorkflow
+
+    Returns:
+        Hex encoded SHA-256 digest of the sources
+    """
+    sources = sorted({
+        f"{_normalize_url(item.get('url', ''))} {_content_hash(item['content'])}" for item in _parse_items(results)
+    })
+    return hashlib.sha256("\n".join(sources).encode('utf-8')).hexdigest()
@@ -0,0 +1,76 @@
+from typing import Any, Dict, List, Optional
+
+from .local_index import _terms
+
+
+class SearchCoverage:
+    """Measures how well the search results gathered for a section cover it.
+
+    A source counts as evidence when its score reaches min_score, its URL has not
+    been seen yet and its content is not a near-copy of a source already counted:
+    less than max_overlap of its terms may appear in any single one of them, so
+    mirrors and syndicated copies of one article count once.
+    """
+
+    def __init__(self, min_score: float = 0.7, max_overlap: float = 0.8):
+        self.min_score = min_score
+        self.max_overlap = max_overlap
+        self.evidence = 0
+        self._urls = set()
+        self._counted: List[set] = []
+        self._scores: List[float] = []
+
+    def add(self, items: List[Dict[str, Any]]) -> int:
+        """Count the evidence in cleaned search items.
+
+        Args:
+            items: Cleaned search items with url, content and score
+
+        Returns:
+            Number of items that were new evidence
+        """
+        added = 0
+        for item in items:
+            url = item.get('url')
+            if not url or url in self._urls:
+                continue
+            self._urls.add(url)
+            score = item.get('score')
+            if score is not None:
+                self._scores.append(score)
+                if score < self.min_score:
+                    continue
+            terms = set(_terms(f"{item.get('title', '')} {item.get('content', '')}"))
+            if not terms or any(len(terms & counted) / len(terms) >= self.max_overlap for counted in self._counted):
+                continue
+            self._counted.append(terms)
+            self.evidence += 1
+            added += 1
+        return added
+
+    @property
+    def mean_score(self) -> Optional[float]:
+        return sum(self._scores) / len(self._scores) if self._scores else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sources": len(self._urls),
+            "evidence": self.evidence,
+            "mean_score": self.mean_score
+        }
+
+
+def format_search_stats(sections) -> str:
+    """Render the search statistics of report sections, one line per section that has them."""
+    lines = []
+    for section in sections:
+        stats = section.search_stats
+        if not stats:
+            continue
+        line = (f"{section.name}: {stats['searched']}/{stats['queries']} queries searched, "
+                f"{stats['searches']} searches ({stats['escalated']} advanced), "
+                f"{stats['evidence']} evidence from {stats['sources']} sources")
+        if stats["stopped_early"]:
+            line += ", stopped early"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Awaitable, Optional
+
+# Deadlines are absolute wall clock times (time.time()) so they can be sent to
+# section workers in other processes.
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """Get the seconds left before a deadline, or None if there is no deadline."""
+    if deadline is None:
+        return None
+    return max(deadline - time.time(), 0.0)
+
+
+def expired(deadline: Optional[float]) -> bool:
+    """Whether a deadline has passed."""
+    return deadline is not None and time.time() >= deadline
+
+
+def earliest(*deadlines: Optional[float]) -> Optional[float]:
+    """Get the earliest of several optional deadlines."""
+    deadlines = [deadline for deadline in deadlines if deadline is not None]
+    return min(deadlines) if deadlines else None
+
+
+async def with_deadline(awaitable: Awaitable[Any], deadline: Optional[float]) -> Any:
+    """Await a call, raising asyncio.TimeoutError if it does not finish before the deadline."""
+    if deadline is None:
+        return await awaitable
+    return await asyncio.wait_for(awaitable, remaining(deadline))
+
+
+async def stream_until(generator: AsyncGenerator, deadline: Optional[float]) -> AsyncGenerator:
+    """Relay a stream until it ends or the deadline passes, whichever comes first.
+
+    Running out of time ends the stream quietly so callers keep the chunks they
+    already have; use expired() to tell whether it was cut short.
+    """
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(generator.__anext__(), remaining(deadline))
+            except (StopAsyncIteration, asyncio.TimeoutError):
+                return
+            yield chunk
+    finally:
+        await generator.aclose()
+
+
+def deadline_for_timeout(timeout: Optional[float], margin: float = 2.0) -> Optional[float]:
+    """Get a deadline that leaves a workflow a small margin before its timeout fires."""
+    if not timeout:
+        return None
+    return time.time() + timeout - min(margin, timeout * 0.1)
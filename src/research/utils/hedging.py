@@ -0,0 +1,196 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Optional
+
+from .utils import percentile
+
+_END = object()
+
+
+async def _next(generator: AsyncGenerator) -> Any:
+    try:
+        return await generator.__anext__()
+    except StopAsyncIteration:
+        return _END
+
+
+async def _discard(task: asyncio.Future, generator: Optional[AsyncGenerator] = None) -> None:
+    """Cancel a losing attempt and close its stream."""
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+    if generator is not None:
+        try:
+            await generator.aclose()
+        except Exception:
+            pass
+
+
+class Hedger:
+    """Sends a duplicate of an upstream call once it runs past its observed tail latency.
+
+    Latencies are tracked per call kind (e.g. one key per LLM priority tier and
+    per search depth). Once a kind has min_samples observations, a call still
+    running after the configured percentile of them gets one hedged duplicate;
+    whichever attempt answers first wins and the other is cancelled. Streams are
+    hedged on their time to first chunk.
+
+    Calls still in flight count as samples of at least their elapsed time, so a
+    burst of calls does not set the threshold from only its fastest members.
+    """
+
+    def __init__(self, percentile: float = 95, min_samples: int = 20, window: int = 200):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._running: Dict[str, Dict[int, float]] = {}
+        self._ids = itertools.count()
+
+    def threshold(self, key: str) -> Optional[float]:
+        """Get the latency past which a call gets hedged, or None while there are too few samples."""
+        latencies = self._latencies.get(key)
+        if not latencies or len(latencies) < self.min_samples:
+            return None
+        now = time.monotonic()
+        samples = list(latencies)
+        samples.extend(now - started_at for started_at in self._running.get(key, {}).values())
+        return percentile(samples, self.percentile)
+
+    def record(self, key: str, latency: float) -> None:
+        latencies = self._latencies.get(key)
+        if latencies is None:
+            latencies = self._latencies[key] = deque(maxlen=self.window)
+        latencies.append(latency)
+
+    async def _should_hedge(self, key: str, started_at: float, first: asyncio.Future) -> bool:
+        """Wait until the first attempt is done or has become slow enough to hedge."""
+        while True:
+            threshold = self.threshold(key)
+            if threshold is None:
+                await asyncio.wait([first])
+                return False
+            elapsed = time.monotonic() - started_at
+            if elapsed >= threshold:
+                return True
+            done, _ = await asyncio.wait([first], timeout=threshold - elapsed)
+            if done:
+                return False
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a call, hedging it if it is slower than usual.
+
+        Args:
+            key: Call kind the latency is tracked under
+            fn: Function creating the awaitable for one attempt
+
+        Returns:
+            Result of the first successful attempt
+        """
+        call_id = next(self._ids)
+        started_at = time.monotonic()
+        running = self._running.setdefault(key, {})
+        running[call_id] = started_at
+        primary = asyncio.ensure_future(fn())
+        attempts = [primary]
+        try:
+            if await self._should_hedge(key, started_at, primary):
+                self.hedged += 1
+                attempts.append(asyncio.ensure_future(fn()))
+            error = None
+            while attempts:
+                done, _ = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    attempts.remove(attempt)
+                    if attempt.exception() is not None:
+                        error = attempt.exception()
+                        continue
+                    if attempt is not primary:
+                        self.hedge_wins += 1
+                    # Measured from the first attempt: a slow call only known to be at least
+                    # this slow still counts, so the hedging threshold does not drift down
+                    self.record(key, time.monotonic() - started_at)
+                    return attempt.result()
+            raise error
+        finally:
+            running.pop(call_id, None)
+            for attempt in attempts:
+                await _discard(attempt)
+
+    async def stream(self, key: str, fn: Callable[[], AsyncGenerator]) -> AsyncGenerator:
+        """Relay a stream, opening a hedged duplicate if its first chunk is slower than usual.
+
+        Args:
+            key: Call kind the time to first chunk is tracked under
+            fn: Function opening the stream for one attempt
+        """
+        call_id = next(self._ids)
+        started_at = time.monotonic()
+        running = self._running.setdefault(key, {})
+        running[call_id] = started_at
+        primary = fn()
+        first_chunk = asyncio.ensure_future(_next(primary))
+        attempts = {first_chunk: primary}
+        winner = None
+        first = _END
+        error = None
+        try:
+            if await self._should_hedge(key, started_at, first_chunk):
+                self.hedged += 1
+                hedge = fn()
+                attempts[asyncio.ensure_future(_next(hedge))] = hedge
+            while attempts and winner is None:
+                done, _ = await asyncio.wait(list(attempts), return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    generator = attempts.pop(attempt)
+                    if winner is not None or attempt.exception() is not None:
+                        error = error or attempt.exception()
+                        await _discard(attempt, generator)
+                        continue
+                    winner, first = generator, attempt.result()
+                    if generator is not primary:
+                        self.hedge_wins += 1
+                    self.record(key, time.monotonic() - started_at)
+        finally:
+            running.pop(call_id, None)
+            for attempt, generator in attempts.items():
+                await _discard(attempt, generator)
+        if winner is None:
+            raise error
+
+        try:
+            if first is _END:
+                return
+            yield first
+            async for chunk in winner:
+                yield chunk
+        finally:
+            # Also when the consumer stops early, so the upstream stream is released right away
+            await winner.aclose()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hedged": self.hedged, "hedge_wins": self.hedge_wins}
+
+
+def build_hedger(hedging_config: Dict[str, Any]) -> Optional[Hedger]:
+    """Create the hedger described by the hedging configuration.
+
+    Args:
+        hedging_config: Dictionary returned by Config.get_hedging_config()
+
+    Returns:
+        Hedger, or None if hedging is disabled
+    """
+    if not hedging_config.get("enabled"):
+        return None
+    return Hedger(
+        percentile=hedging_config["percentile"],
+        min_samples=hedging_config["min_samples"],
+        window=hedging_config["window"]
+    )
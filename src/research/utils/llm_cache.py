@@ -0,0 +1,112 @@
+import asyncio
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from llama_index.core.llms import CompletionResponse
+
+from .cache import CacheBackend, SQLiteCache, make_cache_key
+
+
+class CachedLLM:
+    """LLM wrapper that memoizes completions of the wrapped LlamaIndex LLM.
+
+    Entries are keyed on the model name, the prompt and the call keyword arguments
+    (such as response_format). Streamed completions are stored chunk by chunk and
+    replayed the same way on a hit, so consumers of astream_complete see the same
+    deltas whether or not the response came from the cache. A stream the consumer
+    closed early is stored as far as it was read. Any other attribute is
+    delegated to the wrapped LLM.
+    """
+
+    def __init__(self, llm, backend: CacheBackend):
+        self.llm = llm
+        self.backend = backend
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    @property
+    def model_name(self) -> str:
+        model = getattr(self.llm, "model", None)
+        if model is None and hasattr(self.llm, "metadata"):
+            model = self.llm.metadata.model_name
+        return str(model)
+
+    def _key(self, prompt: str, kwargs: Dict[str, Any]) -> str:
+        return make_cache_key("llm", self.model_name, prompt, kwargs)
+
+    async def acomplete(self, prompt: str, **kwargs: Any) -> CompletionResponse:
+        key = self._key(prompt, kwargs)
+        cached = await self.backend.aget(key)
+        if cached is not None:
+            return CompletionResponse(text=cached["text"])
+
+        response = await self.llm.acomplete(prompt, **kwargs)
+        await self.backend.aset(key, {"text": response.text, "chunks": None})
+        return response
+
+    async def astream_complete(self, prompt: str, **kwargs: Any) -> AsyncGenerator[CompletionResponse, None]:
+        key = self._key(prompt, kwargs)
+        cached = await self.backend.aget(key)
+        if cached is not None:
+            return self._replay(cached["chunks"] or [cached["text"]])
+
+        generator = await self.llm.astream_complete(prompt, **kwargs)
+        return self._record(key, generator)
+
+    @staticmethod
+    async def _replay(chunks: List[str]) -> AsyncGenerator[CompletionResponse, None]:
+        text = ""
+        for delta in chunks:
+            text += delta
+            yield CompletionResponse(text=text, delta=delta)
+            # Let other sections make progress between replayed chunks
+            await asyncio.sleep(0)
+
+    async def _record(self, key: str, generator) -> AsyncGenerator[CompletionResponse, None]:
+        chunks = []
+        length = 0
+        store = False
+        try:
+            async for chunk in generator:
+                delta = chunk.delta if getattr(chunk, "delta", None) is not None else chunk.text[length:]
+                chunks.append(delta)
+                length += len(delta)
+                yield chunk
+            store = True
+        except GeneratorExit:
+            # The consumer stopped once it had what it needed (e.g. enough parsed
+            # queries) and stops at the same point when the prefix is replayed
+            store = True
+            raise
+        finally:
+            await generator.aclose()
+            # Streams that failed or were cancelled are not stored
+            if store:
+                await self.backend.aset(key, {"text": "".join(chunks), "chunks": chunks})
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
+
+
+def build_cached_llm(llm, cache_config: Dict[str, Any], backend: Optional[CacheBackend] = None):
+    """Wrap an LLM with the response cache described by the cache configuration.
+
+    Args:
+        llm: LlamaIndex LLM used by the workflows
+        cache_config: Dictionary returned by Config.get_cache_config()
+        backend: Optional cache backend to share with another cached LLM
+
+    Returns:
+        CachedLLM wrapping the LLM, or the LLM itself if caching is disabled
+    """
+    if not cache_config.get("llm_enabled"):
+        return llm
+    if backend is not None:
+        return CachedLLM(llm, backend)
+    backend = SQLiteCache(
+        cache_config["llm_path"],
+        ttl=cache_config.get("llm_ttl") or None,
+        max_entries=cache_config.get("llm_max_entries") or None,
+        max_bytes=cache_config.get("llm_max_bytes") or None
+    )
+    return CachedLLM(llm, backend)
@@ -0,0 +1,261 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _terms(text: str) -> List[str]:
+    """Split text into distinct lowercase search terms."""
+    return list(dict.fromkeys(term for term in _TOKEN.findall(text.lower()) if len(term) > 1))
+
+
+class LocalSourceIndex:
+    """Local SQLite index of every source fetched by live searches.
+
+    Sources are keyed by URL and searched with the SQLite FTS5 BM25 ranking,
+    optionally combined with cosine similarity over stored embeddings when an
+    embedding model is given. A lookup counts the fresh sources that cover
+    enough of the query terms (or are semantically close enough); its recall is
+    that count relative to the number of results asked for, so callers can fall
+    back to a live search when the local corpus does not answer a query well or
+    only holds stale copies of the matching sources. The SQLite work runs on a
+    worker thread so it never blocks the event loop.
+    """
+
+    def __init__(self, path: str, freshness: Optional[float] = None, min_recall: float = 0.6,
+                 min_coverage: float = 0.5, max_entries: Optional[int] = None, embed_model=None,
+                 vector_threshold: float = 0.75):
+        self.path = path
+        self.freshness = freshness
+        self.min_recall = min_recall
+        self.min_coverage = min_coverage
+        self.max_entries = max_entries
+        self.embed_model = embed_model
+        self.vector_threshold = vector_threshold
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        # Embeddings of the stored sources, loaded from disk on the first vector lookup
+        self._vector_ids: Optional[List[int]] = None
+        self._vectors: Optional[np.ndarray] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, title TEXT NOT NULL, content TEXT NOT NULL, "
+            "score REAL, fetched_at REAL NOT NULL, embedding BLOB)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sources_fetched_at ON sources(fetched_at)")
+        # Rows share their rowid with the sources table
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS sources_fts USING fts5(title, content)")
+
+    async def lookup(self, query: str, max_results: int) -> Tuple[List[Dict[str, Any]], float]:
+        """Find the fresh local sources answering a query.
+
+        Args:
+            query: Search query
+            max_results: Number of results a live search would return
+
+        Returns:
+            Up to max_results relevant fresh sources, best first, and the local
+            recall (relevant fresh sources found relative to max_results, at most 1)
+        """
+        terms = _terms(query)
+        if not terms or max_results <= 0:
+            self.misses += 1
+            return [], 0.0
+        vector = None
+        if self.embed_model is not None:
+            vector = await self._embed([query])
+            vector = vector[0] if vector is not None else None
+
+        now = time.time()
+        rows, close = await asyncio.to_thread(self._search, terms, max_results, vector)
+        rows.extend(close)
+        close_ids = {row[0] for row in close}
+
+        fresh, stale = [], 0
+        for source_id, url, title, content, score, fetched_at in rows:
+            if not self._relevant(terms, title, content) and source_id not in close_ids:
+                continue
+            if self.freshness and now - fetched_at > self.freshness:
+                stale += 1
+                continue
+            fresh.append({'title': title, 'url': url, 'content': content, 'score': score})
+
+        fresh = fresh[:max_results]
+        recall = len(fresh) / max_results
+        if recall >= self.min_recall:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if stale and (len(fresh) + stale) / max_results >= self.min_recall:
+                # The corpus knows the answer, but only from sources past the freshness window
+                self.stale += 1
+        return fresh, recall
+
+    def _search(self, terms: List[str], max_results: int,
+                vector: Optional[np.ndarray]) -> Tuple[List[tuple], List[tuple]]:
+        """Get the rows of the BM25 matches of the query terms and of the other semantically close sources."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.id, s.url, s.title, s.content, s.score, s.fetched_at FROM sources_fts "
+                "JOIN sources s ON s.id = sources_fts.rowid WHERE sources_fts MATCH ? "
+                "ORDER BY bm25(sources_fts, 2.0, 1.0) LIMIT ?",
+                (" OR ".join(f'"{term}"' for term in terms), max_results * 4)
+            ).fetchall()
+            close = self._nearest(vector, max_results, {row[0] for row in rows}) if vector is not None else []
+        return rows, close
+
+    def _relevant(self, terms: List[str], title: str, content: str) -> bool:
+        """Whether a source contains enough of the query terms."""
+        text_terms = set(_terms(f"{title} {content}"))
+        return sum(term in text_terms for term in terms) / len(terms) >= self.min_coverage
+
+    def _nearest(self, vector: np.ndarray, max_results: int, seen: set) -> List[tuple]:
+        """Get the rows of sources semantically close to a query vector (called under the lock)."""
+        if self._vectors is None:
+            self._load_vectors()
+        if not self._vector_ids:
+            return []
+        similarities = self._vectors @ vector
+        order = np.argsort(-similarities)[:max_results * 2]
+        ids = [self._vector_ids[i] for i in order
+               if similarities[i] >= self.vector_threshold and self._vector_ids[i] not in seen]
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        rows = self._conn.execute(
+            f"SELECT id, url, title, content, score, fetched_at FROM sources WHERE id IN ({placeholders})", ids
+        ).fetchall()
+        rank = {source_id: position for position, source_id in enumerate(ids)}
+        return sorted(rows, key=lambda row: rank[row[0]])
+
+    def _load_vectors(self) -> None:
+        rows = self._conn.execute("SELECT id, embedding FROM sources WHERE embedding IS NOT NULL").fetchall()
+        self._vector_ids = [source_id for source_id, _ in rows]
+        self._vectors = (np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+                         if rows else None)
+
+    async def add(self, items: List[Dict[str, Any]]) -> None:
+        """Store fetched sources, replacing older copies of the same URLs.
+
+        Args:
+            items: Cleaned search items with title, url, content and score
+        """
+        items = [item for item in items if item.get('url') and item.get('content')]
+        if not items:
+            return
+        vectors = None
+        if self.embed_model is not None:
+            vectors = await self._embed([f"{item.get('title', '')}\n{item['content'][:1000]}" for item in items])
+
+        await asyncio.to_thread(self._store, items, vectors, time.time())
+
+    def _store(self, items: List[Dict[str, Any]], vectors: Optional[np.ndarray], now: float) -> None:
+        """Upsert sources and their full-text rows in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for position, item in enumerate(items):
+                    embedding = vectors[position].tobytes() if vectors is not None else None
+                    row = self._conn.execute("SELECT id FROM sources WHERE url = ?", (item['url'],)).fetchone()
+                    if row is not None:
+                        source_id = row[0]
+                        self._conn.execute(
+                            "UPDATE sources SET title = ?, content = ?, score = ?, fetched_at = ?, "
+                            "embedding = COALESCE(?, embedding) WHERE id = ?",
+                            (item.get('title', ''), item['content'], item.get('score'), now, embedding, source_id)
+                        )
+                        self._conn.execute("DELETE FROM sources_fts WHERE rowid = ?", (source_id,))
+                    else:
+                        source_id = self._conn.execute(
+                            "INSERT INTO sources (url, title, content, score, fetched_at, embedding) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            (item['url'], item.get('title', ''), item['content'], item.get('score'), now, embedding)
+                        ).lastrowid
+                    self._conn.execute(
+                        "INSERT INTO sources_fts (rowid, title, content) VALUES (?, ?, ?)",
+                        (source_id, item.get('title', ''), item['content'])
+                    )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            # Reload the embeddings on the next vector lookup
+            self._vectors = self._vector_ids = None
+
+    def _evict(self) -> None:
+        """Drop the least recently fetched sources beyond max_entries (called under the lock)."""
+        if not self.max_entries:
+            return
+        ids = [row[0] for row in self._conn.execute(
+            "SELECT id FROM sources ORDER BY fetched_at DESC LIMIT -1 OFFSET ?", (self.max_entries,)
+        ).fetchall()]
+        for source_id in ids:
+            self._conn.execute("DELETE FROM sources_fts WHERE rowid = ?", (source_id,))
+            self._conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+
+    async def _embed(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Embed texts in one batch and normalize them to unit length, or None if embedding fails."""
+        try:
+            embeddings = await self.embed_model.aget_text_embedding_batch(texts)
+        except Exception as e:
+            print(f"Error embedding local index texts: {e}")
+            return None
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def stats(self) -> Dict[str, int]:
+        """Get index counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "entries": self.count()
+        }
+
+    def count(self) -> int:
+        """Get the number of stored sources."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def build_local_index(local_index_config: Dict[str, Any], embed_model=None) -> Optional[LocalSourceIndex]:
+    """Create the local source index described by the local index configuration.
+
+    Args:
+        local_index_config: Dictionary returned by Config.get_local_index_config()
+        embed_model: Optional LlamaIndex embedding model adding vector search to BM25
+
+    Returns:
+        Local source index, or None if it is disabled
+    """
+    if not local_index_config.get("enabled"):
+        return None
+    return LocalSourceIndex(
+        local_index_config["path"],
+        freshness=local_index_config.get("freshness") or None,
+        min_recall=local_index_config["min_recall"],
+        min_coverage=local_index_config["min_coverage"],
+        max_entries=local_index_config.get("max_entries") or None,
+        embed_model=embed_model if local_index_config.get("vectors") else None
+    )
@@ -0,0 +1,139 @@
+from typing import Any, Dict, Optional, Tuple
+
+from .cache import make_cache_key
+from .routing import STEP_BY_PRIORITY
+
+
+def layout_prompt(instructions: str, shared: str = "", material: str = "") -> Tuple[str, str]:
+    """Lay out a prompt so that calls share as long a prefix as possible.
+
+    Providers reuse their prompt cache for a request that starts with the same
+    text as an earlier one, so the parts are ordered from the most to the least
+    widely shared: the static instructions of the prompt site, then the
+    report-level context shared by every call of a report, then the material of
+    this call.
+
+    Args:
+        instructions: Static instructions, identical for every call of the prompt site
+        shared: Context shared by the calls of one report, e.g. its topic
+        material: Material of this call only, e.g. a section's sources
+
+    Returns:
+        The prompt, and its cacheable prefix (instructions and shared context)
+    """
+    prefix = instructions + shared
+    return prefix + material, prefix
+
+
+def _usage_value(usage: Any, name: str) -> Any:
+    if isinstance(usage, dict):
+        return usage.get(name)
+    return getattr(usage, name, None)
+
+
+def cached_token_counts(raw: Any) -> Optional[Tuple[int, int]]:
+    """Get the prompt tokens and the cached prompt tokens reported in a raw provider response.
+
+    Args:
+        raw: Raw response (or final stream chunk) of an OpenAI-compatible API
+
+    Returns:
+        (prompt tokens, cached prompt tokens), or None if the response reports no usage
+    """
+    usage = _usage_value(raw, "usage") if raw is not None else None
+    prompt_tokens = _usage_value(usage, "prompt_tokens") if usage is not None else None
+    if prompt_tokens is None:
+        return None
+    details = _usage_value(usage, "prompt_tokens_details")
+    cached = _usage_value(details, "cached_tokens") if details is not None else None
+    if cached is None:
+        # Anthropic style accounting, as passed through by some gateways
+        cached = _usage_value(usage, "cache_read_input_tokens")
+    return prompt_tokens, cached or 0
+
+
+class PromptCache:
+    """Provider prompt caching: request hints and cached token accounting.
+
+    Prompts are laid out with layout_prompt() so that calls share long prefixes.
+    For OpenAI-compatible backends (OpenAI, OpenRouter) each call carries a
+    prompt_cache_key derived from its cacheable prefix, so the provider routes
+    calls sharing it to the same cache, and streams ask for usage reporting. The
+    prompt and cached token counts reported back are recorded per step and call.
+    """
+
+    def __init__(self, hints: bool = True):
+        self.hints = hints
+        self._usage: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def supports_hints(llm) -> bool:
+        """Whether an LLM (or the LLM wrapped by a cache) talks to an OpenAI-compatible API."""
+        try:
+            from llama_index.llms.openai import OpenAI
+        except ImportError:
+            return False
+        return isinstance(getattr(llm, "llm", llm), OpenAI)
+
+    def hint_kwargs(self, llm, prefix: Optional[str], stream: bool) -> Dict[str, Any]:
+        """Get the call keyword arguments carrying the caching hints for an LLM.
+
+        Args:
+            llm: LLM the call is made with
+            prefix: Cacheable prefix of the prompt, None if the prompt has no stable prefix
+            stream: Whether the call is streamed
+
+        Returns:
+            Keyword arguments to add to the call, empty if the backend takes no hints
+        """
+        if not self.hints or not prefix or not self.supports_hints(llm):
+            return {}
+        kwargs: Dict[str, Any] = {"extra_body": {"prompt_cache_key": make_cache_key("prompt", prefix)[:32]}}
+        if stream:
+            # Usage, cached tokens included, is only reported in a final chunk on request
+            kwargs["stream_options"] = {"include_usage": True}
+        return kwargs
+
+    def record(self, priority: int, raw: Any) -> Optional[float]:
+        """Record the token usage of a call.
+
+        Args:
+            priority: Priority the call was made with, identifying its step
+            raw: Raw provider response, or the final chunk of a stream
+
+        Returns:
+            Share of the prompt tokens served from the provider's cache, None if not
+            reported or the call reported no prompt tokens
+        """
+        counts = cached_token_counts(raw)
+        if counts is None:
+            return None
+        prompt_tokens, cached_tokens = counts
+        usage = self._usage.setdefault(STEP_BY_PRIORITY.get(priority, str(int(priority))),
+                                       {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        usage["calls"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["cached_tokens"] += cached_tokens
+        return cached_tokens / prompt_tokens if prompt_tokens else None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the calls, prompt tokens, cached tokens and cached token ratio by step."""
+        return {
+            step: {**usage,
+                   "cached_ratio": usage["cached_tokens"] / usage["prompt_tokens"] if usage["prompt_tokens"] else 0.0}
+            for step, usage in self._usage.items()
+        }
+
+
+def build_prompt_cache(prompt_cache_config: Dict[str, Any]) -> Optional[PromptCache]:
+    """Create the prompt caching support described by the prompt cache configuration.
+
+    Args:
+        prompt_cache_config: Dictionary returned by Config.get_prompt_cache_config()
+
+    Returns:
+        Prompt cache support, or None if it is disabled
+    """
+    if not prompt_cache_config.get("enabled"):
+        return None
+    return PromptCache(hints=prompt_cache_config["hints"])
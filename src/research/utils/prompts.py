@@ -1,3 +1,6 @@
+# Prompts are laid out for provider prompt caching (see utils/prompt_cache.py): the static
+# instructions come first and contain no placeholders, the variable parts follow them
+
 # Prompt to generate the report plan
 report_planner_instructions="""
 I want a plan for a report. 
@@ -14,11 +17,6 @@ Each section should have the fields:
 For example, introduction and conclusion will not require research because they will distill information from other parts of the report.
 </Task>
 
-<Topic>
-The topic of the report is:
-{topic}
-</Topic>
-
 <Report organization>
 The report should follow this organization: 
 Use this structure to create a report on the user-provided topic:
@@ -38,18 +36,30 @@ output json structure
 </Output format>
 """
 
+# Topic of the planned report, following the planner instructions
+report_planner_topic="""
+<Topic>
+The topic of the report is:
+{topic}
+</Topic>
+"""
+
+# Appended to the planner prompt when its previous answer could not be used
+report_planner_retry_instructions="""
+<Previous answer>
+Your previous answer could not be used: {error}
+{planned}
+</Previous answer>
+
+<Output format>
+Answer with only a JSON array of section objects. Each object has the fields "name" (string), "description" (string), "research" (true or false) and "content" (empty string). Do not add any other text.
+</Output format>
+"""
+
 # Section writer instructions
 section_writer_instructions = """
 You are an expert writer crafting a section that synthesizes information from the rest of the report.
 
-<Section topic> 
-{section_topic}
-</Section topic>
-
-<Source material>
-{context}
-</Source material>
-
 <Length and style>
 - Strict 200-300 word limit
 - No marketing language
@@ -78,17 +88,30 @@ You are an expert writer crafting a section that synthesizes information from th
 </Quality checks>
 """
 
+# Topic of the report, shared by the section writer prompts of one report
+section_writer_report = """
+<Report topic>
+{topic}
+</Report topic>
+"""
+
+# Material of the section being written
+section_writer_material = """
+<Section topic> 
+{section_topic}
+</Section topic>
+
+<Source material>
+{context}
+</Source material>
+"""
+
 search_query_prompt = """
 <instruction>
 <task_description>
 as a researcher, your job is to get different views of user query. Generate a series of appropriate search engine queries to break down questions based on user inquiries.
 </task_description>
 
-<Query>
-user query is:
-{query}
-</Query>
-
 <examples>
 <example>
 Input: User asks how to learn programming
@@ -119,14 +142,25 @@ Output: 'healthy eating guide', 'balanced nutrition diet'
 
 """
 
+# Section description the queries are generated for
+search_query_input = """
+<Query>
+user query is:
+{query}
+</Query>
+"""
+
+# Appended to the query prompt when its previous answer contained no usable query
+search_query_retry_instructions = """
+<Previous answer>
+Your previous answer contained no search queries. Answer with only the queries, each in single quotes and separated by commas, like 'first query', 'second query'.
+</Previous answer>
+"""
+
 final_section_writer_instructions="""
 
 You are an expert writer crafting a section that synthesizes information from the rest of the report.
 
-<Available report content>
-{context}
-</Available report content>
-
 <Task>
 1. Section-Specific Approach:
 
@@ -167,4 +201,11 @@ For Conclusion/Summary:
 - For conclusion: 100-150 word limit, ## for section title, only ONE structural element at most, no sources section
 - Markdown format
 - Do not include word count or any preamble in your response
-</Quality Checks>"""
\ No newline at end of file
+</Quality Checks>
+"""
+
+# Written sections of the report, following the final writer instructions
+final_section_writer_context = """
+<Available report content>
+{context}
+</Available report content>"""
\ No newline at end of file
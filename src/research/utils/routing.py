@@ -0,0 +1,122 @@
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .scheduler import Priority
+from .utils import percentile
+
+# Routed LLM steps, by the priority their calls are made with
+STEP_BY_PRIORITY = {
+    Priority.PLANNING: "plan",
+    Priority.QUERY_GENERATION: "queries",
+    Priority.SECTION_WRITING: "section",
+    Priority.FINAL_FORMATTING: "final"
+}
+
+
+class _ModelMetrics:
+    """Counters and recent latencies of one model serving one step."""
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.tokens_out = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.first_tokens: Deque[float] = deque(maxlen=window)
+        self.generation_time = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        first_tokens = list(self.first_tokens)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "fallbacks": self.fallbacks,
+            "tokens_out": self.tokens_out,
+            "latency_p50": percentile(latencies, 50) if latencies else None,
+            "latency_p95": percentile(latencies, 95) if latencies else None,
+            "time_to_first_token_p50": percentile(first_tokens, 50) if first_tokens else None,
+            "tokens_per_second": self.tokens_out / self.generation_time if self.generation_time else None
+        }
+
+
+class ModelRouter:
+    """Assigns each LLM step its own chain of models and records how each model serves it.
+
+    Steps are the report plan, query generation, section writing and final
+    formatting. Each step tries the models of its chain in order, falling back to
+    the next one when a call fails (before its first chunk, for streams). Latency,
+    time to first token, output tokens and errors are recorded per step and per
+    model, so slow or failing assignments show up in stats().
+    """
+
+    def __init__(self, chains: Dict[str, List[Tuple[str, Any]]], window: int = 500):
+        self.chains = chains
+        self.window = window
+        self._metrics: Dict[Tuple[str, str], _ModelMetrics] = {}
+
+    def chain(self, priority: int) -> List[Tuple[str, Any]]:
+        """Get the (model name, LLM) pairs to try, in order, for calls made with a priority."""
+        return self.chains[STEP_BY_PRIORITY[priority]]
+
+    def _get(self, step: str, model: str) -> _ModelMetrics:
+        metrics = self._metrics.get((step, model))
+        if metrics is None:
+            metrics = self._metrics[(step, model)] = _ModelMetrics(self.window)
+        return metrics
+
+    def record(self, priority: int, model: str, latency: float, tokens_out: int = 0,
+               time_to_first_token: Optional[float] = None) -> None:
+        """Record a successful call."""
+        metrics = self._get(STEP_BY_PRIORITY[priority], model)
+        metrics.calls += 1
+        metrics.tokens_out += tokens_out
+        metrics.latencies.append(latency)
+        if time_to_first_token is not None:
+            metrics.first_tokens.append(time_to_first_token)
+        metrics.generation_time += latency - (time_to_first_token or 0.0)
+
+    def record_error(self, priority: int, model: str, fell_back: bool) -> None:
+        """Record a failed call, and whether the next model of the chain was tried."""
+        metrics = self._get(STEP_BY_PRIORITY[priority], model)
+        metrics.calls += 1
+        metrics.errors += 1
+        metrics.fallbacks += int(fell_back)
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Get the metrics of every model by step."""
+        stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (step, model), metrics in self._metrics.items():
+            stats.setdefault(step, {})[model] = metrics.stats()
+        return stats
+
+
+def build_router(routing_config: Dict[str, Any], default_model: str,
+                 make_llm: Callable[[str], Any]) -> Optional[ModelRouter]:
+    """Create the model router described by the routing configuration.
+
+    Args:
+        routing_config: Dictionary returned by Config.get_routing_config()
+        default_model: Model of steps without their own assignment
+        make_llm: Function creating the LLM for a model name
+
+    Returns:
+        Model router, or None if no step has its own models or fallbacks
+    """
+    steps = STEP_BY_PRIORITY.values()
+    fallbacks = routing_config.get("fallbacks") or []
+    if not fallbacks and not any(routing_config.get(step) for step in steps):
+        return None
+
+    llms: Dict[str, Any] = {}
+
+    def get_llm(model: str) -> Any:
+        if model not in llms:
+            llms[model] = make_llm(model)
+        return llms[model]
+
+    chains = {}
+    for step in steps:
+        models = list(dict.fromkeys((routing_config.get(step) or [default_model]) + fallbacks))
+        chains[step] = [(model, get_llm(model)) for model in models]
+    return ModelRouter(chains)
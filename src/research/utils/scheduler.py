@@ -0,0 +1,262 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional, Tuple
+
+from .tracing import current_span
+
+# Provider names used by the workflows
+LLM_PROVIDER = "llm"
+SEARCH_PROVIDER = "search"
+
+
+class Priority(IntEnum):
+    """Priority tiers for upstream calls; lower values are served first."""
+    PLANNING = 0
+    QUERY_GENERATION = 1
+    SEARCH = 2
+    SECTION_WRITING = 3
+    FINAL_FORMATTING = 4
+
+
+class TokenBucket:
+    """Token bucket rate limiter that can also be paused, e.g. after a Retry-After."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        while True:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+            if self.rate <= 0:
+                return
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for the given number of seconds."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def get_status_code(error: BaseException) -> Optional[int]:
+    """Extract an HTTP status code from an upstream client exception, if any."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """Extract the Retry-After delay in seconds from an upstream client exception, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an upstream error is worth retrying (rate limits, server errors, timeouts)."""
+    status = get_status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    name = type(error).__name__
+    return any(marker in name for marker in ("RateLimit", "UsageLimit", "Timeout", "Connection"))
+
+
+async def _close(generator: AsyncGenerator) -> None:
+    """Close a stream, ignoring errors of a stream that already failed."""
+    try:
+        await generator.aclose()
+    except Exception:
+        pass
+
+
+class Scheduler:
+    """Shared scheduler for LLM and search calls across workflows and reports.
+
+    Every call takes one of max_in_flight slots, handed out by priority, and one
+    token from its provider's bucket. Rate limited and transient failures are
+    retried with exponential backoff, honoring Retry-After when the upstream sends
+    it; a Retry-After also pauses the provider's bucket for every other caller.
+    """
+
+    def __init__(self, max_in_flight: int = 16, rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0):
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.buckets = {
+            provider: TokenBucket(rate, burst) for provider, (rate, burst) in (rate_limits or {}).items()
+        }
+        self.in_flight = 0
+        self.retries = 0
+        self._waiters = []
+        self._counter = itertools.count()
+
+    async def _acquire_slot(self, priority: int) -> None:
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation; pass it on
+                self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the slot directly to the highest priority waiter
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, provider: str, priority: int = Priority.SECTION_WRITING):
+        """Hold an in-flight slot and a rate limit token for the duration of the block."""
+        started_at = time.monotonic()
+        await self._acquire_slot(priority)
+        try:
+            bucket = self.buckets.get(provider)
+            if bucket:
+                await bucket.acquire()
+            current_span().add("queue_wait", time.monotonic() - started_at)
+            yield
+        finally:
+            self._release_slot()
+
+    def _backoff(self, provider: str, attempt: int, error: BaseException) -> Optional[float]:
+        """Get the delay before the next attempt, or None if the error should be raised."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            bucket = self.buckets.get(provider)
+            if bucket:
+                bucket.pause(retry_after)
+            return retry_after
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def run(self, provider: str, priority: int, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run an upstream call under the scheduler, retrying transient failures.
+
+        Args:
+            provider: Provider name used to pick the rate limit bucket
+            priority: Priority tier of the call
+            fn: Function creating the awaitable for one attempt
+
+        Returns:
+            Result of the first successful attempt
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(provider, priority):
+                    return await fn()
+            except Exception as e:
+                delay = self._backoff(provider, attempt, e)
+                if delay is None:
+                    raise
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def stream(self, provider: str, priority: int,
+                     fn: Callable[[], Awaitable[AsyncGenerator]]) -> AsyncGenerator:
+        """Run a streaming upstream call under the scheduler.
+
+        The slot is held until the stream is exhausted. Opening the stream and
+        reading its first chunk are retried: clients such as the OpenAI one only
+        send the request on the first read, so that is where rate limits and
+        server errors show. Later chunks are not retried, since chunks already
+        handed to the caller cannot be taken back.
+        """
+        attempt = 0
+        while True:
+            async with self.slot(provider, priority):
+                generator = None
+                try:
+                    generator = await fn()
+                    first = await generator.__anext__()
+                except StopAsyncIteration:
+                    return
+                except Exception as e:
+                    if generator is not None:
+                        await _close(generator)
+                    delay = self._backoff(provider, attempt, e)
+                    if delay is None:
+                        raise
+                else:
+                    try:
+                        yield first
+                        async for chunk in generator:
+                            yield chunk
+                    finally:
+                        await _close(generator)
+                    return
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for _, _, future in self._waiters if not future.done()),
+            "retries": self.retries
+        }
+
+
+def build_scheduler(scheduler_config: Dict[str, Any], shares: int = 1) -> Optional[Scheduler]:
+    """Create the shared scheduler described by the scheduler configuration.
+
+    Args:
+        scheduler_config: Dictionary returned by Config.get_scheduler_config()
+        shares: Number of processes the configured limits are split between, e.g.
+            the section workers of a distributed setup; each gets an equal part
+
+    Returns:
+        Scheduler, or None if scheduling is disabled
+    """
+    if not scheduler_config.get("enabled"):
+        return None
+    shares = max(shares, 1)
+    return Scheduler(
+        max_in_flight=max(scheduler_config["max_in_flight"] // shares, 1),
+        rate_limits={
+            LLM_PROVIDER: (scheduler_config["llm_rate"] / shares, max(scheduler_config["llm_burst"] // shares, 1)),
+            SEARCH_PROVIDER: (scheduler_config["search_rate"] / shares,
+                              max(scheduler_config["search_burst"] // shares, 1))
+        },
+        max_retries=scheduler_config["max_retries"],
+        backoff_base=scheduler_config["backoff_base"],
+        backoff_max=scheduler_config["backoff_max"]
+    )
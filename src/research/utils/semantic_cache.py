@@ -0,0 +1,162 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class _VectorIndex:
+    """Fixed-capacity matrix of unit-length query embeddings with LRU replacement.
+
+    Rows created before a cutoff are expired: they never match and are replaced first.
+    """
+
+    def __init__(self, dim: int, max_entries: int):
+        self.max_entries = max_entries
+        self.vectors = np.zeros((min(max_entries, 256), dim), dtype=np.float32)
+        self.last_used = np.zeros(self.vectors.shape[0], dtype=np.int64)
+        self.created_at = np.zeros(self.vectors.shape[0], dtype=np.float64)
+        self.queries: List[str] = []
+        self.items: List[List[Dict[str, Any]]] = []
+        self.size = 0
+
+    def search(self, matrix: np.ndarray, cutoff: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the best matching unexpired row and its cosine similarity for each query vector."""
+        if self.size == 0:
+            return np.full(len(matrix), -1), np.full(len(matrix), -1.0, dtype=np.float32)
+        similarities = matrix @ self.vectors[:self.size].T
+        similarities[:, self.created_at[:self.size] < cutoff] = -1.0
+        best = similarities.argmax(axis=1)
+        return best, similarities[np.arange(len(matrix)), best]
+
+    def add(self, query: str, vector: np.ndarray, items: List[Dict[str, Any]], tick: int,
+            now: float = 0.0, cutoff: float = 0.0) -> None:
+        capacity = self.vectors.shape[0]
+        expired = np.flatnonzero(self.created_at[:self.size] < cutoff)
+        if not len(expired) and self.size == capacity and capacity < self.max_entries:
+            self._grow(min(capacity * 2, self.max_entries))
+        if len(expired):
+            row = int(expired[self.last_used[expired].argmin()])
+            self.queries[row] = query
+            self.items[row] = items
+        elif self.size < self.vectors.shape[0]:
+            row = self.size
+            self.size += 1
+            self.queries.append(query)
+            self.items.append(items)
+        else:
+            row = int(self.last_used.argmin())
+            self.queries[row] = query
+            self.items[row] = items
+        self.vectors[row] = vector
+        self.last_used[row] = tick
+        self.created_at[row] = now
+
+    def _grow(self, capacity: int) -> None:
+        vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        last_used = np.zeros(capacity, dtype=np.int64)
+        last_used[:self.size] = self.last_used[:self.size]
+        created_at = np.zeros(capacity, dtype=np.float64)
+        created_at[:self.size] = self.created_at[:self.size]
+        self.vectors = vectors
+        self.last_used = last_used
+        self.created_at = created_at
+
+
+class SemanticSearchCache:
+    """In-process cache that reuses search results for near-duplicate queries.
+
+    Queries are embedded with a LlamaIndex embedding model and compared against
+    previously searched queries with a single cosine-similarity matrix product.
+    Results are only shared between queries using the same search settings, and
+    like the search result cache, only for ttl seconds after they were fetched.
+    """
+
+    def __init__(self, embed_model, threshold: float = 0.9, max_entries: int = 5000, ttl: Optional[float] = None):
+        self.embed_model = embed_model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._indexes: Dict[Tuple[str, int], _VectorIndex] = {}
+        self._tick = 0
+
+    def _cutoff(self, now: float) -> float:
+        """Get the creation time before which entries are expired."""
+        return now - self.ttl if self.ttl else 0.0
+
+    async def embed(self, queries: List[str]) -> np.ndarray:
+        """Embed queries in one batch and normalize them to unit length."""
+        embeddings = await self.embed_model.aget_text_embedding_batch(queries)
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def lookup(self, matrix: np.ndarray, search_depth: str,
+               max_results: int) -> List[Optional[List[Dict[str, Any]]]]:
+        """Find cached results for a batch of embedded queries.
+
+        Args:
+            matrix: Normalized query embeddings, one row per query
+            search_depth: Search depth the results must have been fetched with
+            max_results: Result count the results must have been fetched with
+
+        Returns:
+            Cached items for each query, or None where no query is similar enough
+        """
+        index = self._indexes.get((search_depth, max_results))
+        if index is None:
+            self.misses += len(matrix)
+            return [None] * len(matrix)
+
+        self._tick += 1
+        best, scores = index.search(matrix, self._cutoff(time.time()))
+        matches = []
+        for row, score in zip(best, scores):
+            if score >= self.threshold:
+                index.last_used[row] = self._tick
+                matches.append(index.items[row])
+                self.hits += 1
+            else:
+                matches.append(None)
+                self.misses += 1
+        return matches
+
+    def add(self, query: str, vector: np.ndarray, search_depth: str,
+            max_results: int, items: List[Dict[str, Any]]) -> None:
+        """Store the results of a query under its normalized embedding."""
+        key = (search_depth, max_results)
+        if key not in self._indexes:
+            self._indexes[key] = _VectorIndex(len(vector), self.max_entries)
+        self._tick += 1
+        now = time.time()
+        self._indexes[key].add(query, vector, items, self._tick, now, self._cutoff(now))
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": sum(index.size for index in self._indexes.values())
+        }
+
+
+def build_semantic_cache(cache_config: Dict[str, Any], embed_model) -> Optional[SemanticSearchCache]:
+    """Create the semantic search cache described by the cache configuration.
+
+    Args:
+        cache_config: Dictionary returned by Config.get_cache_config()
+        embed_model: LlamaIndex embedding model used to embed queries
+
+    Returns:
+        Semantic search cache, or None if it is disabled or no embedding model is given
+    """
+    if not cache_config.get("semantic_enabled") or embed_model is None:
+        return None
+    return SemanticSearchCache(
+        embed_model,
+        threshold=cache_config["semantic_threshold"],
+        max_entries=cache_config["semantic_max_entries"],
+        ttl=cache_config.get("ttl") or None
+    )
@@ -0,0 +1,145 @@
+import asyncio
+from collections import Counter
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+
+class _Flight:
+    """One upstream call and the callers waiting on it."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.task: Optional[asyncio.Future] = None
+        self.waiters = 0
+        # Streams only: chunks received so far, replayed to callers joining late
+        self.chunks: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Event()
+
+    def notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    """Shares one upstream call among identical calls made while it is in flight.
+
+    Concurrent reports often send the same search query or LLM prompt at the same
+    moment, before any cache could have stored the answer. The first caller of a
+    key starts the call; callers of the same key arriving before it finishes wait
+    for its result instead of calling upstream again. Streams are fanned out: every
+    caller gets every chunk, callers joining late first get the chunks received so
+    far. The call keeps running as long as any caller waits on it and is cancelled
+    once the last one gives up (e.g. at its own deadline).
+    """
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+        self.saved: Counter = Counter()
+        self._flights: Dict[str, _Flight] = {}
+
+    def _join(self, key: str, kind: str) -> Optional[_Flight]:
+        """Get the running flight of a key on the current event loop, counting the saved call."""
+        flight = self._flights.get(key)
+        if flight is None or flight.finished or flight.loop is not asyncio.get_running_loop():
+            return None
+        self.saved[kind] += 1
+        return flight
+
+    def _start(self, key: str, kind: str) -> _Flight:
+        flight = _Flight(asyncio.get_running_loop())
+        self._flights[key] = flight
+        self.calls[kind] += 1
+        return flight
+
+    def _end(self, key: str, flight: _Flight) -> None:
+        flight.finished = True
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight.notify()
+
+    @staticmethod
+    def _leave(flight: _Flight) -> None:
+        flight.waiters -= 1
+        if not flight.waiters and not flight.task.done():
+            flight.task.cancel()
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]], kind: str = "call") -> Any:
+        """Run a call, or wait for the identical call already in flight.
+
+        Args:
+            key: Identity of the call; calls with the same key share one upstream call
+            fn: Function creating the awaitable of the upstream call
+            kind: Call kind the metrics are counted under
+
+        Returns:
+            Result of the shared call
+        """
+        flight = self._join(key, kind)
+        if flight is None:
+            flight = self._start(key, kind)
+            flight.task = asyncio.ensure_future(fn())
+            flight.task.add_done_callback(lambda _: self._end(key, flight))
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            self._leave(flight)
+
+    async def _pump(self, key: str, flight: _Flight, generator: AsyncGenerator) -> None:
+        """Read an upstream stream into its flight."""
+        try:
+            async for chunk in generator:
+                flight.chunks.append(chunk)
+                flight.notify()
+        except Exception as e:
+            flight.error = e
+        finally:
+            await generator.aclose()
+            self._end(key, flight)
+
+    async def stream(self, key: str, fn: Callable[[], AsyncGenerator], kind: str = "stream") -> AsyncGenerator:
+        """Relay a stream, or follow the identical stream already in flight.
+
+        Args:
+            key: Identity of the call; calls with the same key share one upstream stream
+            fn: Function opening the upstream stream
+            kind: Call kind the metrics are counted under
+        """
+        flight = self._join(key, kind)
+        if flight is None:
+            flight = self._start(key, kind)
+            flight.task = asyncio.ensure_future(self._pump(key, flight, fn()))
+        flight.waiters += 1
+        position = 0
+        try:
+            while True:
+                if position < len(flight.chunks):
+                    position += 1
+                    yield flight.chunks[position - 1]
+                    continue
+                if flight.finished:
+                    break
+                await flight.changed.wait()
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            self._leave(flight)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the upstream calls made and the calls saved by sharing them, by call kind."""
+        return {"calls": dict(self.calls), "saved": dict(self.saved)}
+
+
+def build_single_flight(single_flight_config: Dict[str, Any]) -> Optional[SingleFlight]:
+    """Create the request coalescer described by the single-flight configuration.
+
+    Args:
+        single_flight_config: Dictionary returned by Config.get_single_flight_config()
+
+    Returns:
+        Request coalescer, or None if coalescing is disabled
+    """
+    if not single_flight_config.get("enabled"):
+        return None
+    return SingleFlight()
@@ -0,0 +1,147 @@
+import time
+from typing import Callable, List, Optional
+
+
+class MarkerSplicer:
+    """Replace a placeholder marker in a text stream with a fixed replacement.
+
+    Text is passed through as it arrives, except for a trailing fragment that
+    could be the start of the marker, which is held back until the next chunk
+    shows whether it is. The replacement is emitted as-is rather than copied
+    into a larger string.
+    """
+
+    def __init__(self, marker: str, replacement: str):
+        self.marker = marker
+        self.replacement = replacement
+        self._pending = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Consume the next chunk of the stream.
+
+        Args:
+            text: Newly received text
+
+        Returns:
+            Output pieces that are safe to emit
+        """
+        pieces = []
+        text = self._pending + text
+        while True:
+            index = text.find(self.marker)
+            if index < 0:
+                break
+            if index:
+                pieces.append(text[:index])
+            pieces.append(self.replacement)
+            text = text[index + len(self.marker):]
+
+        # Hold back the longest suffix that is a prefix of the marker
+        hold = 0
+        for size in range(min(len(self.marker) - 1, len(text)), 0, -1):
+            if self.marker.startswith(text[-size:]):
+                hold = size
+                break
+        self._pending = text[len(text) - hold:]
+        if len(text) > hold:
+            pieces.append(text[:len(text) - hold])
+        return pieces
+
+    def flush(self) -> List[str]:
+        """Emit any text still held back at the end of the stream."""
+        pending, self._pending = self._pending, ""
+        return [pending] if pending else []
+
+
+class StreamBuffer:
+    """Collect the chunks of a text stream and join them once the text is needed.
+
+    Appending a chunk is constant time, unlike growing a string with +=, which
+    copies everything received so far on every chunk.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+
+    def append(self, text: Optional[str]) -> None:
+        if text:
+            self._parts.append(text)
+            self._length += len(text)
+
+    def getvalue(self) -> str:
+        """Get the text received so far."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def clear(self) -> None:
+        self._parts = []
+        self._length = 0
+
+    def drop_oldest(self, max_chars: int) -> int:
+        """Drop the oldest text beyond the newest max_chars characters.
+
+        Returns:
+            Number of characters dropped
+        """
+        excess = self._length - max_chars
+        if excess <= 0:
+            return 0
+        dropped = 0
+        start = 0
+        while dropped + len(self._parts[start]) <= excess:
+            dropped += len(self._parts[start])
+            start += 1
+        self._parts = self._parts[start:]
+        if dropped < excess:
+            self._parts[0] = self._parts[0][excess - dropped:]
+        self._length -= excess
+        return excess
+
+    def __len__(self) -> int:
+        return self._length
+
+
+class ProgressCoalescer:
+    """Batch the chunks of a text stream into fewer, larger progress messages.
+
+    The first chunk is passed on right away; after that, text collects until
+    max_chars have arrived or interval seconds have passed since the last
+    message. While blocked() reports the consumer as backed up, text keeps
+    collecting instead of being passed on, so a slow consumer gets fewer and
+    larger messages rather than a growing backlog. Call flush() at the end of
+    the stream to pass on the rest.
+
+    Text collected while blocked is capped at max_buffer characters (0 for no
+    cap); beyond that the oldest text is dropped and counted in dropped_chars.
+    """
+
+    def __init__(self, emit: Callable[[str], None], interval: float = 0.1, max_chars: int = 1024,
+                 blocked: Optional[Callable[[], bool]] = None, max_buffer: int = 65536):
+        self.emit = emit
+        self.interval = interval
+        self.max_chars = max_chars
+        self.blocked = blocked
+        self.max_buffer = max_buffer
+        self.dropped_chars = 0
+        self._buffer = StreamBuffer()
+        self._last_emit = 0.0
+
+    def __call__(self, text: Optional[str]) -> None:
+        self._buffer.append(text)
+        if len(self._buffer) < self.max_chars and time.monotonic() - self._last_emit < self.interval:
+            return
+        if self.blocked is not None and self.blocked():
+            if self.max_buffer:
+                self.dropped_chars += self._buffer.drop_oldest(self.max_buffer)
+            return
+        self.flush()
+
+    def flush(self) -> None:
+        """Pass on the text collected so far."""
+        if len(self._buffer):
+            text = self._buffer.getvalue()
+            self._buffer.clear()
+            self.emit(text)
+        self._last_emit = time.monotonic()
@@ -0,0 +1,307 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from ..models.models import Section
+
+# Characters of prose tolerated before the JSON document starts
+MAX_PREAMBLE = 1000
+
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class StreamValidationError(ValueError):
+    """Raised as soon as a streamed LLM response is clearly unusable."""
+
+
+def repair_json(text: str) -> Any:
+    """Parse JSON written by an LLM, repairing the common mistakes.
+
+    Markdown code fences and prose around the JSON are dropped, single-quoted
+    strings, Python literals and trailing commas are fixed, raw newlines in
+    strings are escaped and a truncated document has its open strings and
+    brackets closed.
+
+    Args:
+        text: LLM response containing a JSON document
+
+    Returns:
+        Parsed document
+
+    Raises:
+        ValueError: If no JSON document can be recovered
+    """
+    text = re.sub(r"```[a-zA-Z]*", "", text)
+    starts = [index for index in (text.find("["), text.find("{")) if index >= 0]
+    if not starts:
+        raise ValueError("No JSON document found")
+    # Whatever precedes the document is prose
+    text = text[min(starts):]
+    try:
+        return json.JSONDecoder().raw_decode(text)[0]
+    except ValueError:
+        pass
+
+    out = []
+    closers = []
+    quote = None
+    escape = False
+    # Output position of an object key not followed by its colon yet
+    pending_key = None
+    index = 0
+    while index < len(text):
+        char = text[index]
+        index += 1
+        if quote is not None:
+            if escape:
+                escape = False
+                out.append(char)
+            elif char == "\\":
+                escape = True
+                if index < len(text) and text[index] == "'":
+                    # \' is not a JSON escape, the quote needs none inside a double-quoted string
+                    continue
+                out.append(char)
+            elif char == quote:
+                quote = None
+                out.append('"')
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+        elif char in "\"'":
+            quote = char
+            if closers and closers[-1] == "}" and _last_token(out) in ("{", ","):
+                pending_key = len(out)
+            out.append('"')
+        elif char in "[{":
+            closers.append("]" if char == "[" else "}")
+            out.append(char)
+        elif char in "]}":
+            _strip_trailing_comma(out)
+            if closers:
+                out.append(closers.pop())
+            if not closers:
+                # The document is complete, ignore whatever follows it
+                break
+        elif char == ":":
+            pending_key = None
+            out.append(char)
+        elif char.isalpha():
+            end = index
+            while end < len(text) and text[end].isalnum():
+                end += 1
+            word = char + text[index:end]
+            index = end
+            if text[end:].lstrip().startswith(":"):
+                # Unquoted key
+                out.append(json.dumps(word))
+            else:
+                out.append(_LITERALS.get(word, word))
+        else:
+            out.append(char)
+
+    if quote is not None:
+        out.append('"')
+    if pending_key is not None:
+        del out[pending_key:]
+    _strip_trailing_comma(out)
+    if out and out[-1] == ":":
+        # A key without its value
+        out.append("null")
+    out.extend(reversed(closers))
+    try:
+        return json.loads("".join(out))
+    except ValueError as e:
+        raise ValueError(f"Unrepairable JSON: {e}") from e
+
+
+def _last_token(out: List[str]) -> Optional[str]:
+    for token in reversed(out):
+        if token.strip():
+            return token
+    return None
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    while out and (not out[-1].strip() or out[-1] == ","):
+        out.pop()
+
+
+class JsonArrayStreamParser:
+    """Incrementally extract the objects of the first JSON array in a text stream.
+
+    The planner answers either with a bare array of sections or with an object
+    wrapping one (e.g. {"sections": [...]}). Each element object of the first array
+    is returned from feed() as soon as its closing brace arrives, so work on it can
+    start before the rest of the response has been generated.
+    """
+
+    def __init__(self, max_preamble: Optional[int] = MAX_PREAMBLE):
+        self.max_preamble = max_preamble
+        self.done = False
+        self._seen = 0
+        self._started = False
+        self._depth = 0
+        self._array_depth: Optional[int] = None
+        self._in_string = False
+        self._escape = False
+        self._element: Optional[List[str]] = None
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume the next chunk of the stream.
+
+        Args:
+            text: Newly received text
+
+        Returns:
+            Element objects completed by this chunk, in order
+
+        Raises:
+            StreamValidationError: If no JSON document has started within max_preamble characters
+        """
+        completed = []
+        for char in text:
+            if self.done:
+                break
+            self._seen += 1
+            if not self._started and self.max_preamble and self._seen > self.max_preamble:
+                raise StreamValidationError(f"No JSON document within the first {self.max_preamble} characters")
+            if self._element is not None:
+                self._element.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '[{':
+                self._depth += 1
+                self._started = True
+                if self._array_depth is None:
+                    if char == '[':
+                        self._array_depth = self._depth
+                elif char == '{' and self._depth == self._array_depth + 1:
+                    self._element = ['{']
+            elif char in ']}':
+                if self._element is not None and self._depth == self._array_depth + 1:
+                    element = ''.join(self._element)
+                    try:
+                        completed.append(json.loads(element))
+                    except ValueError:
+                        try:
+                            completed.append(repair_json(element))
+                        except ValueError as e:
+                            raise StreamValidationError(f"Malformed array element: {e}") from e
+                    self._element = None
+                elif self._array_depth is not None and self._depth == self._array_depth:
+                    self.done = True
+                self._depth -= 1
+        return completed
+
+
+def _find_array(data: Any) -> Optional[List[Any]]:
+    """Find the list of elements in a parsed plan: the document itself, the first list it wraps or a single section."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                return value
+        if any(str(key).strip().lower() == "name" for key in data):
+            # A plan of a single section, not wrapped in an array
+            return [data]
+        if data and all(isinstance(value, dict) for value in data.values()):
+            # Sections keyed by name
+            return [{"name": name, **value} for name, value in data.items()]
+    return None
+
+
+class ReportPlanParser:
+    """Incrementally parse a streamed report plan and validate each section as it completes.
+
+    Sections are checked against the Section model as soon as their object
+    closes, after lenient fixes (field names in any case, a missing content,
+    "yes"/"no" research flags), so a response that goes wrong is caught after the
+    first bad section rather than after the whole response has been generated.
+    """
+
+    def __init__(self, max_preamble: Optional[int] = MAX_PREAMBLE):
+        self.sections: List[Section] = []
+        self._parser = JsonArrayStreamParser(max_preamble)
+        self._text: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        """Whether the section array has been closed, so the rest of the stream is not needed."""
+        return self._parser.done
+
+    def feed(self, text: str) -> List[Section]:
+        """Consume the next chunk of the stream.
+
+        Returns:
+            Sections completed by this chunk, in order
+
+        Raises:
+            StreamValidationError: If the response is clearly unusable
+        """
+        self._text.append(text)
+        return self._validate(self._parser.feed(text))
+
+    def close(self) -> List[Section]:
+        """Finish the stream, recovering the sections the incremental pass could not see.
+
+        A response that is not a streamable array, or was cut off, is repaired as a whole.
+
+        Returns:
+            Sections not returned by feed() yet
+
+        Raises:
+            StreamValidationError: If the response holds no valid section
+        """
+        sections = []
+        if not self._parser.done:
+            try:
+                elements = _find_array(repair_json("".join(self._text)))
+            except ValueError:
+                elements = None
+            if elements is not None:
+                remaining = elements[len(self.sections):]
+                sections = self._validate(remaining[:-1])
+                try:
+                    sections.extend(self._validate(remaining[-1:]))
+                except StreamValidationError:
+                    # The last section was cut off with the response
+                    if not self.sections:
+                        raise
+        if not self.sections:
+            raise StreamValidationError("The response contains no report sections")
+        return sections
+
+    def _validate(self, elements: List[Any]) -> List[Section]:
+        sections = []
+        for element in elements:
+            number = len(self.sections) + 1
+            if not isinstance(element, dict):
+                raise StreamValidationError(f"Section {number} is not a JSON object")
+            data = {str(key).strip().lower(): value for key, value in element.items()}
+            if not data.get("content"):
+                data["content"] = ""
+            if isinstance(data.get("research"), str):
+                data["research"] = data["research"].strip().lower() in ("true", "yes", "1")
+            try:
+                section = Section(**data)
+            except ValidationError as e:
+                fields = ", ".join(str(error["loc"][0]) for error in e.errors() if error["loc"])
+                raise StreamValidationError(f"Section {number} has missing or invalid fields: {fields}") from e
+            self.sections.append(section)
+            sections.append(section)
+        return sections
@@ -0,0 +1,315 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from .utils import percentile
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("research_current_span", default=None)
+
+
+class Span:
+    """A timed unit of work with attributes such as tokens, bytes, cache hits and queue wait."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, key: str, value: float) -> None:
+        """Increment a numeric attribute."""
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "span",
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    """Span handed out when tracing is disabled; every operation does nothing."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def add(self, key: str, value: float) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def current_span():
+    """Get the span active in the current task, or a no-op span."""
+    return _current_span.get() or NOOP_SPAN
+
+
+class _ActiveSpan:
+    """Context manager that activates a span for the current task and finishes it on exit."""
+
+    __slots__ = ("tracer", "span", "token", "finish")
+
+    def __init__(self, tracer: "Tracer", span: Span, finish: bool = True):
+        self.tracer = tracer
+        self.span = span
+        self.finish = finish
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        _current_span.reset(self.token)
+        if exc is not None:
+            self.span.set(error=repr(exc))
+        if self.finish:
+            self.tracer.finish(self.span)
+
+
+class JsonlExporter:
+    """Append finished spans and report summaries to a JSON Lines file.
+
+    export() only queues the serialized record; a background thread appends the
+    queued records to the file every flush_interval seconds, so tracing never
+    blocks the event loop on file I/O. Call shutdown() to write the rest.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lines: List[str] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Records still queued when a script ends without calling shutdown()
+        atexit.register(self.flush)
+
+    def export(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._lines.append(line)
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Append the queued records to the file."""
+        with self._write_lock:
+            with self._lock:
+                lines, self._lines = self._lines, []
+            if lines:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(line + "\n" for line in lines))
+
+    def shutdown(self) -> None:
+        """Stop the background thread and write the queued records."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stopped.set()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+
+class OpenTelemetryExporter:
+    """Forward finished spans to the globally configured OpenTelemetry tracer provider."""
+
+    def __init__(self, service_name: str = "research"):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("OpenTelemetryExporter requires opentelemetry-api: pip install opentelemetry-sdk")
+        self._tracer = trace.get_tracer(service_name)
+
+    def export(self, record: Dict[str, Any]) -> None:
+        if record["type"] != "span":
+            return
+        attributes = {key: value for key, value in record["attributes"].items()
+                      if isinstance(value, (str, bool, int, float))}
+        attributes.update({"research.trace_id": record["trace_id"], "research.span_id": record["span_id"]})
+        span = self._tracer.start_span(record["name"], start_time=int(record["start"] * 1e9), attributes=attributes)
+        span.end(end_time=int((record["start"] + record["duration"]) * 1e9))
+
+
+class Tracer:
+    """Records spans for workflow steps and external calls.
+
+    When disabled, span() returns a shared no-op context manager, so
+    instrumentation left in hot paths costs one attribute check per call.
+    Finished spans are kept per trace (one trace per report) until end_trace()
+    turns them into a latency summary.
+    """
+
+    def __init__(self, enabled: bool = False, exporters: Optional[List[Any]] = None, max_traces: int = 1000):
+        self.enabled = enabled
+        self.exporters = exporters or []
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+
+    def start_span(self, name: str, trace_id: Optional[str] = None, **attributes: Any):
+        """Create a span without activating it; call finish() when the work is done."""
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if trace_id is None:
+            trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        return Span(name, trace_id, parent.span_id if parent else None, attributes)
+
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes: Any):
+        """Context manager timing a block as a child of the currently active span."""
+        if not self.enabled:
+            return NOOP_SPAN
+        return _ActiveSpan(self, self.start_span(name, trace_id, **attributes))
+
+    def activate(self, span):
+        """Context manager making an already started span the current one without finishing it."""
+        if not self.enabled or span is NOOP_SPAN:
+            return NOOP_SPAN
+        return _ActiveSpan(self, span, finish=False)
+
+    def finish(self, span) -> None:
+        """End a span and export it."""
+        if span is NOOP_SPAN:
+            return
+        span.end = time.time()
+        spans = self._traces.setdefault(span.trace_id, [])
+        spans.append(span)
+        while len(self._traces) > self.max_traces:
+            self._traces.popitem(last=False)
+        self._export(span.to_dict())
+
+    def summary(self, trace_id: str) -> Dict[str, Dict[str, Any]]:
+        """Get latency percentiles and summed attributes per span name for a trace."""
+        grouped: Dict[str, List[Span]] = {}
+        for span in self._traces.get(trace_id, []):
+            grouped.setdefault(span.name, []).append(span)
+
+        summary = {}
+        for name, spans in grouped.items():
+            durations = [span.duration for span in spans]
+            entry = {
+                "count": len(spans),
+                "total": sum(durations),
+                "p50": percentile(durations, 50),
+                "p95": percentile(durations, 95),
+                "p99": percentile(durations, 99)
+            }
+            for span in spans:
+                for key, value in span.attributes.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        entry[key] = entry.get(key, 0) + value
+            summary[name] = entry
+        return summary
+
+    def end_trace(self, trace_id: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """Summarize a finished trace, export the summary and forget its spans."""
+        if not self.enabled or trace_id is None:
+            return {}
+        summary = self.summary(trace_id)
+        self._traces.pop(trace_id, None)
+        self._export({"type": "summary", "trace_id": trace_id, "summary": summary})
+        return summary
+
+    def shutdown(self) -> None:
+        """Write out what the exporters still hold, e.g. when the application stops."""
+        for exporter in self.exporters:
+            shutdown = getattr(exporter, "shutdown", None)
+            if shutdown is not None:
+                try:
+                    shutdown()
+                except Exception as e:
+                    print(f"Error shutting down trace exporter: {e}")
+
+    def _export(self, record: Dict[str, Any]) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception as e:
+                print(f"Error exporting trace record: {e}")
+
+
+def format_trace_summary(summary: Dict[str, Dict[str, Any]]) -> str:
+    """Render a trace summary as a table with one row per span name."""
+    lines = [f"{'span':<24}{'count':>7}{'total':>10}{'p50':>9}{'p95':>9}{'p99':>9}"]
+    for name, entry in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+        lines.append(f"{name:<24}{entry['count']:>7}{entry['total']:>9.2f}s{entry['p50']:>8.2f}s"
+                     f"{entry['p95']:>8.2f}s{entry['p99']:>8.2f}s")
+    return "\n".join(lines)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide default tracer (disabled unless replaced with set_tracer)."""
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    """Replace the process-wide default tracer."""
+    global _tracer
+    _tracer = tracer
+
+
+def build_tracer(tracing_config: Dict[str, Any]) -> Tracer:
+    """Create the tracer described by the tracing configuration.
+
+    Args:
+        tracing_config: Dictionary returned by Config.get_tracing_config()
+
+    Returns:
+        Tracer, disabled if tracing is turned off
+    """
+    if not tracing_config.get("enabled"):
+        return Tracer()
+    exporters = []
+    for name in tracing_config["exporters"]:
+        if name == "jsonl":
+            exporters.append(JsonlExporter(tracing_config["path"]))
+        elif name == "otel":
+            exporters.append(OpenTelemetryExporter())
+        else:
+            raise ValueError(f"Unknown trace exporter: {name}")
+    return Tracer(enabled=True, exporters=exporters)
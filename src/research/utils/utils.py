@@ -1,6 +1,6 @@
 import json
-from typing import Dict, List, Any
-from datetime import datetime
+import re
+from typing import Dict, List, Any, Optional
 
 def format_search_results(results: Dict[str, Any]) -> str:
     """Format search results into a readable string format.
@@ -18,25 +18,19 @@ def format_search_results(results: Dict[str, Any]) -> str:
     
     return "\n".join(formatted_results)
 
-def log_execution_time(func_name: str, start_time: datetime = None) -> datetime:
-    """Log the execution time of a function or operation.
+def percentile(values: List[float], q: float) -> float:
+    """Get a percentile of a list of values by the nearest-rank method.
     
     Args:
-        func_name: Name of the function or operation
-        start_time: Start time if ending an operation, None if starting
+        values: Non-empty list of values, in any order
+        q: Percentile between 0 and 100
         
     Returns:
-        Current datetime if starting an operation, None if ending
+        The value at the q-th percentile
     """
-    current_time = datetime.now()
-    
-    if start_time:
-        elapsed = current_time - start_time
-        print(f"{current_time.strftime('%Y-%m-%d %H:%M:%S')} - {func_name} completed in {elapsed.total_seconds():.2f} seconds")
-        return None
-    else:
-        print(f"{current_time.strftime('%Y-%m-%d %H:%M:%S')} - {func_name} started")
-        return current_time
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(q / 100 * (len(values) - 1)))))
+    return values[index]
 
 def clean_search_item(item: Dict[str, Any], score_threshold: float = 0.6) -> Dict[str, Any]:
     """Clean up search result item and filter by relevance score.
@@ -46,7 +40,7 @@ def clean_search_item(item: Dict[str, Any], score_threshold: float = 0.6) -> Dic
         score_threshold: Minimum score to include result
         
     Returns:
-        Cleaned item or None if below threshold
+        Cleaned item (with its score kept for ranking) or None if below threshold
     """
     if 'score' in item and item['score'] < score_threshold:
         return None
@@ -54,9 +48,127 @@ def clean_search_item(item: Dict[str, Any], score_threshold: float = 0.6) -> Dic
     return {
         'title': item.get('title', ''),
         'url': item.get('url', ''),
-        'content': item.get('content', '')
+        'content': item.get('content', ''),
+        'score': item.get('score')
     }
 
+_BULLET = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s*")
+# A label such as "Output:" or "Queries:" in front of the list
+_LABEL = re.compile(r"^\s*[A-Za-z ]{1,20}:\s*")
+
+
+class QueryStreamParser:
+    """Incrementally split a streamed list of search queries into items.
+
+    Quoted items ('a', 'b' or a JSON array of strings) are preferred, so queries
+    may contain commas; a single quote only ends an item when a separator
+    follows it, so apostrophes survive. Output without quotes is read one item
+    per line, with bullets and numbering removed. Only a single unquoted line is
+    split on commas, as a last resort.
+    """
+
+    def __init__(self):
+        self._quoted: Optional[bool] = None
+        self._line: List[str] = []
+        self._item: Optional[List[str]] = None
+        self._quote: Optional[str] = None
+        # Whitespace seen after a single quote that may close the item
+        self._closing: Optional[List[str]] = None
+        # First unquoted line, held back until it is known not to be the only one
+        self._first_line: Optional[str] = None
+        self._lines = 0
+
+    def feed(self, text: str) -> List[str]:
+        """Consume the next chunk of the stream.
+
+        Returns:
+            Queries completed by this chunk, in order
+        """
+        items = []
+        for char in text:
+            if self._quoted is None:
+                self._line.append(char)
+                line = "".join(self._line)
+                if char in "'\"" and not _LABEL.sub("", _BULLET.sub("", line.lstrip("[ \t")))[:-1].strip():
+                    # The first item starts with a quote
+                    self._quoted = True
+                    self._line = []
+                    self._item, self._quote = [], char
+                elif char == "\n" and line.strip().endswith(":"):
+                    # A heading line before the list
+                    self._line = []
+                elif char == "\n" and line.strip():
+                    self._quoted = False
+                    self._line = []
+                    items.extend(self._end_line(line))
+                continue
+            if self._quoted:
+                items.extend(self._feed_quoted(char))
+            elif char == "\n":
+                items.extend(self._end_line("".join(self._line)))
+                self._line = []
+            else:
+                self._line.append(char)
+        return items
+
+    def _feed_quoted(self, char: str) -> List[str]:
+        if self._item is None:
+            if char in "'\"":
+                self._item, self._quote = [], char
+            return []
+        if self._closing is not None:
+            if char in " \t":
+                self._closing.append(char)
+                return []
+            if char in ",]\n'\"":
+                return self._close_item()
+            # The quote was an apostrophe
+            self._item.extend(["'"] + self._closing + [char])
+            self._closing = None
+            return []
+        if char == self._quote:
+            if char == '"' and self._item and self._item[-1] == "\\":
+                self._item[-1] = char
+            elif char == "'":
+                self._closing = []
+            else:
+                return self._close_item()
+            return []
+        self._item.append(char)
+        return []
+
+    def _close_item(self) -> List[str]:
+        item = "".join(self._item).strip()
+        self._item, self._quote, self._closing = None, None, None
+        return [item] if item else []
+
+    def _end_line(self, line: str) -> List[str]:
+        item = _BULLET.sub("", line).strip().strip("'\"").strip()
+        if not item or item.endswith(":"):
+            return []
+        self._lines += 1
+        if self._lines == 1:
+            self._first_line = item
+            return []
+        items = [item]
+        if self._first_line is not None:
+            items.insert(0, self._first_line)
+            self._first_line = None
+        return items
+
+    def flush(self) -> List[str]:
+        """End the stream, returning the queries still pending."""
+        if self._quoted:
+            return self._close_item() if self._item is not None else []
+        items = self._end_line("".join(self._line))
+        self._line = []
+        if self._first_line is None:
+            return items
+        # A single unquoted line: a comma separated list
+        line, self._first_line = _LABEL.sub("", self._first_line), None
+        return [item.strip().strip("'\"") for item in line.split(',') if item.strip()]
+
+
 def parse_llm_response(text: str, output_type: str = 'list') -> List[str]:
     """Parse LLM response into desired format.
     
@@ -68,16 +180,8 @@ def parse_llm_response(text: str, output_type: str = 'list') -> List[str]:
         Parsed output in requested format
     """
     if output_type == 'list':
-        # Handle different list formats
-        if ',' in text:
-            # Comma-separated list
-            return [item.strip() for item in text.split(',')]
-        elif '\n' in text:
-            # Newline-separated list
-            return [item.strip() for item in text.split('\n') if item.strip()]
-        else:
-            # Single item
-            return [text.strip()]
+        parser = QueryStreamParser()
+        return parser.feed(text) + parser.flush()
     elif output_type == 'json':
         try:
             return json.loads(text)
@@ -0,0 +1,278 @@
+from llama_index.core.workflow import Workflow
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from ..utils.cache import make_cache_key
+from ..utils.scheduler import Scheduler, LLM_PROVIDER
+from ..utils.tracing import Tracer, current_span, get_tracer
+from ..utils.context import estimate_tokens
+from ..utils.deadline import with_deadline, stream_until
+from ..utils.hedging import Hedger
+from ..utils.routing import ModelRouter
+from ..utils.single_flight import SingleFlight
+from ..utils.prompt_cache import PromptCache
+
+
+class BaseResearchWorkflow(Workflow):
+    """Base class for the research workflows.
+
+    Holds the LLM and the optional shared scheduler, hedger, model router,
+    request coalescer and prompt cache support, and routes every LLM call through
+    them when configured. Calls can be given a deadline: a completion that misses
+    it raises asyncio.TimeoutError, a stream just ends. Calls can be given the
+    cacheable prefix of their prompt, sent to the provider as a caching hint. Every
+    call is recorded as a span on the tracer.
+    """
+
+    def __init__(self, llm, timeout: float, verbose: bool = False, scheduler: Optional[Scheduler] = None,
+                 tracer: Optional[Tracer] = None, hedger: Optional[Hedger] = None,
+                 router: Optional[ModelRouter] = None, single_flight: Optional[SingleFlight] = None,
+                 prompt_cache: Optional[PromptCache] = None):
+        super().__init__(timeout=timeout, verbose=verbose)
+        self.llm = llm
+        self.scheduler = scheduler
+        self.hedger = hedger
+        self.router = router
+        self.single_flight = single_flight
+        self.prompt_cache = prompt_cache
+        self._tracer = tracer
+
+    @property
+    def tracer(self) -> Tracer:
+        return self._tracer or get_tracer()
+
+    @staticmethod
+    def _record_prompt(span, prompt: str) -> None:
+        span.set(tokens_in=estimate_tokens(prompt), bytes_in=len(prompt.encode('utf-8')))
+
+    @staticmethod
+    def _record_output(span, text: str) -> None:
+        span.set(tokens_out=estimate_tokens(text), bytes_out=len(text.encode('utf-8')))
+
+    def _models(self, priority: int) -> List[Tuple[Optional[str], Any]]:
+        """Get the (model name, LLM) pairs to try for a call, the workflow's own LLM without a router."""
+        if self.router:
+            return self.router.chain(priority)
+        return [(None, self.llm)]
+
+    def _hinted(self, llm, kwargs: Dict[str, Any], cache_prefix: Optional[str], stream: bool) -> Dict[str, Any]:
+        """Add the prompt caching hints the LLM's backend takes to the call arguments."""
+        if not self.prompt_cache:
+            return kwargs
+        return {**kwargs, **self.prompt_cache.hint_kwargs(llm, cache_prefix, stream)}
+
+    def _record_cache(self, priority: int, raw: Any) -> None:
+        """Record the cached share of a call's prompt tokens, if its provider reported them."""
+        ratio = self.prompt_cache.record(priority, raw)
+        if ratio is not None:
+            current_span().set(cached_ratio=ratio)
+
+    def _flight_key(self, kind: str, priority: int, prompt: str, kwargs: Dict[str, Any]) -> str:
+        """Identify an LLM call by the models that would serve it, the prompt and the call arguments."""
+        return make_cache_key(kind, [id(llm) for _, llm in self._models(priority)], prompt, kwargs)
+
+    async def _acomplete(self, prompt: str, priority: int, deadline: Optional[float] = None,
+                         cache_prefix: Optional[str] = None, **kwargs: Any):
+        """Complete a prompt with the LLM, under the scheduler and hedger if configured.
+
+        With a router, the models assigned to the step are tried in order until one answers.
+        With a request coalescer, identical calls in flight at the same time share one
+        completion, which runs until the last of their deadlines.
+        """
+        tracer = self.tracer
+        with tracer.span("llm.complete", priority=int(priority)) as span:
+            if tracer.enabled:
+                self._record_prompt(span, prompt)
+            if self.single_flight:
+                key = self._flight_key("llm.complete", priority, prompt, kwargs)
+                response = await with_deadline(self.single_flight.run(
+                    key, lambda: self._complete(prompt, priority, None, kwargs, cache_prefix), kind="llm.complete"),
+                    deadline)
+            else:
+                response = await self._complete(prompt, priority, deadline, kwargs, cache_prefix)
+            if tracer.enabled:
+                self._record_output(span, response.text)
+            return response
+
+    async def _complete(self, prompt: str, priority: int, deadline: Optional[float], kwargs: Dict[str, Any],
+                        cache_prefix: Optional[str] = None):
+        """Complete a prompt with the models of its step, falling back along the chain."""
+        models = self._models(priority)
+        for position, (model, llm) in enumerate(models):
+            def complete(llm=llm, kwargs=self._hinted(llm, kwargs, cache_prefix, False)):
+                if not self.scheduler:
+                    return llm.acomplete(prompt, **kwargs)
+                return self.scheduler.run(LLM_PROVIDER, priority, lambda: llm.acomplete(prompt, **kwargs))
+
+            started_at = time.monotonic()
+            try:
+                if self.hedger:
+                    key = f"llm.complete:{int(priority)}" + (f":{model}" if model else "")
+                    response = await with_deadline(self.hedger.run(key, complete), deadline)
+                else:
+                    response = await with_deadline(complete(), deadline)
+            except asyncio.TimeoutError:
+                # Out of time, another model would not have any either
+                raise
+            except Exception as e:
+                if not self.router:
+                    raise
+                fall_back = position + 1 < len(models)
+                self.router.record_error(priority, model, fall_back)
+                if not fall_back:
+                    raise
+                print(f"Error from model {model}, falling back to {models[position + 1][0]}: {e}")
+                continue
+            if self.router:
+                self.router.record(priority, model, time.monotonic() - started_at, estimate_tokens(response.text))
+                current_span().set(model=model)
+            if self.prompt_cache:
+                self._record_cache(priority, getattr(response, 'raw', None))
+            return response
+
+    async def _astream_complete(self, prompt: str, priority: int, deadline: Optional[float] = None,
+                                cache_prefix: Optional[str] = None, **kwargs: Any):
+        """Stream a completion from the LLM, under the scheduler and hedger if configured.
+
+        With a router, the models assigned to the step are tried in order until one
+        starts streaming. With a request coalescer, identical streams in flight at the
+        same time share one upstream stream and each gets all of its chunks.
+        """
+        if self.single_flight:
+            key = self._flight_key("llm.stream", priority, prompt, kwargs)
+            generator = self.single_flight.stream(
+                key, lambda: self._metered_stream(priority, self._llm_stream(prompt, priority, kwargs, cache_prefix)),
+                kind="llm.stream")
+        elif self.router or self.hedger or self.scheduler:
+            generator = self._metered_stream(priority, self._llm_stream(prompt, priority, kwargs, cache_prefix))
+        else:
+            generator = await self.llm.astream_complete(prompt, **self._hinted(self.llm, kwargs, cache_prefix, True))
+            generator = self._metered_stream(priority, generator)
+        if deadline is not None:
+            generator = stream_until(generator, deadline)
+        if not self.tracer.enabled:
+            return generator
+        return self._traced_stream(prompt, priority, generator)
+
+    def _llm_stream(self, prompt: str, priority: int, kwargs: Dict[str, Any], cache_prefix: Optional[str] = None):
+        """Open a stream lazily from the step's models, under the scheduler and hedger if configured."""
+        if self.router:
+            return self._routed_stream(prompt, priority, kwargs, cache_prefix)
+        if self.hedger or self.scheduler:
+            return self._open_stream(self.llm, None, prompt, priority, kwargs, cache_prefix)
+        return self._relay_stream(self.llm, prompt, self._hinted(self.llm, kwargs, cache_prefix, True))
+
+    def _open_stream(self, llm, model: Optional[str], prompt: str, priority: int, kwargs: Dict[str, Any],
+                     cache_prefix: Optional[str] = None):
+        """Open a stream from one model, under the scheduler and hedger if configured."""
+        kwargs = self._hinted(llm, kwargs, cache_prefix, True)
+
+        def open_stream():
+            if self.scheduler:
+                return self.scheduler.stream(LLM_PROVIDER, priority, lambda: llm.astream_complete(prompt, **kwargs))
+            return self._relay_stream(llm, prompt, kwargs)
+
+        if self.hedger:
+            return self.hedger.stream(f"llm.stream:{int(priority)}" + (f":{model}" if model else ""), open_stream)
+        return open_stream()
+
+    async def _relay_stream(self, llm, prompt: str, kwargs: Dict[str, Any]):
+        """Open a streamed completion lazily, so that opening it is part of the first chunk."""
+        generator = await llm.astream_complete(prompt, **kwargs)
+        try:
+            async for chunk in generator:
+                yield chunk
+        finally:
+            await generator.aclose()
+
+    async def _routed_stream(self, prompt: str, priority: int, kwargs: Dict[str, Any],
+                             cache_prefix: Optional[str] = None):
+        """Relay the stream of the first model of the step's chain that starts answering."""
+        models = self._models(priority)
+        for position, (model, llm) in enumerate(models):
+            generator = self._open_stream(llm, model, prompt, priority, kwargs, cache_prefix)
+            started_at = time.monotonic()
+            try:
+                first = await generator.__anext__()
+            except StopAsyncIteration:
+                self.router.record(priority, model, time.monotonic() - started_at)
+                return
+            except Exception as e:
+                fall_back = position + 1 < len(models)
+                self.router.record_error(priority, model, fall_back)
+                if not fall_back:
+                    raise
+                print(f"Error from model {model}, falling back to {models[position + 1][0]}: {e}")
+                continue
+            time_to_first_token = time.monotonic() - started_at
+            current_span().set(model=model)
+            parts = []
+            length = 0
+            failed = False
+            try:
+                chunk = first
+                while True:
+                    delta = chunk.delta if getattr(chunk, 'delta', None) is not None else chunk.text[length:]
+                    parts.append(delta)
+                    length += len(delta)
+                    yield chunk
+                    try:
+                        chunk = await generator.__anext__()
+                    except StopAsyncIteration:
+                        break
+            except Exception:
+                # Output was already passed on, so another model cannot take over
+                failed = True
+                raise
+            finally:
+                await generator.aclose()
+                if failed:
+                    self.router.record_error(priority, model, False)
+                else:
+                    self.router.record(priority, model, time.monotonic() - started_at,
+                                       estimate_tokens("".join(parts)), time_to_first_token)
+            return
+
+    def _metered_stream(self, priority: int, generator):
+        """Record the cached prompt tokens reported with a stream, relaying its chunks unchanged."""
+        if not self.prompt_cache:
+            return generator
+        return self._meter(priority, generator)
+
+    async def _meter(self, priority: int, generator):
+        try:
+            async for chunk in generator:
+                raw = getattr(chunk, 'raw', None)
+                # Only the final chunk carries usage, when it was asked for
+                if raw is not None:
+                    self._record_cache(priority, raw)
+                yield chunk
+        finally:
+            await generator.aclose()
+
+    async def _traced_stream(self, prompt: str, priority: int, generator):
+        """Record a streamed completion as a span that ends when the stream does."""
+        tracer = self.tracer
+        span = tracer.start_span("llm.stream", priority=int(priority))
+        self._record_prompt(span, prompt)
+        parts = []
+        length = 0
+        try:
+            while True:
+                # Only activate the span while the stream is running, never across a yield
+                with tracer.activate(span):
+                    try:
+                        chunk = await generator.__anext__()
+                    except StopAsyncIteration:
+                        break
+                if not parts:
+                    span.set(time_to_first_token=span.duration)
+                delta = chunk.delta if getattr(chunk, 'delta', None) is not None else chunk.text[length:]
+                parts.append(delta)
+                length += len(delta)
+                yield chunk
+        finally:
+            await generator.aclose()
+            self._record_output(span, "".join(parts))
+            tracer.finish(span)
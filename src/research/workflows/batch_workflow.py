@@ -0,0 +1,186 @@
+from llama_index.core.workflow import (
+    Workflow,
+    StartEvent,
+    StopEvent,
+    Event,
+    step,
+    Context
+)
+
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+from ..models.models import Report
+from ..utils.cache import normalize_query
+from ..utils.deadline import deadline_for_timeout, earliest
+from .research_workflow import ResearchWorkflow, ProgressEvent
+from .search_workflow import SearchWorkflow
+
+
+class BatchPlannedEvent(Event):
+    topics: List[str]
+    reports: List[Report]
+
+
+class BatchResearchedEvent(Event):
+    topics: List[str]
+    reports: List[Report]
+    # Search results of each research section, keyed by "<report index>:<section index>"
+    results: Dict[str, Dict[str, str]]
+
+
+class BatchResearchWorkflow(Workflow):
+    """Researches many topics in one run, sharing searches between them.
+
+    Every topic is planned first and the search queries of every research
+    section of every report are generated next. Queries are then deduplicated
+    across the whole batch, so each distinct query is searched once, and the
+    shared results are fanned back out to every section that asked for them.
+    Sections and final reports are then written per topic, concurrently.
+
+    Progress events carry the topic they are about. The result is a dictionary
+    with the report of each topic and the aggregate batch statistics.
+    """
+
+    def __init__(self, research_workflow: ResearchWorkflow, search_workflow: SearchWorkflow,
+                 timeout: Optional[float] = 1800, verbose: bool = False):
+        super().__init__(timeout=timeout, verbose=verbose)
+        self.research_workflow = research_workflow
+        self.search_workflow = search_workflow
+
+    @property
+    def tracer(self):
+        return self.research_workflow.tracer
+
+    @step
+    async def plan_reports(self, ctx: Context, ev: StartEvent) -> BatchPlannedEvent:
+        """Step 1: Plan the report of every topic"""
+        # Keep the first occurrence of each topic
+        topics = list(dict.fromkeys(topic.strip() for topic in ev.topics if topic.strip()))
+        trace_id = uuid.uuid4().hex
+        deadline = earliest(ev.get("deadline"), deadline_for_timeout(self._timeout))
+        section_deadline = deadline
+        if deadline is not None:
+            reserve = min(self.research_workflow.deadline_reserve, (deadline - time.time()) / 4)
+            section_deadline = deadline - reserve
+        await ctx.set("trace_id", trace_id)
+        await ctx.set("started_at", time.time())
+        await ctx.set("deadline", deadline)
+        await ctx.set("section_deadline", section_deadline)
+        ctx.write_event_to_stream(ProgressEvent(msg=f"\n ### Planning {len(topics)} reports \n"))
+
+        async def plan(topic: str) -> Report:
+            try:
+                report = await self.research_workflow.plan_report(topic, section_deadline)
+            except Exception as e:
+                print(f"Error generating report plan for '{topic}': {e}")
+                report = Report(sections=[])
+            ctx.write_event_to_stream(ProgressEvent(
+                msg=f"\n### Planned {len(report.sections)} sections \n", topic=topic))
+            return report
+
+        with self.tracer.span("batch.plan", trace_id=trace_id, topics=len(topics)):
+            reports = await asyncio.gather(*(plan(topic) for topic in topics))
+        return BatchPlannedEvent(topics=topics, reports=list(reports))
+
+    @step
+    async def search_sections(self, ctx: Context, ev: BatchPlannedEvent) -> BatchResearchedEvent:
+        """Step 2: Search once for the distinct queries of every research section of every report"""
+        trace_id = await ctx.get("trace_id", default=None)
+        deadline = await ctx.get("section_deadline", default=None)
+        sections = {
+            f"{report_index}:{section_index}": section
+            for report_index, report in enumerate(ev.reports)
+            for section_index, section in enumerate(report.sections)
+            if section.research and not section.content
+        }
+        ctx.write_event_to_stream(ProgressEvent(
+            msg=f"\n ### Generating search queries for {len(sections)} sections \n"))
+
+        with self.tracer.span("batch.search", trace_id=trace_id, sections=len(sections)) as span:
+            query_lists = await asyncio.gather(*(
+                self.search_workflow.generate_search_queries(section.description, deadline)
+                for section in sections.values()
+            ))
+
+            # Search each distinct query once, under the first spelling seen
+            canonical: Dict[str, str] = {}
+            for queries in query_lists:
+                for query in queries:
+                    canonical.setdefault(normalize_query(query), query)
+            requested = sum(len(queries) for queries in query_lists)
+            unique_queries = list(canonical.values())
+            span.set(queries=requested, unique_queries=len(unique_queries))
+            ctx.write_event_to_stream(ProgressEvent(
+                msg=f"\n ### Searching {len(unique_queries)} distinct queries out of {requested} \n"))
+            shared_results = await self.search_workflow.search(unique_queries, deadline) if unique_queries else {}
+
+        results = {}
+        for key, queries in zip(sections, query_lists):
+            section_results = {}
+            for query in queries:
+                result = shared_results.get(canonical[normalize_query(query)])
+                if result is not None:
+                    section_results[query] = result
+            results[key] = section_results
+
+        await ctx.set("queries", requested)
+        await ctx.set("unique_queries", len(unique_queries))
+        return BatchResearchedEvent(topics=ev.topics, reports=ev.reports, results=results)
+
+    @step
+    async def write_reports(self, ctx: Context, ev: BatchResearchedEvent) -> StopEvent:
+        """Step 3: Write the sections and the final report of every topic"""
+        trace_id = await ctx.get("trace_id", default=None)
+        deadline = await ctx.get("deadline", default=None)
+        section_deadline = await ctx.get("section_deadline", default=None)
+
+        async def write_report(report_index: int, topic: str, report: Report) -> str:
+            if not report.sections:
+                return 'Error generating report plan'
+
+            async def write(section_index: int, section) -> None:
+                section_results = ev.results.get(f"{report_index}:{section_index}")
+                emit = self.research_workflow.progress_emitter(ctx, section=section.name, topic=topic)
+                try:
+                    section.content = await self.research_workflow.write_section(
+                        section, self.search_workflow, emit, section_deadline, section_results or {}, topic)
+                except Exception as e:
+                    print(f"Error generating section '{section.name}' for '{topic}': {e}")
+                finally:
+                    emit.flush()
+
+            await asyncio.gather(*(write(index, section) for index, section in enumerate(report.sections)))
+            ctx.write_event_to_stream(ProgressEvent(msg="### All sections generated \n\n", topic=topic))
+            emit = self.research_workflow.progress_emitter(ctx, topic=topic)
+            try:
+                result = await self.research_workflow.format_report(report, emit, deadline)
+            finally:
+                emit.flush()
+            ctx.write_event_to_stream(ProgressEvent(msg="\n### Report generated \n", topic=topic))
+            return result
+
+        with self.tracer.span("batch.write", trace_id=trace_id, topics=len(ev.topics)):
+            results = await asyncio.gather(*(
+                write_report(index, topic, report)
+                for index, (topic, report) in enumerate(zip(ev.topics, ev.reports))
+            ))
+
+        elapsed = time.time() - await ctx.get("started_at")
+        queries = await ctx.get("queries", default=0)
+        unique_queries = await ctx.get("unique_queries", default=0)
+        stats = {
+            "reports": len(ev.topics),
+            "elapsed": elapsed,
+            "reports_per_minute": len(ev.topics) / elapsed * 60 if elapsed else 0.0,
+            "queries": queries,
+            "unique_queries": unique_queries,
+            "searches_saved": queries - unique_queries
+        }
+        ctx.write_event_to_stream(ProgressEvent(
+            msg=f"\n### Batch done: {stats['reports']} reports in {elapsed:.1f}s "
+                f"({stats['reports_per_minute']:.2f} reports/min), {unique_queries} searches "
+                f"for {queries} queries \n"))
+        self.tracer.end_trace(trace_id)
+        return StopEvent(result={"reports": dict(zip(ev.topics, results)), "stats": stats})
@@ -0,0 +1,172 @@
+from typing import Optional, Tuple
+
+from ..config.config import Config
+from ..utils.cache import build_search_cache
+from ..utils.semantic_cache import build_semantic_cache
+from ..utils.local_index import build_local_index
+from ..utils.llm_cache import build_cached_llm
+from ..utils.scheduler import build_scheduler
+from ..utils.clients import get_client_registry
+from ..utils.tracing import build_tracer
+from ..utils.checkpoint import build_checkpoint_store
+from ..utils.hedging import build_hedger
+from ..utils.routing import build_router
+from ..utils.single_flight import build_single_flight
+from ..utils.prompt_cache import build_prompt_cache
+from ..distributed.broker import build_section_broker
+from .research_workflow import ResearchWorkflow
+from .search_workflow import SearchWorkflow
+from .batch_workflow import BatchResearchWorkflow
+
+
+def build_research_workflow(config: Optional[Config] = None, embed_model=None) -> ResearchWorkflow:
+    """Build a ResearchWorkflow with its nested SearchWorkflow from configuration.
+
+    The workflows are safe to share between concurrent runs, so long-running
+    processes should build them once and reuse them for every report.
+
+    Args:
+        config: Optional configuration object
+        embed_model: Optional LlamaIndex embedding model for the semantic search cache,
+            the configured EMBED_MODEL if None
+
+    Returns:
+        Research workflow with the search workflow attached
+    """
+    workflow, _ = build_workflows(config, embed_model=embed_model)
+    return workflow
+
+
+def build_batch_workflow(config: Optional[Config] = None, embed_model=None) -> BatchResearchWorkflow:
+    """Build a BatchResearchWorkflow researching several topics in one run.
+
+    Args:
+        config: Optional configuration object
+        embed_model: Optional LlamaIndex embedding model for the semantic search cache,
+            the configured EMBED_MODEL if None
+
+    Returns:
+        Batch workflow driving a research workflow and its search workflow
+    """
+    if config is None:
+        config = Config.load()
+    workflow, search_workflow = build_workflows(config, embed_model=embed_model)
+    return BatchResearchWorkflow(
+        workflow,
+        search_workflow,
+        timeout=config.get_workflow_config()["batch_timeout"],
+        verbose=workflow._verbose
+    )
+
+
+def build_workflows(config: Optional[Config] = None, embed_model=None, distributed: bool = True,
+                    scheduler_shares: int = 1) -> Tuple[ResearchWorkflow, SearchWorkflow]:
+    """Build the ResearchWorkflow and its nested SearchWorkflow from configuration.
+
+    Args:
+        config: Optional configuration object
+        embed_model: Optional LlamaIndex embedding model for the semantic search cache and
+            local index vectors; the configured EMBED_MODEL is used if None
+        distributed: Whether to send section jobs to the configured section broker;
+            section workers pass False so they do the work themselves and leave
+            checkpointing to the coordinator
+        scheduler_shares: Number of processes splitting the configured concurrency and
+            rate limits; section workers pass the worker count
+
+    Returns:
+        Research workflow with the search workflow attached, and the search workflow
+    """
+    if config is None:
+        config = Config.load()
+    llm_config = config.get_llm_config()
+    workflow_config = config.get_workflow_config()
+    search_config = config.get_search_config()
+    cache_config = config.get_cache_config()
+    scheduler = build_scheduler(config.get_scheduler_config(), scheduler_shares)
+    registry = get_client_registry(config.get_pool_config())
+    tracer = build_tracer(config.get_tracing_config())
+    hedger = build_hedger(config.get_hedging_config())
+    single_flight = build_single_flight(config.get_single_flight_config())
+    prompt_cache = build_prompt_cache(config.get_prompt_cache_config())
+    local_index_config = config.get_local_index_config()
+
+    embedding_config = config.get_embedding_config()
+    needs_embeddings = cache_config["semantic_enabled"] or (
+        local_index_config["enabled"] and local_index_config["vectors"])
+    if embed_model is None and needs_embeddings and embedding_config["model"]:
+        embed_model = registry.embed_model(
+            api_key=embedding_config["api_key"],
+            model=embedding_config["model"],
+            api_base=embedding_config["api_base"]
+        )
+
+    llm = build_cached_llm(
+        registry.llm(
+            api_key=llm_config["api_key"],
+            model=llm_config["model"],
+            max_tokens=llm_config["max_tokens"],
+            context_window=llm_config["context_window"],
+        ),
+        cache_config
+    )
+
+    def make_llm(model: str):
+        if model == llm_config["model"]:
+            return llm
+        return build_cached_llm(
+            registry.llm(
+                api_key=llm_config["api_key"],
+                model=model,
+                max_tokens=llm_config["max_tokens"],
+                context_window=llm_config["context_window"],
+            ),
+            cache_config,
+            backend=getattr(llm, "backend", None)
+        )
+
+    router = build_router(config.get_routing_config(), llm_config["model"], make_llm)
+
+    # Initialize main workflow
+    workflow = ResearchWorkflow(
+        llm=llm,
+        verbose=workflow_config["verbose"],
+        scheduler=scheduler,
+        stream_plan=workflow_config["stream_plan"],
+        section_broker=build_section_broker(config.get_distributed_config()) if distributed else None,
+        context_token_budget=workflow_config["context_token_budget"],
+        tracer=tracer,
+        checkpoint_store=build_checkpoint_store(config.get_checkpoint_config()) if distributed else None,
+        timeout=workflow_config["timeout"],
+        hedger=hedger,
+        deadline_reserve=workflow_config["deadline_reserve"],
+        router=router,
+        progress_interval=workflow_config["progress_interval"],
+        progress_max_chars=workflow_config["progress_max_chars"],
+        progress_max_buffer=workflow_config["progress_max_buffer"],
+        max_pending_events=workflow_config["max_pending_events"],
+        overflow_policy=workflow_config["overflow_policy"],
+        single_flight=single_flight,
+        prompt_cache=prompt_cache
+    )
+
+    # Initialize search workflow
+    search_workflow = SearchWorkflow(
+        llm=workflow.llm,
+        config=search_config,
+        verbose=workflow._verbose,
+        cache=build_search_cache(cache_config),
+        semantic_cache=build_semantic_cache(cache_config, embed_model),
+        scheduler=scheduler,
+        search_client=registry.tavily_client(search_config["api_key"]),
+        tracer=tracer,
+        timeout=workflow_config["search_timeout"],
+        hedger=hedger,
+        local_index=build_local_index(local_index_config, embed_model),
+        router=router,
+        single_flight=single_flight,
+        prompt_cache=prompt_cache
+    )
+
+    # Add search workflow to main workflow
+    workflow.add_workflows(search_workflow=search_workflow)
+    return workflow, search_workflow
@@ -1,5 +1,4 @@
 from llama_index.core.workflow import (
-    Workflow,
     StartEvent,
     StopEvent,
     Event,
@@ -8,11 +7,27 @@ from llama_index.core.workflow import (
 )
 
 import asyncio
-from ..utils.prompts import report_planner_instructions, section_writer_instructions, final_section_writer_instructions
-from ..utils.utils import log_execution_time
-import json
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Union
+from ..utils.prompts import (report_planner_instructions, report_planner_topic, report_planner_retry_instructions,
+                             section_writer_instructions, section_writer_report, section_writer_material,
+                             final_section_writer_instructions, final_section_writer_context)
+from ..utils.prompt_cache import PromptCache, layout_prompt
+from ..utils.scheduler import Scheduler, Priority
+from ..utils.streaming_json import ReportPlanParser, StreamValidationError
+from ..utils.streaming import MarkerSplicer, ProgressCoalescer, StreamBuffer
+from ..utils.context import pack_context, fingerprint_sources
+from ..utils.coverage import format_search_stats
+from ..utils.tracing import Tracer, current_span, format_trace_summary
+from ..utils.checkpoint import CheckpointStore
+from ..utils.deadline import deadline_for_timeout, earliest, expired
+from ..utils.hedging import Hedger
+from ..utils.routing import ModelRouter
+from ..utils.single_flight import SingleFlight
 from ..models.models import Section, Report
 from .search_workflow import SearchWorkflow
+from .base import BaseResearchWorkflow
 
 
 class SectionGenerationEvent(Event):
@@ -25,71 +40,398 @@ class ResearchReportEvent(Event):
 
 class ProgressEvent(Event):
     msg: str
+    # Topic the message is about, set in batch runs covering several topics
+    topic: Optional[str] = None
+    # Section whose content the message streams or reports on
+    section: Optional[str] = None
 
-class ResearchWorkflow(Workflow):
-    def __init__(self, llm, verbose: bool = False):
-        super().__init__(timeout=300, verbose=verbose)
-        self.llm = llm
+class SectionPlannedEvent(Event):
+    section: Section
+    index: int
+
+class SectionWrittenEvent(Event):
+    section: Section
+    index: int
+
+class PlanCompletedEvent(Event):
+    total: int
+
+class RefreshEvent(Event):
+    report: Report
+    topic: str
+    # Final report from the previous run, returned as is if no section changed
+    result: Optional[str] = None
+
+# Number of sections researched and written at the same time in streaming plan mode
+MAX_PARALLEL_SECTIONS = 16
+
+# Planner answers tried before giving up on an unusable plan
+PLAN_ATTEMPTS = 2
+
+# What happens to streamed progress while the event stream holds max_pending_events:
+# coalesce holds the text back and merges it into the next event, drop discards it
+OVERFLOW_POLICIES = ("coalesce", "drop")
+
+class ResearchWorkflow(BaseResearchWorkflow):
+    def __init__(self, llm, verbose: bool = False, scheduler: Optional[Scheduler] = None, stream_plan: bool = False,
+                 section_broker=None, context_token_budget: Optional[int] = None, tracer: Optional[Tracer] = None,
+                 checkpoint_store: Optional[CheckpointStore] = None, timeout: float = 300,
+                 hedger: Optional[Hedger] = None, deadline_reserve: float = 30, router: Optional[ModelRouter] = None,
+                 progress_interval: float = 0.1, progress_max_chars: int = 1024, max_pending_events: int = 1000,
+                 overflow_policy: str = "coalesce", single_flight: Optional[SingleFlight] = None,
+                 prompt_cache: Optional[PromptCache] = None, progress_max_buffer: int = 65536):
+        super().__init__(llm, timeout=timeout, verbose=verbose, scheduler=scheduler, tracer=tracer, hedger=hedger,
+                         router=router, single_flight=single_flight, prompt_cache=prompt_cache)
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown progress overflow policy: {overflow_policy}")
+        self.stream_plan = stream_plan
+        self.section_broker = section_broker
+        self.context_token_budget = context_token_budget
+        self.checkpoint_store = checkpoint_store
+        # Seconds of the report deadline kept for formatting the final report
+        self.deadline_reserve = deadline_reserve
+        self.progress_interval = progress_interval
+        self.progress_max_chars = progress_max_chars
+        self.progress_max_buffer = progress_max_buffer
+        self.max_pending_events = max_pending_events
+        self.overflow_policy = overflow_policy
+        self.dropped_events = 0
+
+    def progress_emitter(self, ctx: Context, section: Optional[str] = None,
+                         topic: Optional[str] = None) -> ProgressCoalescer:
+        """Create a callback streaming text to the event stream as coalesced progress events.
+        
+        Once the event stream holds max_pending_events unread events, streamed text
+        is held back or dropped according to the overflow policy; text held back
+        beyond progress_max_buffer characters is dropped, oldest first.
+        
+        Args:
+            ctx: Context of the run
+            section: Name of the section the text belongs to
+            topic: Topic the text is about, for batch runs
+            
+        Returns:
+            Callback receiving each streamed chunk; flush() it at the end of the stream
+        """
+        def backed_up() -> bool:
+            return bool(self.max_pending_events) and ctx.streaming_queue.qsize() >= self.max_pending_events
+
+        def write(msg: str) -> None:
+            if self.overflow_policy == "drop" and backed_up():
+                self.dropped_events += 1
+                return
+            ctx.write_event_to_stream(ProgressEvent(msg=msg, topic=topic, section=section))
+
+        return ProgressCoalescer(write, self.progress_interval, self.progress_max_chars,
+                                 blocked=backed_up if self.overflow_policy == "coalesce" else None,
+                                 max_buffer=self.progress_max_buffer)
+
+    def resume(self, report_id: str, **kwargs):
+        """Resume a checkpointed report, writing only the sections that were not finished.
+        
+        Args:
+            report_id: Id the report was started with
+            
+        Returns:
+            Workflow handler of the resumed run
+        """
+        if not self.checkpoint_store:
+            raise ValueError("Resuming reports requires a checkpoint store")
+        checkpoint = self.checkpoint_store.load(report_id)
+        if checkpoint is None:
+            raise KeyError(f"No checkpoint found for report {report_id}")
+        return self.run(input=checkpoint["topic"], report_id=report_id, **kwargs)
+
+    def refresh(self, report_id: str, **kwargs):
+        """Refresh a finished checkpointed report, rewriting only the sections whose sources changed.
+        
+        Args:
+            report_id: Id the report was started with
+            
+        Returns:
+            Workflow handler of the refresh run
+        """
+        if not self.checkpoint_store:
+            raise ValueError("Refreshing reports requires a checkpoint store")
+        checkpoint = self.checkpoint_store.load(report_id)
+        if checkpoint is None:
+            raise KeyError(f"No checkpoint found for report {report_id}")
+        if checkpoint["result"] is None:
+            raise ValueError(f"Report {report_id} is not finished, resume it instead")
+        return self.run(input=checkpoint["topic"], report_id=report_id, refresh=True, **kwargs)
         
     @step
-    async def generate_report_plan(self, ctx: Context, ev: StartEvent) -> SectionGenerationEvent:
+    async def generate_report_plan(self, ctx: Context, ev: StartEvent) -> Union[SectionGenerationEvent, SectionPlannedEvent, PlanCompletedEvent, RefreshEvent, StopEvent]:
         """Step 1: Generate report plan based on query"""
         try:
             ctx.write_event_to_stream(ProgressEvent(msg="\n ### Starting to generate report plan \n"))
             
-            start_time = log_execution_time("generate_report_plan")
-            prompt = report_planner_instructions.format(topic=ev.input)
-            response = await self.llm.acomplete(prompt, response_format={"type": "json_object"})
-            parsed_data = json.loads(response.text)
-            report = Report(sections=[Section(**section) for section in parsed_data])
-            sections_contents = "\n - ".join([s["description"] for s in parsed_data])
+            # One trace per report; every later step records its spans under it
+            trace_id = uuid.uuid4().hex
+            await ctx.set("trace_id", trace_id)
+            report_id = ev.get("report_id") or uuid.uuid4().hex
+            await ctx.set("report_id", report_id)
+            await ctx.set("topic", ev.input)
+
+            # The report deadline bounds every call; sections stop early enough to leave
+            # time for the final report, and end with whatever they have by then
+            deadline = earliest(ev.get("deadline"), deadline_for_timeout(self._timeout))
+            section_deadline = deadline
+            if deadline is not None:
+                section_deadline = deadline - min(self.deadline_reserve, (deadline - time.time()) / 4)
+            await ctx.set("deadline", deadline)
+            await ctx.set("section_deadline", section_deadline)
+            if ev.get("refresh"):
+                return await self._start_refresh(report_id, ev.input, ev.get("report"), ev.get("result"))
+            if self.checkpoint_store:
+                checkpoint = await self.checkpoint_store.aload(report_id)
+                if checkpoint and checkpoint["result"] is not None:
+                    return StopEvent(result=checkpoint["result"])
+                if checkpoint and checkpoint["report"] is not None:
+                    total = len(checkpoint["report"].sections)
+                    ctx.write_event_to_stream(ProgressEvent(
+                        msg=f"\n ### Resuming report: {checkpoint['finished_sections']} of {total} sections already written \n"))
+                    return SectionGenerationEvent(report=checkpoint["report"], topic=checkpoint["topic"])
+                # Planning from scratch; sections streamed under an unfinished earlier plan are dropped
+                await self.checkpoint_store.astart(report_id, ev.input)
+
+            if self.stream_plan:
+                with self.tracer.span("generate_report_plan", trace_id=trace_id, streamed=True) as span:
+                    sections = await self._stream_report_plan(ctx, ev.input, section_deadline)
+                    span.set(sections=len(sections))
+                if not sections:
+                    return StopEvent(result='Error generating report plan')
+                if self.checkpoint_store:
+                    await self.checkpoint_store.asave_plan(report_id, Report(sections=sections))
+                return PlanCompletedEvent(total=len(sections))
+
+            with self.tracer.span("generate_report_plan", trace_id=trace_id) as span:
+                report = await self.plan_report(ev.input, section_deadline)
+                sections_contents = "\n - ".join([s.description for s in report.sections])
+                span.set(sections=len(report.sections))
+            if self.checkpoint_store:
+                await self.checkpoint_store.asave_plan(report_id, report)
             
             ctx.write_event_to_stream(ProgressEvent(msg="\n"+sections_contents))
-            log_execution_time("generate_report_plan", start_time)
 
             return SectionGenerationEvent(report=report,topic=ev.input)
         except Exception as e:
             print(f"Error generating report plan: {e}")
             return StopEvent(result='Error generating report plan')
 
+    async def _start_refresh(self, report_id: str, topic: str, report: Optional[Report],
+                             result: Optional[str]) -> Union[RefreshEvent, StopEvent]:
+        """Get the report a refresh run starts from: the one passed to run, or else the checkpointed one."""
+        if report is None and self.checkpoint_store:
+            checkpoint = await self.checkpoint_store.aload(report_id)
+            if checkpoint and checkpoint["report"] is not None:
+                report, result = checkpoint["report"], checkpoint["result"]
+        elif report is not None and self.checkpoint_store:
+            await self.checkpoint_store.astart(report_id, topic)
+            await self.checkpoint_store.asave_plan(report_id, report)
+        if report is None:
+            return StopEvent(result='No report to refresh')
+        return RefreshEvent(report=report, topic=topic, result=result)
+
+    async def plan_report(self, topic: str, deadline: Optional[float] = None) -> Report:
+        """Plan the sections of a report.
+        
+        Args:
+            topic: The research topic
+            deadline: Optional time by which planning has to end
+            
+        Returns:
+            Planned report with empty sections
+        """
+        return Report(sections=await self._plan_sections(topic, deadline))
+
+    async def _stream_report_plan(self, ctx: Context, topic: str, deadline: Optional[float]) -> List[Section]:
+        """Stream the report plan and send one SectionPlannedEvent per section as soon as it is parsed.
+        
+        Args:
+            ctx: Workflow context
+            topic: The research topic
+            deadline: Time by which planning has to end
+            
+        Returns:
+            Planned sections
+        """
+        def on_section(section: Section, index: int) -> None:
+            # Send a copy, the section is written to concurrently
+            ctx.send_event(SectionPlannedEvent(section=section.model_copy(), index=index))
+            ctx.write_event_to_stream(ProgressEvent(msg=("\n" if not index else "\n - ") + section.description))
+
+        return await self._plan_sections(topic, deadline, on_section)
+
+    async def _plan_sections(self, topic: str, deadline: Optional[float],
+                             on_section: Optional[Callable[[Section, int], None]] = None) -> List[Section]:
+        """Generate the report plan, validating each section as soon as it has streamed in.
+        
+        An answer that is clearly unusable is cut off as soon as that shows and the
+        planner is asked again with the problem spelled out. Sections accepted
+        before the problem are kept, and the retry only plans the ones after them.
+        
+        Args:
+            topic: The research topic
+            deadline: Time by which planning has to end
+            on_section: Optional callback receiving each accepted section and its index
+            
+        Returns:
+            Planned sections
+        """
+        sections: List[Section] = []
+
+        def accept(planned: List[Section]) -> None:
+            for section in planned:
+                if on_section:
+                    on_section(section, len(sections))
+                sections.append(section)
+
+        # A retry appends to the first prompt, so it shares all of it as cached prefix
+        prompt, prefix = layout_prompt(report_planner_instructions, material=report_planner_topic.format(topic=topic))
+        attempt_prompt = prompt
+        for attempt in range(PLAN_ATTEMPTS):
+            parser = ReportPlanParser()
+            try:
+                if hasattr(self.llm, 'astream_complete'):
+                    generator = await self._astream_complete(attempt_prompt, Priority.PLANNING, deadline=deadline,
+                                                             cache_prefix=prefix,
+                                                             response_format={"type": "json_object"})
+                    try:
+                        async for chunk in generator:
+                            accept(parser.feed(chunk.delta or ""))
+                            if parser.done:
+                                break
+                    finally:
+                        await generator.aclose()
+                else:
+                    response = await self._acomplete(attempt_prompt, Priority.PLANNING, deadline=deadline,
+                                                     cache_prefix=prefix, response_format={"type": "json_object"})
+                    accept(parser.feed(response.text))
+                accept(parser.close())
+                return sections
+            except StreamValidationError as e:
+                current_span().set(plan_retries=attempt + 1)
+                if attempt + 1 == PLAN_ATTEMPTS or expired(deadline):
+                    if sections:
+                        return sections
+                    raise
+                print(f"Unusable report plan, asking again: {e}")
+                planned = ""
+                if sections:
+                    planned = ("These sections were already planned, so plan only the sections that follow them: "
+                               + ", ".join(section.name for section in sections))
+                attempt_prompt = prompt + report_planner_retry_instructions.format(error=e, planned=planned)
+        return sections
+
+    async def _generate_section(self, ctx: Context, section: Section, index: int, search_workflow: SearchWorkflow,
+                                search_results: Optional[Dict[str, str]] = None) -> str:
+        """Generate a section locally or on a section worker, streaming its content as progress events."""
+        emit = self.progress_emitter(ctx, section=section.name)
+        trace_id = await ctx.get("trace_id", default=None)
+        deadline = await ctx.get("section_deadline", default=None)
+        finished = not section.research or bool(section.content)
+        remote = bool(self.section_broker and not finished)
+        topic = await ctx.get("topic", default=None)
+        with self.tracer.span("section", trace_id=trace_id, section=section.name, remote=remote) as span:
+            try:
+                if remote:
+                    content = await self.section_broker.run_section(section, emit, deadline, topic)
+                else:
+                    content = await self.write_section(section, search_workflow, emit, deadline, search_results, topic)
+            finally:
+                emit.flush()
+            truncated = not finished and expired(deadline)
+            span.set(truncated=truncated, dropped_chars=emit.dropped_chars)
+        if truncated:
+            await ctx.set("truncated", True)
+
+        # Checkpoint newly written sections; an empty research section failed and a
+        # truncated one ran out of time, both are written again on resume
+        if self.checkpoint_store and not finished and content and not truncated:
+            report_id = await ctx.get("report_id", default=None)
+            await self.checkpoint_store.asave_section(report_id, index, section.model_copy(update={"content": content}))
+        return content
+
+    async def write_section(self, section: Section, search_workflow: SearchWorkflow, emit: Callable[[str], None],
+                            deadline: Optional[float] = None, search_results: Optional[Dict[str, str]] = None,
+                            topic: Optional[str] = None) -> str:
+        """Research and write a single section, recording its queries, their depths, source fingerprint and search statistics on it.
+        
+        Args:
+            section: Section to write
+            search_workflow: Nested search workflow
+            emit: Callback receiving each streamed chunk of the section content
+            deadline: Optional time by which the section has to be written; the
+                content streamed until then is returned
+            search_results: Search results gathered beforehand, e.g. for a batch of
+                reports; the section is researched with the search workflow if None
+            topic: Topic of the report, shared by the prompts of all its sections
+            
+        Returns:
+            Section content
+        """
+        if section.research and not section.content:
+            query_depths = section.query_depths
+            if search_results is None:
+                # Use the nested search workflow instead of direct method calls
+                try:
+                    handler = search_workflow.run(query=section.description, deadline=deadline)
+                    search_results = await handler
+                    section.search_stats = await handler.ctx.get("search_stats", default=None)
+                    query_depths = await handler.ctx.get("query_depths", default={})
+                    current_span().set(search_stats=section.search_stats)
+                except Exception as e:
+                    # Write the section without sources rather than not at all
+                    print(f"Error searching for section '{section.name}': {e}")
+                    search_results = {}
+            section.queries = list(search_results)
+            section.query_depths = {query: query_depths[query] for query in section.queries if query in query_depths}
+            section.fingerprint = fingerprint_sources(search_results)
+            results = pack_context(search_results, self.context_token_budget) if self.context_token_budget else search_results
+            # Sections of one report share the instructions and the report topic as prompt prefix
+            prompt, prefix = layout_prompt(
+                section_writer_instructions,
+                section_writer_report.format(topic=topic) if topic else "",
+                section_writer_material.format(section_topic=section.description, context=results)
+            )
+            
+            # Use streaming LLM response
+            try:
+                # Try to use streaming interface
+                if hasattr(self.llm, 'astream_complete'):
+                    generator = await self._astream_complete(prompt, Priority.SECTION_WRITING, deadline=deadline,
+                                                             cache_prefix=prefix)
+                    content = StreamBuffer()
+                    async for chunk in generator:
+                        delta = chunk.delta if hasattr(chunk, 'delta') else chunk.text
+                        content.append(delta)
+                        emit(delta)
+                    return content.getvalue()
+            except Exception as e:
+                print(f"Error streaming LLM response: {e}")
+        return section.content
+
     @step
     async def generate_sections(self, ctx: Context, ev: SectionGenerationEvent, search_workflow:SearchWorkflow) -> ResearchReportEvent:
         """Step 2: Generate sections based on report plan"""
         try:
             ctx.write_event_to_stream(ProgressEvent(msg="\n ### Starting to generate report sections \n"))
-            start_time = log_execution_time("generate_sections")
+            trace_id = await ctx.get("trace_id", default=None)
             
             # Define an async function to generate a single section
-            async def generate_single_section(section):
-                if section.research and not section.content:
-                    # Use the nested search workflow instead of direct method calls
-                    search_results = await search_workflow.run(query=section.description)
-                    results = search_results
-                    prompt = section_writer_instructions.format(section_topic=section.description,context=results)
-                    
-                    # Use streaming LLM response
-                    try:
-                        # Try to use streaming interface
-                        if hasattr(self.llm, 'astream_complete'):
-                            generator = await self.llm.astream_complete(prompt)
-                            content = ""
-                            async for chunk in generator:
-                                content += chunk.delta if hasattr(chunk, 'delta') else chunk.text
-                                ctx.write_event_to_stream(ProgressEvent(msg=chunk.delta if hasattr(chunk, 'delta') else chunk.text))
-                            return section, content
-                    except Exception as e:
-                        print(f"Error streaming LLM response: {e}")
-                return section, section.content
-            
-            # Process sections in parallel
-            section_tasks = [generate_single_section(section) for section in ev.report.sections]
-            section_results = await asyncio.gather(*section_tasks)
+            async def generate_single_section(section, index):
+                return section, await self._generate_section(ctx, section, index, search_workflow)
+            
+            with self.tracer.span("generate_sections", trace_id=trace_id, sections=len(ev.report.sections)):
+                # Process sections in parallel
+                section_tasks = [generate_single_section(section, index) for index, section in enumerate(ev.report.sections)]
+                section_results = await asyncio.gather(*section_tasks)
             
             # Update sections with generated content
             for section, content in section_results:
                 section.content = content
             
-            log_execution_time("generate_sections", start_time)
             ctx.write_event_to_stream(ProgressEvent(msg="### All sections generated \n\n"))
             
             return ResearchReportEvent(report=ev.report)
@@ -97,26 +439,159 @@ class ResearchWorkflow(Workflow):
             print(f"Error generating sections: {e}")
             # Return a default query if there's an error
             return StopEvent(result='Error generating sections')
+
+    @step
+    async def refresh_sections(self, ctx: Context, ev: RefreshEvent, search_workflow: SearchWorkflow) -> Union[ResearchReportEvent, StopEvent]:
+        """Step 2 (refresh mode): Re-run each section's searches and rewrite only the sections whose sources changed"""
+        ctx.write_event_to_stream(ProgressEvent(msg="\n ### Checking report sources for changes \n"))
+        trace_id = await ctx.get("trace_id", default=None)
+
+        with self.tracer.span("refresh_sections", trace_id=trace_id, sections=len(ev.report.sections)) as span:
+            changed = await asyncio.gather(*(
+                self._refresh_section(ctx, section, index, search_workflow) for index, section in enumerate(ev.report.sections)
+            ))
+            span.set(changed=sum(changed))
+        await ctx.set("report", ev.report)
+        ctx.write_event_to_stream(ProgressEvent(
+            msg=f"\n### {sum(changed)} of {len(changed)} sections changed \n"))
+
+        if not any(changed) and ev.result is not None:
+            self.tracer.end_trace(trace_id)
+            return StopEvent(result=ev.result)
+        return ResearchReportEvent(report=ev.report)
+
+    async def _refresh_section(self, ctx: Context, section: Section, index: int,
+                               search_workflow: SearchWorkflow) -> bool:
+        """Rewrite a section if its sources changed, returning whether it was rewritten.
+
+        The old content is kept unless the rewrite produces new content.
+        """
+        search_results = None
+        if section.research and section.content and section.fingerprint is not None:
+            # Same queries at the same depths as last time, searched upstream so that
+            # only a change in the sources themselves shows
+            deadline = await ctx.get("section_deadline", default=None)
+            results = await search_workflow.search_at_depths(section.queries, section.query_depths, deadline,
+                                                             use_cache=False) if section.queries else {}
+            if any(text.startswith("Error") for text in results.values()):
+                # A failed search says nothing about the sources; keep the section
+                return False
+            if fingerprint_sources(results) == section.fingerprint:
+                return False
+            search_results = results
+        elif not section.research or section.content:
+            # Needs no research, or was written without a fingerprint to compare against
+            return False
+
+        # Write into a copy, which also records the new queries and fingerprint
+        draft = section.model_copy(update={"content": ""})
+        content = await self._generate_section(ctx, draft, index, search_workflow, search_results)
+        if not content:
+            return False
+        section.content = content
+        section.queries = draft.queries
+        section.query_depths = draft.query_depths
+        section.fingerprint = draft.fingerprint
+        section.search_stats = draft.search_stats
+        return True
+
+    @step(num_workers=MAX_PARALLEL_SECTIONS)
+    async def generate_planned_section(self, ctx: Context, ev: SectionPlannedEvent, search_workflow: SearchWorkflow) -> SectionWrittenEvent:
+        """Step 2 (streaming plan mode): Generate a section as soon as it has been planned"""
+        try:
+            ev.section.content = await self._generate_section(ctx, ev.section, ev.index, search_workflow)
+        except Exception as e:
+            print(f"Error generating section '{ev.section.name}': {e}")
+        ctx.write_event_to_stream(ProgressEvent(msg=f"\n### Section generated: {ev.section.name} \n",
+                                                section=ev.section.name))
+        return SectionWrittenEvent(section=ev.section, index=ev.index)
+
+    @step
+    async def assemble_sections(self, ctx: Context, ev: Union[SectionWrittenEvent, PlanCompletedEvent]) -> Optional[ResearchReportEvent]:
+        """Step 3 (streaming plan mode): Collect written sections into the report once the plan is complete"""
+        written = await ctx.get("written_sections", default={})
+        total = await ctx.get("planned_sections", default=None)
+        if isinstance(ev, PlanCompletedEvent):
+            total = ev.total
+            await ctx.set("planned_sections", total)
+        else:
+            written[ev.index] = ev.section
+            await ctx.set("written_sections", written)
+
+        if total is None or len(written) < total:
+            return None
+
+        ctx.write_event_to_stream(ProgressEvent(msg="### All sections generated \n\n"))
+        return ResearchReportEvent(report=Report(sections=[written[index] for index in range(total)]))
+
+    async def format_report(self, report: Report, emit: Callable[[str], None], deadline: Optional[float] = None) -> str:
+        """Write the introduction and conclusion around the written sections.
+        
+        Args:
+            report: Report with its sections written
+            emit: Callback receiving each streamed chunk of the final report
+            deadline: Optional time by which the report has to be done
+            
+        Returns:
+            Final report
+        """
+        sections_contents = "".join([s.content for s in report.sections])
+        prompt, prefix = layout_prompt(final_section_writer_instructions,
+                                       material=final_section_writer_context.format(context=sections_contents))
+        
+        # Use streaming LLM response, splicing the sections in as the placeholder streams past
+        try:
+            if hasattr(self.llm, 'astream_complete'):
+                splicer = MarkerSplicer('[section]', sections_contents)
+                parts = []
+                generator = await self._astream_complete(prompt, Priority.FINAL_FORMATTING, deadline=deadline,
+                                                         cache_prefix=prefix)
+                async for chunk in generator:
+                    for piece in splicer.feed(chunk.delta or ""):
+                        parts.append(piece)
+                        emit(piece)
+                for piece in splicer.flush():
+                    parts.append(piece)
+                    emit(piece)
+                return "".join(parts)
+            response = await self._acomplete(prompt, Priority.FINAL_FORMATTING, deadline=deadline,
+                                             cache_prefix=prefix)
+            return response.text.replace('[section]',sections_contents)
+        except asyncio.TimeoutError:
+            # Out of time for the introduction and conclusion; return the sections alone
+            print("Deadline reached while generating the final report")
+            return sections_contents
+        except Exception as e:
+            print(f"Error in LLM response: {e}")
+            return "Error generating final report"
+
     @step
     async def format_final_report(self, ctx: Context, ev: ResearchReportEvent) -> StopEvent:
         """Final step: Format and return the complete research report"""
         try:
             # Send progress event
             ctx.write_event_to_stream(ProgressEvent(msg="### Generating final report \n"))
-            start_time = log_execution_time("format_final_report")
-            
-            sections_contents = "".join([s.content for s in ev.report.sections])
-            prompt = final_section_writer_instructions.format(context=sections_contents)
-            
-            # Use streaming LLM response
-            try:
-                response = await self.llm.acomplete(prompt)
-                result = response.text.replace('[section]',sections_contents)
-            except Exception as e:
-                print(f"Error in LLM response: {e}")
-                result = "Error generating final report"
+            trace_id = await ctx.get("trace_id", default=None)
+            deadline = await ctx.get("deadline", default=None)
+            emit = self.progress_emitter(ctx)
+
+            with self.tracer.span("format_final_report", trace_id=trace_id):
+                try:
+                    result = await self.format_report(ev.report, emit, deadline)
+                finally:
+                    emit.flush()
 
-            log_execution_time("format_final_report", start_time)
+            # Only a report with every section written is final; otherwise resume fills in the gaps
+            complete = (all(s.content for s in ev.report.sections if s.research)
+                        and not expired(deadline) and not await ctx.get("truncated", default=False))
+            if self.checkpoint_store and complete and result != "Error generating final report":
+                await self.checkpoint_store.asave_result(await ctx.get("report_id", default=None), result)
+            summary = self.tracer.end_trace(trace_id)
+            if summary and self._verbose:
+                print(format_trace_summary(summary))
+            search_stats = format_search_stats(ev.report.sections)
+            if search_stats and self._verbose:
+                print(search_stats)
             # Send completion event            
             return StopEvent(result=result)
         except Exception as e:
@@ -1,5 +1,4 @@
 from llama_index.core.workflow import (
-    Workflow,
     StartEvent,
     StopEvent,
     Event,
@@ -7,12 +6,27 @@ from llama_index.core.workflow import (
     Context
 )
 
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 import asyncio
 import json
-from tavily import AsyncTavilyClient
-from ..utils.prompts import search_query_prompt
-from ..utils.utils import clean_search_item, parse_llm_response
+from ..utils.prompts import search_query_prompt, search_query_input, search_query_retry_instructions
+from ..utils.prompt_cache import PromptCache, layout_prompt
+from ..utils.utils import clean_search_item, parse_llm_response, QueryStreamParser
+from ..utils.cache import SearchResultCache, normalize_query, make_cache_key
+from ..utils.semantic_cache import SemanticSearchCache
+from ..utils.local_index import LocalSourceIndex
+from ..utils.coverage import SearchCoverage
+from ..utils.scheduler import Scheduler, Priority, SEARCH_PROVIDER
+from ..utils.tracing import Tracer
+from ..utils.deadline import deadline_for_timeout, earliest, expired, remaining
+from ..utils.hedging import Hedger
+from ..utils.routing import ModelRouter
+from ..utils.single_flight import SingleFlight
+from .base import BaseResearchWorkflow
+
+if TYPE_CHECKING:
+    from tavily import AsyncTavilyClient
+
 class SearchQueryEvent(Event):
     query: str
     queries: List[str]
@@ -20,73 +34,418 @@ class SearchQueryEvent(Event):
 class SearchResultEvent(Event):
     results: Dict[str, str]
 
-class SearchWorkflow(Workflow):
-    def __init__(self, llm, config, verbose: bool = False):
-        super().__init__(timeout=60, verbose=verbose)
-        self.llm = llm
-        self.tavily_client = AsyncTavilyClient(api_key=config["api_key"])
+class SearchWorkflow(BaseResearchWorkflow):
+    def __init__(self, llm, config, verbose: bool = False, cache: Optional[SearchResultCache] = None,
+                 semantic_cache: Optional[SemanticSearchCache] = None, scheduler: Optional[Scheduler] = None,
+                 search_client: Optional["AsyncTavilyClient"] = None, tracer: Optional[Tracer] = None,
+                 timeout: float = 60, hedger: Optional[Hedger] = None,
+                 local_index: Optional[LocalSourceIndex] = None, router: Optional[ModelRouter] = None,
+                 single_flight: Optional[SingleFlight] = None, prompt_cache: Optional[PromptCache] = None):
+        super().__init__(llm, timeout=timeout, verbose=verbose, scheduler=scheduler, tracer=tracer, hedger=hedger,
+                         router=router, single_flight=single_flight, prompt_cache=prompt_cache)
+        if search_client is None:
+            from tavily import AsyncTavilyClient
+            search_client = AsyncTavilyClient(api_key=config["api_key"])
+        self.tavily_client = search_client
         self.config = config
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        # Every fetched source is indexed; in "local_first" mode queries are answered from it when it can
+        self.local_index = local_index
 
     @step
     async def generate_queries(self, ctx: Context, ev: StartEvent) -> SearchQueryEvent:
         """Step 1: Generate search queries based on the section description"""
         try:
-            # Use LLM to generate queries
-            prompt = search_query_prompt.format(query=ev.query)
-            
-            try:
-                response = await self.llm.acomplete(prompt)
-                queries = parse_llm_response(response.text, 'list')
-                if queries and len(queries) > self.config["max_queries"]:
-                    queries = queries[: self.config["max_queries"]]
-                return SearchQueryEvent(query=ev.query, queries=queries)
-            except Exception as e:
-                print(f"Error in LLM response: {e}")
-                return SearchQueryEvent(query=ev.query, queries=[])
+            # The caller's deadline, if any, tightens the workflow's own timeout
+            deadline = earliest(ev.get("deadline"), deadline_for_timeout(self._timeout))
+            await ctx.set("deadline", deadline)
+
+            queries = await self.generate_search_queries(ev.query, deadline)
+            return SearchQueryEvent(query=ev.query, queries=queries)
         except Exception as e:
             print(f"Error generating queries: {e}")
             return SearchQueryEvent(query=ev.query, queries=[])
 
+    async def generate_search_queries(self, query: str, deadline: Optional[float] = None) -> List[str]:
+        """Generate the search queries for a section description.
+        
+        Queries are parsed as they stream in and the stream is stopped as soon as
+        max_queries distinct ones have arrived. An answer without any usable query
+        is retried once with a prompt asking for the expected format.
+        
+        Args:
+            query: Section description
+            deadline: Optional time by which the queries have to be generated
+            
+        Returns:
+            Up to max_queries distinct search queries, or none if the LLM call failed
+        """
+        # Use LLM to generate queries
+        prompt, prefix = layout_prompt(search_query_prompt, material=search_query_input.format(query=query))
+        
+        try:
+            queries = await self._complete_queries(prompt, prefix, deadline)
+            if not queries:
+                queries = await self._complete_queries(prompt + search_query_retry_instructions, prefix, deadline)
+            return queries
+        except Exception as e:
+            print(f"Error in LLM response: {e}")
+            return []
+
+    async def _complete_queries(self, prompt: str, cache_prefix: str, deadline: Optional[float]) -> List[str]:
+        """Get up to max_queries distinct queries from one LLM answer."""
+        max_queries = self.config["max_queries"]
+        queries = {}
+
+        def add(items: List[str]) -> None:
+            for item in items:
+                if len(queries) < max_queries:
+                    queries.setdefault(normalize_query(item), item)
+
+        if not hasattr(self.llm, 'astream_complete'):
+            response = await self._acomplete(prompt, Priority.QUERY_GENERATION, deadline=deadline,
+                                             cache_prefix=cache_prefix)
+            add(parse_llm_response(response.text, 'list'))
+            return list(queries.values())
+
+        parser = QueryStreamParser()
+        generator = await self._astream_complete(prompt, Priority.QUERY_GENERATION, deadline=deadline,
+                                                 cache_prefix=cache_prefix)
+        try:
+            async for chunk in generator:
+                add(parser.feed(chunk.delta or ""))
+                if len(queries) >= max_queries:
+                    # Enough queries, the rest of the answer would not be searched
+                    break
+            else:
+                add(parser.flush())
+        finally:
+            await generator.aclose()
+        return list(queries.values())
+
+    async def search(self, queries: List[str], deadline: Optional[float] = None,
+                     use_cache: bool = True) -> Dict[str, str]:
+        """Search for each query with the configured depth and result count.
+        
+        Args:
+            queries: Search queries
+            deadline: Optional time by which the searches have to be done
+            use_cache: Whether results may be served from the caches and the local
+                index; if False every query is searched upstream, e.g. to detect
+                changed sources, and the result cache is updated with the results
+            
+        Returns:
+            Formatted results by query
+        """
+        results, _ = await self._search_items(queries, self.config["search_depth"], deadline, use_cache)
+        return results
+
+    async def search_at_depths(self, queries: List[str], query_depths: Dict[str, List[str]],
+                               deadline: Optional[float] = None, use_cache: bool = True) -> Dict[str, str]:
+        """Search each query at the depths recorded for it, e.g. by adaptive_search.
+
+        The results of a query searched at several depths are merged the way
+        adaptive_search merges them, so the same sources give the same results.
+        
+        Args:
+            queries: Search queries
+            query_depths: Depths by query, in the order they were searched; queries
+                without any are searched at the configured depth
+            deadline: Optional time by which the searches have to be done
+            use_cache: Whether results may be served from the caches and the local index
+            
+        Returns:
+            Formatted results by query
+        """
+        depths = {query: query_depths.get(query) or [self.config["search_depth"]] for query in queries}
+        levels = list(dict.fromkeys(depth for query in queries for depth in depths[query]))
+        searched = await asyncio.gather(*(
+            self._search_items([query for query in queries if level in depths[query]], level, deadline, use_cache)
+            for level in levels
+        ))
+        by_level = dict(zip(levels, searched))
+
+        results = {}
+        for query in queries:
+            items: List[Dict[str, Any]] = []
+            for level in depths[query]:
+                level_results, level_items = by_level[level]
+                if query not in level_items:
+                    # The search failed; its error is the result
+                    results[query] = level_results.get(query, f"Error performing search: no result for {query}")
+                    break
+                items = self._merge_items(level_items[query], items)
+            else:
+                results[query] = self._format_items(query, items)
+        return results
+
+    async def _search_items(self, queries: List[str], search_depth: str, deadline: Optional[float],
+                            use_cache: bool = True) -> Tuple[Dict[str, str], Dict[str, List[Dict[str, Any]]]]:
+        """Search for each query at a depth, returning the formatted results and the cleaned items by query."""
+        with self.tracer.span("search.perform", queries=len(queries), depth=search_depth) as span:
+            return await self._perform_searches(queries, search_depth, self.config["max_results"], deadline, span,
+                                                use_cache)
+
+    async def adaptive_search(self, queries: List[str], deadline: Optional[float] = None
+                              ) -> Tuple[Dict[str, str], Dict[str, Any], Dict[str, List[str]]]:
+        """Search with only as many and as deep searches as the section needs.
+        
+        The first initial_queries queries are searched at basic depth and the
+        evidence in their results is counted (see SearchCoverage). The other
+        queries are only searched if that falls short of the evidence budget, and
+        if it still does, the queries that contributed least are searched again at
+        advanced depth, provided the configured search depth is advanced.
+        
+        Args:
+            queries: Search queries, most important first
+            deadline: Optional time by which the searches have to be done
+            
+        Returns:
+            Formatted results of the searched queries by query, search statistics and
+            the depths each query was searched at
+        """
+        budget = self.config.get("evidence_budget", 4)
+        initial = max(self.config.get("initial_queries", 1), 1)
+        coverage = SearchCoverage(self.config.get("min_evidence_score", 0.7), self.config.get("max_overlap", 0.8))
+        results: Dict[str, str] = {}
+        items: Dict[str, List[Dict[str, Any]]] = {}
+        evidence: Dict[str, int] = {}
+        depths: Dict[str, List[str]] = {}
+        rounds = searches = escalated = 0
+
+        for batch in (queries[:initial], queries[initial:]):
+            if not batch or coverage.evidence >= budget or expired(deadline):
+                break
+            batch_results, batch_items = await self._search_items(batch, "basic", deadline)
+            rounds += 1
+            searches += len(batch)
+            results.update(batch_results)
+            for query in batch:
+                items[query] = batch_items.get(query, [])
+                evidence[query] = coverage.add(items[query])
+                depths[query] = ["basic"]
+
+        if coverage.evidence < budget and self.config["search_depth"] == "advanced" and evidence \
+                and not expired(deadline):
+            # Below the budget, at least one query is below its share of it
+            share = budget / len(evidence)
+            weak = [query for query in evidence if evidence[query] < share]
+            deep_results, deep_items = await self._search_items(weak, "advanced", deadline)
+            rounds += 1
+            searches += len(weak)
+            escalated = len(weak)
+            for query in weak:
+                if query not in deep_items:
+                    continue
+                coverage.add(deep_items[query])
+                results[query] = self._format_items(query, self._merge_items(deep_items[query], items[query]))
+                depths[query].append("advanced")
+
+        searched = len(evidence)
+        stats = {
+            "fanout": "adaptive",
+            "queries": len(queries),
+            "searched": searched,
+            "skipped": len(queries) - searched,
+            "searches": searches,
+            "escalated": escalated,
+            "rounds": rounds,
+            **coverage.stats(),
+            "covered": coverage.evidence >= budget,
+            "stopped_early": searched < len(queries) and coverage.evidence >= budget
+        }
+        return {query: results[query] for query in queries if query in results}, stats, depths
+
+    async def _fixed_search(self, queries: List[str], deadline: Optional[float]
+                            ) -> Tuple[Dict[str, str], Dict[str, Any], Dict[str, List[str]]]:
+        """Search every query at the configured depth, with the same statistics and depths as adaptive_search."""
+        depth = self.config["search_depth"]
+        results, items = await self._search_items(queries, depth, deadline)
+        coverage = SearchCoverage(self.config.get("min_evidence_score", 0.7), self.config.get("max_overlap", 0.8))
+        for query in queries:
+            coverage.add(items.get(query, []))
+        return results, {
+            "fanout": "fixed",
+            "queries": len(queries),
+            "searched": len(queries),
+            "skipped": 0,
+            "searches": len(queries),
+            "escalated": 0,
+            "rounds": 1 if queries else 0,
+            **coverage.stats(),
+            "covered": coverage.evidence >= self.config.get("evidence_budget", 4),
+            "stopped_early": False
+        }, {query: [depth] for query in queries}
+
     @step
     async def perform_searches(self, ctx: Context, ev: SearchQueryEvent) -> StopEvent:
-        """Step 2: Perform parallel searches for each query"""
+        """Step 2: Perform parallel searches for each query, recording search statistics and depths in the context"""
         try:
             if not self.tavily_client:
                 return StopEvent(result={ev.query: f"No search client available for query: {ev.query}"})
 
-            # Create search tasks list
-            search_tasks = [
-                self.tavily_client.search(
-                    query,
-                    search_depth= self.config["search_depth"],
-                    max_results= self.config["max_results"]
-                ) for query in ev.queries
-            ]
-            
-            # Execute all searches in parallel
-            search_results = await asyncio.gather(*search_tasks, return_exceptions=True)
-            
-            # Process results
-            results = {}
-            for query, result in zip(ev.queries, search_results):
-                try:
-                    if isinstance(result, Exception):
-                        print(f"Error in Tavily search for query '{query}': {result}")
-                        results[query] = f"Error performing search: {str(result)}"
-                        continue
-                        
-                    content = []
-                    if isinstance(result, dict) and 'results' in result:
-                        for item in result['results']:
-                            cleaned_item = clean_search_item(item)
-                            if cleaned_item:
-                                content.append(json.dumps(cleaned_item, ensure_ascii=False))
-                    results[query] = "\n".join(content) if content else f"No detailed results found for query: {query}"
-                except Exception as e:
-                    print(f"Error processing result for query '{query}': {e}")
-                    results[query] = f"Error processing search result: {str(e)}"
-            
+            deadline = await ctx.get("deadline", default=None)
+            if self.config.get("fanout") == "adaptive":
+                results, stats, depths = await self.adaptive_search(ev.queries, deadline)
+            else:
+                results, stats, depths = await self._fixed_search(ev.queries, deadline)
+            await ctx.set("search_stats", stats)
+            await ctx.set("query_depths", depths)
             return StopEvent(result=results)
         except Exception as e:
             print(f"Error performing searches: {e}")
-            return StopEvent(result={})
\ No newline at end of file
+            return StopEvent(result={})
+
+    async def _perform_searches(self, queries: List[str], search_depth: str, max_results: int, deadline: Optional[float],
+                                span, use_cache: bool = True) -> Tuple[Dict[str, str], Dict[str, List[Dict[str, Any]]]]:
+        """Search for each query, serving what the caches hold unless use_cache is False.
+
+        Searches still running at the deadline are cancelled and reported as errors,
+        so the results found in time are returned rather than none. Without the
+        caches, identical searches in flight are not shared either, since they may
+        have been started from a cache miss well before.
+
+        Returns:
+            Formatted results by query, and the cleaned items of the queries that got any answer
+        """
+        # Serve what we can from the cache and only search for the rest
+        results = {}
+        found = {}
+        pending = []
+        cached = [None] * len(queries)
+        if self.cache and use_cache:
+            cached = await asyncio.gather(*(self.cache.aget(query, search_depth, max_results) for query in queries))
+        for query, cached_items in zip(queries, cached):
+            if cached_items is not None:
+                results[query] = self._format_items(query, cached_items)
+                found[query] = cached_items
+            else:
+                pending.append(query)
+        span.set(cache_hits=len(queries) - len(pending))
+
+        # Reuse results of near-duplicate queries
+        vectors = {}
+        if self.semantic_cache and use_cache and pending:
+            try:
+                matrix = await self.semantic_cache.embed(pending)
+                matches = self.semantic_cache.lookup(matrix, search_depth, max_results)
+                still_pending = []
+                for query, vector, items in zip(pending, matrix, matches):
+                    if items is not None:
+                        results[query] = self._format_items(query, items)
+                        found[query] = items
+                    else:
+                        vectors[query] = vector
+                        still_pending.append(query)
+                pending = still_pending
+                span.set(semantic_hits=len(matches) - len(pending))
+            except Exception as e:
+                print(f"Error in semantic cache lookup: {e}")
+
+        # Answer from previously fetched sources when enough fresh ones match
+        if self.local_index and use_cache and self.config.get("mode") == "local_first" and pending:
+            still_pending = []
+            for query in pending:
+                try:
+                    items, recall = await self.local_index.lookup(query, max_results)
+                except Exception as e:
+                    print(f"Error in local index lookup: {e}")
+                    items, recall = [], 0.0
+                if recall >= self.local_index.min_recall:
+                    results[query] = self._format_items(query, items)
+                    found[query] = items
+                else:
+                    still_pending.append(query)
+            span.set(local_hits=len(pending) - len(still_pending))
+            pending = still_pending
+
+        # Create search tasks list
+        search = self._search if use_cache else self._search_upstream
+        search_tasks = [asyncio.ensure_future(search(query, search_depth, max_results)) for query in pending]
+        
+        # Execute all searches in parallel until the deadline
+        if search_tasks:
+            _, late_tasks = await asyncio.wait(search_tasks, timeout=remaining(deadline))
+            for task in late_tasks:
+                task.cancel()
+            await asyncio.gather(*late_tasks, return_exceptions=True)
+            span.set(timed_out=len(late_tasks))
+        search_results = [
+            asyncio.TimeoutError("Search deadline reached") if task.cancelled() else task.exception() or task.result()
+            for task in search_tasks
+        ]
+        
+        # Process results
+        fetched = []
+        for query, result in zip(pending, search_results):
+            try:
+                if isinstance(result, Exception):
+                    print(f"Error in Tavily search for query '{query}': {result}")
+                    results[query] = f"Error performing search: {str(result)}"
+                    continue
+                    
+                items = []
+                if isinstance(result, dict) and 'results' in result:
+                    for item in result['results']:
+                        cleaned_item = clean_search_item(item)
+                        if cleaned_item:
+                            items.append(cleaned_item)
+                if self.cache:
+                    await self.cache.aset(query, search_depth, max_results, items)
+                if query in vectors:
+                    self.semantic_cache.add(query, vectors[query], search_depth, max_results, items)
+                fetched.extend(items)
+                results[query] = self._format_items(query, items)
+                found[query] = items
+            except Exception as e:
+                print(f"Error processing result for query '{query}': {e}")
+                results[query] = f"Error processing search result: {str(e)}"
+
+        if self.local_index and fetched:
+            try:
+                await self.local_index.add(fetched)
+            except Exception as e:
+                print(f"Error indexing search results: {e}")
+        
+        return {query: results[query] for query in queries if query in results}, found
+
+    async def _search(self, query: str, search_depth: str, max_results: int) -> Dict[str, Any]:
+        """Run a single Tavily search, sharing an identical search already in flight if coalescing."""
+        if not self.single_flight:
+            return await self._search_upstream(query, search_depth, max_results)
+        key = make_cache_key("search", id(self.tavily_client), normalize_query(query), search_depth, max_results)
+        return await self.single_flight.run(
+            key, lambda: self._search_upstream(query, search_depth, max_results), kind="search")
+
+    async def _search_upstream(self, query: str, search_depth: str, max_results: int) -> Dict[str, Any]:
+        """Run a single Tavily search, under the scheduler and hedger if configured."""
+        def search():
+            return self.tavily_client.search(query, search_depth=search_depth, max_results=max_results)
+
+        def attempt():
+            if not self.scheduler:
+                return search()
+            return self.scheduler.run(SEARCH_PROVIDER, Priority.SEARCH, search)
+
+        with self.tracer.span("search.tavily", query=query, depth=search_depth) as span:
+            if self.hedger:
+                result = await self.hedger.run(f"search:{search_depth}", attempt)
+            else:
+                result = await attempt()
+            if self.tracer.enabled and isinstance(result, dict):
+                span.set(results=len(result.get('results', [])),
+                         bytes_out=len(json.dumps(result, ensure_ascii=False).encode('utf-8')))
+            return result
+
+    @staticmethod
+    def _merge_items(deep: List[Dict[str, Any]], shallow: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge the items of a deeper search with those of a shallower one it did not return again."""
+        urls = {item.get('url') for item in deep}
+        return deep + [item for item in shallow if item.get('url') not in urls]
+
+    @staticmethod
+    def _format_items(query: str, items: List[Dict[str, Any]]) -> str:
+        """Format cleaned search items as one JSON document per line."""
+        content = [json.dumps(item, ensure_ascii=False) for item in items]
+        return "\n".join(content) if content else f"No detailed results found for query: {query}"
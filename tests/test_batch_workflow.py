@@ -0,0 +1,79 @@
+import asyncio
+
+from llama_index.core.workflow import StartEvent
+
+from research.models.models import Report, Section
+from research.utils.tracing import get_tracer
+from research.workflows.batch_workflow import BatchResearchWorkflow
+
+# Section queries as the LLM spelled them, overlapping across reports
+QUERIES = {
+    "solar A": ["Solar panel prices", "solar storage"],
+    "solar B": ["solar panel prices?", "Grid policy"],
+    "wind A": ["wind turbines", "SOLAR STORAGE."],
+}
+
+
+class StubResearch:
+    deadline_reserve = 0
+    tracer = get_tracer()
+
+    async def plan_report(self, topic, deadline=None):
+        return Report(sections=[
+            Section(name="Intro", description=f"{topic} intro", research=False, content=""),
+            Section(name="A", description=f"{topic} A", research=True, content=""),
+            Section(name="B", description=f"{topic} B", research=True, content=""),
+        ])
+
+
+class StubSearch:
+    def __init__(self):
+        self.searched = []
+
+    async def generate_search_queries(self, description, deadline=None):
+        return QUERIES.get(description, [])
+
+    async def search(self, queries, deadline=None):
+        self.searched.append(list(queries))
+        return {query: f"results for {query}" for query in queries}
+
+
+class FakeContext:
+    def __init__(self):
+        self.store = {}
+        self.events = []
+
+    async def get(self, key, default=None):
+        return self.store.get(key, default)
+
+    async def set(self, key, value):
+        self.store[key] = value
+
+    def write_event_to_stream(self, event):
+        self.events.append(event)
+
+
+def test_each_distinct_query_is_searched_once_and_fanned_out():
+    search = StubSearch()
+    workflow = BatchResearchWorkflow(StubResearch(), search, timeout=None)
+    ctx = FakeContext()
+
+    async def scenario():
+        planned = await workflow.plan_reports(ctx, StartEvent(topics=["solar", " solar ", "wind", ""]))
+        return planned, await workflow.search_sections(ctx, planned)
+
+    planned, researched = asyncio.run(scenario())
+    assert planned.topics == ["solar", "wind"]
+
+    # One search call, one query per normalized spelling, under the first spelling seen
+    assert search.searched == [["Solar panel prices", "solar storage", "Grid policy", "wind turbines"]]
+    assert ctx.store["queries"] == 6
+    assert ctx.store["unique_queries"] == 4
+
+    # Only research sections are searched, and each gets results under its own spelling
+    assert researched.results == {
+        "0:1": {"Solar panel prices": "results for Solar panel prices", "solar storage": "results for solar storage"},
+        "0:2": {"solar panel prices?": "results for Solar panel prices", "Grid policy": "results for Grid policy"},
+        "1:1": {"wind turbines": "results for wind turbines", "SOLAR STORAGE.": "results for solar storage"},
+        "1:2": {},
+    }
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from research.distributed.broker import SectionBroker
+from research.models.models import Section
+
+
+class ReplayBroker(SectionBroker):
+    """Broker answering every job with canned worker messages."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.jobs = []
+
+    async def _submit(self, job):
+        self.jobs.append(job)
+        queue = asyncio.Queue()
+        for message in self.messages:
+            queue.put_nowait({"job_id": job["job_id"], **message})
+        return queue
+
+
+def test_section_broker_is_abstract():
+    with pytest.raises(TypeError):
+        SectionBroker()
+
+
+def test_run_section_relays_progress_and_records_the_result():
+    broker = ReplayBroker([
+        {"type": "progress", "msg": "Hello "},
+        {"type": "progress", "msg": "world"},
+        {"type": "result", "content": "Hello world", "queries": ["q"], "query_depths": {"q": ["basic"]},
+         "fingerprint": "abc", "search_stats": {"searches": 1}},
+    ])
+    section = Section(name="A", description="About A", research=True, content="")
+    chunks = []
+
+    content = asyncio.run(broker.run_section(section, chunks.append, topic="topic"))
+    assert content == "Hello world"
+    assert chunks == ["Hello ", "world"]
+    assert (section.queries, section.query_depths, section.fingerprint, section.search_stats) == (
+        ["q"], {"q": ["basic"]}, "abc", {"searches": 1})
+    assert broker.jobs[0]["topic"] == "topic"
+
+
+def test_run_section_raises_worker_errors():
+    broker = ReplayBroker([{"type": "error", "error": "boom"}])
+    section = Section(name="A", description="About A", research=True, content="")
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(broker.run_section(section, lambda text: None))
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from research.utils import cache as cache_module
+from research.utils.cache import CacheBackend, MemoryCache, SQLiteCache, SearchResultCache
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_sqlite_cache_roundtrip(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("key", {"items": [1, 2, 3]})
+    assert cache.get("key") == {"items": [1, 2, 3]}
+    assert cache.get("missing") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "entries": 1}
+
+
+def test_sqlite_cache_expires_entries_after_ttl(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.set("key", "value")
+    clock.now += 59
+    assert cache.get("key") == "value"
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.evictions == 1
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_evicts_least_recently_used_entries(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    # Reading a makes b the least recently used entry
+    assert cache.get("a") == 1
+    clock.now += 1
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_sqlite_cache_evicts_by_total_size(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_bytes=1)
+    cache.set("a", "x" * 100)
+    clock.now += 1
+    cache.set("b", "y" * 100)
+    assert len(cache) == 0
+    assert cache.evictions == 2
+
+
+def test_sqlite_cache_async_access_runs_off_the_event_loop(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    calls = []
+
+    async def to_thread(fn, *args):
+        calls.append(fn.__name__)
+        return fn(*args)
+
+    monkeypatch.setattr(cache_module.asyncio, "to_thread", to_thread)
+
+    async def roundtrip():
+        await cache.aset("key", [1])
+        return await cache.aget("key")
+
+    assert asyncio.run(roundtrip()) == [1]
+    assert calls == ["set", "get"]
+
+
+def test_search_result_cache_shares_entries_between_query_spellings():
+    cache = SearchResultCache(MemoryCache())
+    cache.set("What is RAG?", "basic", 3, [{"url": "https://example.com"}])
+    assert cache.get("  what is rag ", "basic", 3) == [{"url": "https://example.com"}]
+    assert cache.get("what is rag", "advanced", 3) is None
+    assert asyncio.run(cache.aget("what is rag", "basic", 3)) == [{"url": "https://example.com"}]
@@ -0,0 +1,113 @@
+import asyncio
+
+from research.models.models import Report, Section
+from research.utils import checkpoint as checkpoint_module
+from research.utils.checkpoint import CheckpointStore
+
+
+def plan(*names):
+    return Report(sections=[Section(name=name, description=f"About {name}", research=True, content="")
+                            for name in names])
+
+
+def written(report, index, content):
+    return report.sections[index].model_copy(update={"content": content})
+
+
+def test_resume_serves_finished_sections(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    report = plan("a", "b", "c")
+    store.start("report", "topic")
+    store.save_plan("report", report)
+    store.save_section("report", 1, written(report, 1, "B"))
+
+    checkpoint = store.load("report")
+    assert checkpoint["topic"] == "topic"
+    assert checkpoint["finished_sections"] == 1
+    assert [section.content for section in checkpoint["report"].sections] == ["", "B", ""]
+    assert checkpoint["result"] is None
+
+    store.save_result("report", "final")
+    assert store.load("report")["result"] == "final"
+    assert store.load("unknown") is None
+
+
+def test_sections_streamed_before_the_plan_was_saved_are_kept(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    report = plan("a", "b")
+    store.start("report", "topic")
+    # In streaming plan mode a section can be written before the plan is complete
+    store.save_section("report", 0, written(report, 0, "A"))
+    assert store.load("report")["report"] is None
+
+    store.save_plan("report", report)
+    checkpoint = store.load("report")
+    assert [section.content for section in checkpoint["report"].sections] == ["A", ""]
+    assert checkpoint["finished_sections"] == 1
+
+
+def test_replanning_drops_sections_of_the_earlier_plan(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    old = plan("old a", "old b", "old c")
+    store.start("report", "topic")
+    store.save_section("report", 0, written(old, 0, "old A"))
+    store.save_section("report", 2, written(old, 2, "old C"))
+
+    # The streamed plan failed before it was saved, so resuming plans again
+    new = plan("new a", "new b")
+    store.start("report", "topic")
+    store.save_plan("report", new)
+
+    checkpoint = store.load("report")
+    assert [section.name for section in checkpoint["report"].sections] == ["new a", "new b"]
+    assert [section.content for section in checkpoint["report"].sections] == ["", ""]
+    assert checkpoint["finished_sections"] == 0
+
+
+def test_replanning_a_finished_report_clears_its_result(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    store.start("report", "topic")
+    store.save_plan("report", plan("a"))
+    store.save_result("report", "final")
+
+    store.start("report", "topic")
+    store.save_plan("report", plan("b"))
+    checkpoint = store.load("report")
+    assert checkpoint["result"] is None
+    assert checkpoint["report"].sections[0].name == "b"
+
+
+def test_expired_reports_are_dropped(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checkpoint_module.time, "time", lambda: now[0])
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"), ttl=60)
+    store.start("old", "topic")
+    now[0] += 61
+    store.start("new", "topic")
+    assert store.load("old") is None
+    assert store.load("new") is not None
+
+
+def test_async_variants_run_off_the_event_loop(tmp_path, monkeypatch):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    report = plan("a", "b")
+    threads = []
+    to_thread = asyncio.to_thread
+
+    async def recording_to_thread(fn, *args):
+        threads.append(fn.__name__)
+        return await to_thread(fn, *args)
+
+    monkeypatch.setattr(checkpoint_module.asyncio, "to_thread", recording_to_thread)
+
+    async def scenario():
+        await store.astart("report", "topic")
+        await store.asave_plan("report", report)
+        await store.asave_section("report", 0, written(report, 0, "A"))
+        await store.asave_result("report", "final")
+        return await store.aload("report")
+
+    checkpoint = asyncio.run(scenario())
+    assert threads == ["start", "save_plan", "save_section", "save_result", "load"]
+    assert [section.content for section in checkpoint["report"].sections] == ["A", ""]
+    assert checkpoint["result"] == "final"
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from research.utils.hedging import Hedger
+
+
+def warmed_up(latency=0.01, samples=5):
+    """Create a hedger that has seen enough fast calls to hedge the next slow one."""
+    hedger = Hedger(percentile=95, min_samples=samples)
+    for _ in range(samples):
+        hedger.record("call", latency)
+    return hedger
+
+
+def attempts(*behaviours):
+    """Create an attempt function whose n-th call sleeps and then returns or raises as given."""
+    started = []
+    cancelled = []
+
+    async def attempt():
+        index = len(started)
+        started.append(index)
+        delay, outcome = behaviours[index]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return attempt, started, cancelled
+
+
+def test_no_hedge_without_enough_samples():
+    hedger = Hedger(min_samples=5)
+    attempt, started, _ = attempts((0.05, "primary"))
+
+    assert asyncio.run(hedger.run("call", attempt)) == "primary"
+    assert started == [0]
+    assert hedger.stats() == {"hedged": 0, "hedge_wins": 0}
+    assert len(hedger._latencies["call"]) == 1
+
+
+def test_fast_call_is_not_hedged():
+    hedger = warmed_up(latency=1.0)
+    attempt, started, _ = attempts((0.01, "primary"))
+
+    assert asyncio.run(hedger.run("call", attempt)) == "primary"
+    assert started == [0]
+
+
+def test_slow_call_is_hedged_and_the_first_answer_wins():
+    hedger = warmed_up()
+    attempt, started, cancelled = attempts((5, "primary"), (0.01, "hedge"))
+
+    assert asyncio.run(hedger.run("call", attempt)) == "hedge"
+    assert started == [0, 1]
+    assert cancelled == [0]
+    assert hedger.stats() == {"hedged": 1, "hedge_wins": 1}
+
+
+def test_hedge_failure_falls_back_to_the_primary():
+    hedger = warmed_up()
+    attempt, _, _ = attempts((0.1, "primary"), (0.0, RuntimeError("hedge failed")))
+
+    assert asyncio.run(hedger.run("call", attempt)) == "primary"
+    assert hedger.stats() == {"hedged": 1, "hedge_wins": 0}
+
+
+def test_error_is_raised_when_every_attempt_fails():
+    hedger = warmed_up()
+    attempt, _, _ = attempts((0.05, RuntimeError("primary failed")), (0.0, RuntimeError("hedge failed")))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(hedger.run("call", attempt))
+
+
+def test_stream_is_hedged_on_its_first_chunk():
+    hedger = warmed_up()
+    closed = []
+
+    def open_stream(name, first_chunk_delay):
+        async def generator():
+            try:
+                await asyncio.sleep(first_chunk_delay)
+                for index in range(3):
+                    yield f"{name}{index}"
+            finally:
+                closed.append(name)
+        return generator()
+
+    streams = iter([open_stream("primary", 5), open_stream("hedge", 0.01)])
+
+    async def collect():
+        return [chunk async for chunk in hedger.stream("call", lambda: next(streams))]
+
+    assert asyncio.run(collect()) == ["hedge0", "hedge1", "hedge2"]
+    assert hedger.stats() == {"hedged": 1, "hedge_wins": 1}
+    assert sorted(closed) == ["hedge", "primary"]
+
+
+def test_stream_closed_early_closes_the_winning_stream():
+    hedger = Hedger(min_samples=5)
+    closed = []
+
+    async def generator():
+        try:
+            for index in range(3):
+                yield index
+        finally:
+            closed.append("primary")
+
+    async def read_one():
+        stream = hedger.stream("call", generator)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first, list(closed)
+
+    assert asyncio.run(read_one()) == (0, ["primary"])
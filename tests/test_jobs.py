@@ -0,0 +1,61 @@
+import asyncio
+
+from research.server.jobs import Job, JobManager, JobStatus
+
+
+class BrokenWorkflow:
+    """Workflow whose handler cannot even be created."""
+
+    def run(self, **kwargs):
+        raise RuntimeError("no LLM configured")
+
+
+def test_job_keeps_only_the_latest_events():
+    job = Job("topic", max_events=3)
+    for index in range(5):
+        job.publish(str(index))
+    assert list(job.events) == ["2", "3", "4"]
+
+
+def test_slow_subscriber_loses_its_oldest_messages():
+    async def main():
+        job = Job("topic", max_events=10, max_pending=2)
+        subscription = job.subscribe()
+        first = asyncio.ensure_future(subscription.__anext__())
+        job.publish("a")
+        assert await first == "a"
+        # The subscriber does not read while these arrive
+        for msg in ("b", "c", "d"):
+            job.publish(msg)
+        job.publish(None)
+        return [msg async for msg in subscription], job.dropped_events
+
+    messages, dropped = asyncio.run(main())
+    assert messages == ["d"]
+    assert dropped == 2
+
+
+def test_subscribing_to_a_finished_job_replays_its_events():
+    async def main():
+        job = Job("topic")
+        job.publish("a")
+        job.publish("b")
+        job.status = JobStatus.COMPLETED
+        job.publish(None)
+        return [msg async for msg in job.subscribe()]
+
+    assert asyncio.run(main()) == ["a", "b"]
+
+
+def test_job_fails_when_its_handler_cannot_be_created():
+    async def main():
+        manager = JobManager(BrokenWorkflow(), num_workers=1)
+        await manager.start()
+        job = manager.submit("topic")
+        await asyncio.wait_for(manager._queue.join(), 5)
+        await manager.stop()
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == JobStatus.FAILED
+    assert job.error == "no LLM configured"
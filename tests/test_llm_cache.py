@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from llama_index.core.llms import CompletionResponse
+
+from research.benchmark.stubs import LatencyModel, StubLLM
+from research.utils.cache import MemoryCache
+from research.utils.llm_cache import CachedLLM
+from research.workflows.search_workflow import SearchWorkflow
+
+
+class ChunkLLM:
+    """LLM streaming fixed chunks, optionally failing after some of them."""
+
+    model = "chunks"
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.calls = 0
+        self.closed = 0
+
+    async def acomplete(self, prompt, **kwargs):
+        self.calls += 1
+        return CompletionResponse(text="".join(self.chunks))
+
+    async def astream_complete(self, prompt, **kwargs):
+        self.calls += 1
+
+        async def generator():
+            try:
+                text = ""
+                for index, delta in enumerate(self.chunks):
+                    if index == self.fail_after:
+                        raise RuntimeError("stream broke")
+                    text += delta
+                    yield CompletionResponse(text=text, delta=delta)
+            finally:
+                self.closed += 1
+        return generator()
+
+
+async def read(llm, limit=None):
+    generator = await llm.astream_complete("prompt")
+    deltas = []
+    try:
+        async for chunk in generator:
+            deltas.append(chunk.delta)
+            if len(deltas) == limit:
+                break
+    finally:
+        await generator.aclose()
+    return deltas
+
+
+def test_complete_stream_is_replayed_from_the_cache():
+    upstream = ChunkLLM(["a", "b", "c"])
+    llm = CachedLLM(upstream, MemoryCache())
+    assert asyncio.run(read(llm)) == ["a", "b", "c"]
+    assert asyncio.run(read(llm)) == ["a", "b", "c"]
+    assert upstream.calls == 1
+
+
+def test_stream_closed_early_is_stored_as_far_as_it_was_read():
+    upstream = ChunkLLM(["a", "b", "c"])
+    llm = CachedLLM(upstream, MemoryCache())
+    assert asyncio.run(read(llm, limit=2)) == ["a", "b"]
+    # The upstream stream is closed along with the cached one
+    assert upstream.closed == 1
+    assert asyncio.run(read(llm, limit=2)) == ["a", "b"]
+    assert upstream.calls == 1
+
+
+def test_failed_stream_is_not_stored():
+    upstream = ChunkLLM(["a", "b", "c"], fail_after=2)
+    llm = CachedLLM(upstream, MemoryCache())
+    with pytest.raises(RuntimeError):
+        asyncio.run(read(llm))
+    assert len(llm.backend) == 0
+
+
+def test_query_generation_stopped_early_hits_the_cache():
+    stub = StubLLM(queries_per_section=5, latency=LatencyModel(0), tokens_per_second=0)
+    llm = CachedLLM(stub, MemoryCache())
+    search_workflow = SearchWorkflow(llm, {"max_queries": 2}, search_client=object())
+
+    first = asyncio.run(search_workflow.generate_search_queries("solar power"))
+    second = asyncio.run(search_workflow.generate_search_queries("solar power"))
+    assert len(first) == 2
+    assert second == first
+    assert stub.calls == 1
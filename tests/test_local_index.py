@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from research.utils import local_index as local_index_module
+from research.utils.local_index import LocalSourceIndex
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(local_index_module.time, "time", clock)
+    return clock
+
+
+def source(url, content, title="Source"):
+    return {"title": title, "url": f"https://example.com/{url}", "content": content, "score": 0.9}
+
+
+def make_index(tmp_path, **kwargs):
+    return LocalSourceIndex(str(tmp_path / "index.sqlite3"), **kwargs)
+
+
+def test_lookup_recall_counts_relevant_sources(tmp_path, clock):
+    index = make_index(tmp_path, min_recall=0.5)
+    asyncio.run(index.add([
+        source("a", "solar panel efficiency keeps improving"),
+        source("b", "new solar panel efficiency records"),
+        source("c", "wind turbine maintenance costs"),
+    ]))
+
+    items, recall = asyncio.run(index.lookup("solar panel efficiency", 2))
+    assert {item["url"] for item in items} == {"https://example.com/a", "https://example.com/b"}
+    assert recall == 1.0
+
+    items, recall = asyncio.run(index.lookup("solar panel efficiency", 4))
+    assert recall == 0.5
+
+    items, recall = asyncio.run(index.lookup("battery chemistry", 2))
+    assert items == [] and recall == 0.0
+    assert index.stats() == {"hits": 2, "misses": 1, "stale": 0, "entries": 3}
+
+
+def test_sources_covering_too_few_terms_are_not_relevant(tmp_path, clock):
+    index = make_index(tmp_path, min_coverage=0.75)
+    asyncio.run(index.add([source("a", "solar power in general")]))
+    assert asyncio.run(index.lookup("solar panel efficiency records", 1)) == ([], 0.0)
+
+
+def test_stale_sources_are_counted_but_not_served(tmp_path, clock):
+    index = make_index(tmp_path, freshness=60, min_recall=1.0)
+    asyncio.run(index.add([source("a", "solar panel efficiency")]))
+    clock.now += 120
+
+    assert asyncio.run(index.lookup("solar panel efficiency", 1)) == ([], 0.0)
+    assert index.stats()["stale"] == 1
+    assert index.stats()["misses"] == 1
+
+    # Fetching the source again makes it fresh
+    asyncio.run(index.add([source("a", "solar panel efficiency")]))
+    items, recall = asyncio.run(index.lookup("solar panel efficiency", 1))
+    assert recall == 1.0
+
+
+def test_adding_a_known_url_replaces_its_text(tmp_path, clock):
+    index = make_index(tmp_path)
+    asyncio.run(index.add([source("a", "solar panel efficiency")]))
+    asyncio.run(index.add([source("a", "wind turbine maintenance")]))
+
+    assert index.count() == 1
+    assert asyncio.run(index.lookup("solar panel efficiency", 1)) == ([], 0.0)
+    items, _ = asyncio.run(index.lookup("wind turbine maintenance", 1))
+    assert [item["content"] for item in items] == ["wind turbine maintenance"]
+    assert index._conn.execute("SELECT COUNT(*) FROM sources_fts").fetchone()[0] == 1
+
+
+def test_least_recently_fetched_sources_are_evicted(tmp_path, clock):
+    index = make_index(tmp_path, max_entries=2)
+    for url in ("a", "b", "c"):
+        asyncio.run(index.add([source(url, f"solar panel report {url}")]))
+        clock.now += 1
+
+    assert index.count() == 2
+    items, _ = asyncio.run(index.lookup("solar panel report", 3))
+    assert {item["url"] for item in items} == {"https://example.com/b", "https://example.com/c"}
+    assert index._conn.execute("SELECT COUNT(*) FROM sources_fts").fetchone()[0] == 2
+
+
+def test_items_without_url_or_content_are_skipped(tmp_path, clock):
+    index = make_index(tmp_path)
+    asyncio.run(index.add([{"url": "", "content": "text"}, {"url": "https://example.com/x", "content": ""}]))
+    assert index.count() == 0
@@ -0,0 +1,62 @@
+import asyncio
+
+from llama_index.core.llms import CompletionResponse
+
+from research.models.models import Report, Section
+from research.utils.prompt_cache import PromptCache, cached_token_counts, layout_prompt
+from research.utils.scheduler import Priority
+from research.workflows.research_workflow import ResearchWorkflow
+
+
+def usage(prompt_tokens, cached_tokens=0):
+    return {"usage": {"prompt_tokens": prompt_tokens, "prompt_tokens_details": {"cached_tokens": cached_tokens}}}
+
+
+def test_layout_prompt_puts_shared_parts_first():
+    prompt, prefix = layout_prompt("Instructions. ", "Topic. ", "Sources.")
+    assert prompt == "Instructions. Topic. Sources."
+    assert prefix == "Instructions. Topic. "
+
+
+def test_cached_token_counts():
+    assert cached_token_counts(usage(100, 64)) == (100, 64)
+    assert cached_token_counts({"usage": {"prompt_tokens": 10, "cache_read_input_tokens": 8}}) == (10, 8)
+    assert cached_token_counts({"usage": {"prompt_tokens": 10}}) == (10, 0)
+    assert cached_token_counts(None) is None
+    assert cached_token_counts({}) is None
+
+
+def test_record_and_stats_by_step():
+    cache = PromptCache()
+    assert cache.record(Priority.SECTION_WRITING, usage(100, 50)) == 0.5
+    assert cache.record(Priority.SECTION_WRITING, usage(100, 0)) == 0.0
+    assert cache.record(Priority.SECTION_WRITING, None) is None
+    assert cache.stats() == {"section": {"calls": 2, "prompt_tokens": 200, "cached_tokens": 50, "cached_ratio": 0.25}}
+
+
+def test_calls_without_prompt_tokens_are_counted_without_a_ratio():
+    cache = PromptCache()
+    assert cache.record(Priority.PLANNING, usage(0)) is None
+    assert cache.stats() == {"plan": {"calls": 1, "prompt_tokens": 0, "cached_tokens": 0, "cached_ratio": 0.0}}
+
+
+class CompleteOnlyLLM:
+    """LLM without a streaming interface."""
+
+    async def acomplete(self, prompt, **kwargs):
+        return CompletionResponse(text="# Report\n[section]")
+
+
+def test_final_report_without_streaming_passes_the_cache_prefix():
+    workflow = ResearchWorkflow(llm=CompleteOnlyLLM())
+    calls = []
+
+    async def acomplete(prompt, priority, deadline=None, cache_prefix=None):
+        calls.append((prompt, cache_prefix))
+        return CompletionResponse(text="# Report\n[section]")
+
+    workflow._acomplete = acomplete
+    report = Report(sections=[Section(name="A", description="About A", research=False, content="Written A")])
+    assert asyncio.run(workflow.format_report(report, lambda text: None)) == "# Report\nWritten A"
+    prompt, prefix = calls[0]
+    assert prefix and prompt.startswith(prefix)
@@ -0,0 +1,138 @@
+import asyncio
+
+from research.benchmark.stubs import LatencyModel, StubLLM
+from research.models.models import Section
+from research.utils.cache import MemoryCache, SearchResultCache
+from research.utils.context import fingerprint_sources
+from research.workflows.research_workflow import ResearchWorkflow
+from research.workflows.search_workflow import SearchWorkflow
+
+SEARCH_CONFIG = {"search_depth": "basic", "max_results": 2}
+
+
+def items(*contents, scores=None, site="example.com"):
+    scores = scores or [0.9] * len(contents)
+    return [{"title": f"Source {index}", "url": f"https://{site}/{index}", "content": content, "score": score}
+            for index, (content, score) in enumerate(zip(contents, scores))]
+
+
+class Sources:
+    """Search client answering every query with the current contents."""
+
+    def __init__(self, *contents):
+        self.contents = contents
+        self.calls = []
+
+    async def search(self, query, search_depth="basic", max_results=5, **kwargs):
+        self.calls.append((query, search_depth))
+        return {"results": items(*self.contents)}
+
+
+class DepthSources(Sources):
+    """Search client finding other sources at advanced depth."""
+
+    async def search(self, query, search_depth="basic", max_results=5, **kwargs):
+        self.calls.append((query, search_depth))
+        return {"results": items(*self.contents, site=f"{search_depth}.example.com")}
+
+
+class FakeContext:
+    def __init__(self):
+        self.store = {}
+        self.events = []
+        self.streaming_queue = asyncio.Queue()
+
+    async def get(self, key, default=None):
+        return self.store.get(key, default)
+
+    async def set(self, key, value):
+        self.store[key] = value
+
+    def write_event_to_stream(self, event):
+        self.events.append(event)
+
+
+def llm(**kwargs):
+    return StubLLM(latency=LatencyModel(0), tokens_per_second=0, section_tokens=10, **kwargs)
+
+
+def written_section(*contents):
+    results = {"query": SearchWorkflow._format_items("query", items(*contents))}
+    return Section(name="Section", description="About it", research=True, content="Old content",
+                   queries=["query"], fingerprint=fingerprint_sources(results))
+
+
+def refresh(section, sources, cache=None, config=SEARCH_CONFIG, **llm_kwargs):
+    workflow = ResearchWorkflow(llm=llm(**llm_kwargs))
+    search_workflow = SearchWorkflow(llm(), config, search_client=sources, cache=cache)
+    return asyncio.run(workflow._refresh_section(FakeContext(), section, 0, search_workflow))
+
+
+def test_fingerprint_ignores_order_scores_and_queries():
+    first = {"a": SearchWorkflow._format_items("a", items("one", "two", scores=[0.9, 0.7]))}
+    second = {"b": SearchWorkflow._format_items("b", list(reversed(items("one", "two", scores=[0.8, 0.95]))))}
+    assert fingerprint_sources(first) == fingerprint_sources(second)
+
+
+def test_fingerprint_changes_with_content():
+    first = {"a": SearchWorkflow._format_items("a", items("one", "two"))}
+    second = {"a": SearchWorkflow._format_items("a", items("one", "changed"))}
+    assert fingerprint_sources(first) != fingerprint_sources(second)
+
+
+def test_unchanged_sources_keep_the_section():
+    section = written_section("one", "two")
+    assert refresh(section, Sources("one", "two")) is False
+    assert section.content == "Old content"
+
+
+def test_changed_sources_are_found_behind_the_cache():
+    section = written_section("one", "two")
+    cache = SearchResultCache(MemoryCache())
+    cache.set("query", "basic", 2, items("one", "two"))
+    sources = Sources("one", "changed")
+
+    assert refresh(section, sources, cache) is True
+    assert sources.calls == [("query", "basic")]
+    assert section.content.startswith("## Section")
+    assert section.fingerprint == fingerprint_sources(
+        {"query": SearchWorkflow._format_items("query", items("one", "changed"))})
+    # The fresh results replace the cached ones
+    assert cache.get("query", "basic", 2) == items("one", "changed")
+
+
+def test_failed_rewrite_keeps_the_old_content():
+    section = written_section("one", "two")
+    fingerprint = section.fingerprint
+
+    assert refresh(section, Sources("one", "changed"), error_rate=1.0) is False
+    assert section.content == "Old content"
+    assert section.fingerprint == fingerprint
+
+
+def test_refresh_replays_the_depths_of_an_adaptive_search():
+    config = {"search_depth": "advanced", "max_results": 2, "fanout": "adaptive", "evidence_budget": 100}
+    sources = DepthSources("one", "two")
+    search_workflow = SearchWorkflow(llm(), config, search_client=sources)
+    results, stats, depths = asyncio.run(search_workflow.adaptive_search(["first", "second"]))
+    # Too little evidence, so every query was escalated and its results merged
+    assert stats["escalated"] == 2
+    assert depths == {"first": ["basic", "advanced"], "second": ["basic", "advanced"]}
+    assert len(results["first"].splitlines()) == 4
+
+    section = Section(name="Section", description="About it", research=True, content="Old content",
+                      queries=list(results), query_depths=depths, fingerprint=fingerprint_sources(results))
+    sources.calls.clear()
+    assert refresh(section, sources, config=config) is False
+    assert sorted(sources.calls) == [("first", "advanced"), ("first", "basic"),
+                                     ("second", "advanced"), ("second", "basic")]
+    assert section.content == "Old content"
+
+
+def test_search_at_depths_defaults_to_the_configured_depth():
+    sources = DepthSources("one")
+    search_workflow = SearchWorkflow(llm(), SEARCH_CONFIG, search_client=sources)
+    results = asyncio.run(search_workflow.search_at_depths(["a", "b"], {"b": ["advanced"]}))
+    assert sources.calls == [("a", "basic"), ("b", "advanced")]
+    assert "basic.example.com" in results["a"]
+    assert "advanced.example.com" in results["b"]
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from llama_index.core.llms import CompletionResponse
+
+from research.utils.routing import ModelRouter, build_router
+from research.utils.scheduler import Priority
+from research.workflows.research_workflow import ResearchWorkflow
+
+
+class ModelLLM:
+    """LLM answering with fixed chunks, failing before or after its first chunk if asked to."""
+
+    def __init__(self, name, fail_before=False, fail_after=None):
+        self.name = name
+        self.fail_before = fail_before
+        self.fail_after = fail_after
+        self.calls = 0
+        self.chunks = [f"{name} ", "says ", "hello"]
+
+    async def acomplete(self, prompt, **kwargs):
+        self.calls += 1
+        if self.fail_before:
+            raise RuntimeError(f"{self.name} is down")
+        return CompletionResponse(text="".join(self.chunks))
+
+    async def astream_complete(self, prompt, **kwargs):
+        self.calls += 1
+        if self.fail_before:
+            raise RuntimeError(f"{self.name} is down")
+
+        async def generator():
+            text = ""
+            for index, delta in enumerate(self.chunks):
+                if index == self.fail_after:
+                    raise RuntimeError(f"{self.name} broke off")
+                text += delta
+                yield CompletionResponse(text=text, delta=delta)
+        return generator()
+
+
+def routed(*llms):
+    chain = [(llm.name, llm) for llm in llms]
+    router = ModelRouter({"plan": chain, "queries": chain, "section": chain, "final": chain})
+    return ResearchWorkflow(llm=llms[0], router=router), router
+
+
+async def collect(workflow):
+    generator = await workflow._astream_complete("prompt", Priority.SECTION_WRITING)
+    return [chunk.delta async for chunk in generator]
+
+
+def test_build_router_without_assignments():
+    assert build_router({}, "default", lambda model: model) is None
+
+
+def test_build_router_chains_step_models_and_fallbacks():
+    made = []
+
+    def make_llm(model):
+        made.append(model)
+        return f"llm:{model}"
+
+    router = build_router({"section": ["big", "small"], "fallbacks": ["small", "backup"]}, "default", make_llm)
+    assert router.chain(Priority.SECTION_WRITING) == [("big", "llm:big"), ("small", "llm:small"),
+                                                      ("backup", "llm:backup")]
+    assert router.chain(Priority.PLANNING) == [("default", "llm:default"), ("small", "llm:small"),
+                                               ("backup", "llm:backup")]
+    # One LLM per model, shared by the steps
+    assert sorted(made) == ["backup", "big", "default", "small"]
+
+
+def test_complete_falls_back_to_the_next_model():
+    primary, backup = ModelLLM("primary", fail_before=True), ModelLLM("backup")
+    workflow, router = routed(primary, backup)
+
+    response = asyncio.run(workflow._acomplete("prompt", Priority.PLANNING))
+    assert response.text == "backup says hello"
+    stats = router.stats()["plan"]
+    assert (stats["primary"]["calls"], stats["primary"]["errors"], stats["primary"]["fallbacks"]) == (1, 1, 1)
+    assert (stats["backup"]["calls"], stats["backup"]["errors"]) == (1, 0)
+    assert stats["backup"]["tokens_out"] > 0
+    assert stats["backup"]["latency_p50"] is not None
+
+
+def test_complete_raises_when_the_last_model_fails():
+    workflow, router = routed(ModelLLM("primary", fail_before=True), ModelLLM("backup", fail_before=True))
+    with pytest.raises(RuntimeError, match="backup is down"):
+        asyncio.run(workflow._acomplete("prompt", Priority.PLANNING))
+    stats = router.stats()["plan"]
+    assert stats["primary"]["fallbacks"] == 1
+    assert (stats["backup"]["errors"], stats["backup"]["fallbacks"]) == (1, 0)
+
+
+def test_stream_falls_back_before_its_first_chunk():
+    primary, backup = ModelLLM("primary", fail_after=0), ModelLLM("backup")
+    workflow, router = routed(primary, backup)
+
+    assert asyncio.run(collect(workflow)) == ["backup ", "says ", "hello"]
+    stats = router.stats()["section"]
+    assert stats["primary"]["fallbacks"] == 1
+    assert stats["backup"]["calls"] == 1
+    assert stats["backup"]["time_to_first_token_p50"] is not None
+    assert stats["backup"]["tokens_out"] > 0
+
+
+def test_stream_does_not_fall_back_once_output_was_emitted():
+    primary, backup = ModelLLM("primary", fail_after=2), ModelLLM("backup")
+    workflow, router = routed(primary, backup)
+    received = []
+
+    async def scenario():
+        generator = await workflow._astream_complete("prompt", Priority.SECTION_WRITING)
+        async for chunk in generator:
+            received.append(chunk.delta)
+
+    with pytest.raises(RuntimeError, match="primary broke off"):
+        asyncio.run(scenario())
+    assert received == ["primary ", "says "]
+    assert backup.calls == 0
+    stats = router.stats()["section"]
+    assert (stats["primary"]["calls"], stats["primary"]["errors"], stats["primary"]["fallbacks"]) == (1, 1, 0)
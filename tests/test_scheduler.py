@@ -0,0 +1,195 @@
+import asyncio
+
+import pytest
+
+from research.utils import scheduler as scheduler_module
+from research.utils.scheduler import LLM_PROVIDER, SEARCH_PROVIDER, Priority, Scheduler, build_scheduler
+
+
+class Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class UpstreamError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"upstream error {status_code}")
+        self.status_code = status_code
+        self.response = Response({"retry-after": str(retry_after)} if retry_after is not None else {})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the delays the scheduler waits for without actually waiting."""
+    delays = []
+    sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(scheduler_module.asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def failing(errors, result):
+    """Create an attempt function raising the given errors before returning the result."""
+    calls = []
+
+    async def attempt():
+        calls.append(len(calls))
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return attempt, calls
+
+
+def test_run_retries_rate_limits_honoring_retry_after(sleeps):
+    scheduler = Scheduler(max_retries=3)
+    attempt, calls = failing([UpstreamError(429, retry_after=7), UpstreamError(503)], "done")
+
+    assert asyncio.run(scheduler.run(LLM_PROVIDER, Priority.PLANNING, attempt)) == "done"
+    assert len(calls) == 3
+    assert sleeps[0] == 7
+    assert 0.5 * 2 <= sleeps[1] <= 2
+    assert scheduler.retries == 2
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_retry_after_pauses_the_provider_bucket():
+    scheduler = Scheduler(rate_limits={LLM_PROVIDER: (0, 1)})
+    error = UpstreamError(429, retry_after=30)
+
+    assert scheduler._backoff(LLM_PROVIDER, 0, error) == 30
+    bucket = scheduler.buckets[LLM_PROVIDER]
+    assert bucket._blocked_until - scheduler_module.time.monotonic() > 29
+
+
+def test_run_gives_up_after_max_retries(sleeps):
+    scheduler = Scheduler(max_retries=2)
+    attempt, calls = failing([UpstreamError(429)] * 3, "done")
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(scheduler.run(LLM_PROVIDER, Priority.PLANNING, attempt))
+    assert len(calls) == 3
+
+
+def test_run_does_not_retry_client_errors(sleeps):
+    scheduler = Scheduler()
+    attempt, calls = failing([UpstreamError(400)], "done")
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(scheduler.run(LLM_PROVIDER, Priority.PLANNING, attempt))
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def lazy_stream(chunks, errors):
+    """Open a stream that, like the OpenAI client, only sends its request on the first read."""
+    opened = []
+
+    async def open_stream():
+        attempt = len(opened)
+        opened.append(attempt)
+
+        async def generator():
+            if attempt < len(errors):
+                raise errors[attempt]
+            for chunk in chunks:
+                yield chunk
+
+        return generator()
+
+    return open_stream, opened
+
+
+async def collect(generator):
+    return [chunk async for chunk in generator]
+
+
+def test_stream_retries_errors_raised_on_the_first_chunk(sleeps):
+    scheduler = Scheduler(max_retries=3)
+    open_stream, opened = lazy_stream(["a", "b", "c"], [UpstreamError(429, retry_after=3)])
+
+    chunks = asyncio.run(collect(scheduler.stream(LLM_PROVIDER, Priority.SECTION_WRITING, open_stream)))
+    assert chunks == ["a", "b", "c"]
+    assert len(opened) == 2
+    assert sleeps == [3]
+    assert scheduler.retries == 1
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_stream_retries_errors_raised_when_opening(sleeps):
+    scheduler = Scheduler(max_retries=3)
+    calls = []
+
+    async def open_stream():
+        calls.append(None)
+        if len(calls) == 1:
+            raise UpstreamError(502)
+
+        async def generator():
+            yield "a"
+
+        return generator()
+
+    assert asyncio.run(collect(scheduler.stream(LLM_PROVIDER, Priority.SECTION_WRITING, open_stream))) == ["a"]
+    assert len(calls) == 2
+
+
+def test_stream_raises_once_retries_are_exhausted(sleeps):
+    scheduler = Scheduler(max_retries=1)
+    open_stream, opened = lazy_stream(["a"], [UpstreamError(429)] * 2)
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(collect(scheduler.stream(LLM_PROVIDER, Priority.SECTION_WRITING, open_stream)))
+    assert len(opened) == 2
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_stream_holds_the_slot_until_the_stream_is_closed(sleeps):
+    scheduler = Scheduler(max_in_flight=1)
+    open_stream, _ = lazy_stream(["a", "b"], [])
+
+    async def read_first():
+        generator = scheduler.stream(LLM_PROVIDER, Priority.SECTION_WRITING, open_stream)
+        assert await generator.__anext__() == "a"
+        in_flight = scheduler.in_flight
+        await generator.aclose()
+        return in_flight, scheduler.in_flight
+
+    assert asyncio.run(read_first()) == (1, 0)
+
+
+def test_slots_are_handed_out_by_priority():
+    scheduler = Scheduler(max_in_flight=1)
+    order = []
+
+    async def call(name, priority, release):
+        async with scheduler.slot(LLM_PROVIDER, priority):
+            order.append(name)
+            await release.wait()
+
+    async def main():
+        release = asyncio.Event()
+        first = asyncio.ensure_future(call("first", Priority.FINAL_FORMATTING, release))
+        await asyncio.sleep(0)
+        waiting = [asyncio.ensure_future(call(name, priority, release)) for name, priority in
+                   (("final", Priority.FINAL_FORMATTING), ("plan", Priority.PLANNING), ("search", Priority.SEARCH))]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, *waiting)
+
+    asyncio.run(main())
+    assert order == ["first", "plan", "search", "final"]
+
+
+def test_build_scheduler_splits_limits_between_processes():
+    config = {"enabled": True, "max_in_flight": 16, "llm_rate": 5.0, "llm_burst": 10, "search_rate": 4.0,
+              "search_burst": 1, "max_retries": 3, "backoff_base": 1.0, "backoff_max": 30.0}
+    scheduler = build_scheduler(config, shares=4)
+    assert scheduler.max_in_flight == 4
+    assert (scheduler.buckets[LLM_PROVIDER].rate, scheduler.buckets[LLM_PROVIDER].burst) == (1.25, 2)
+    assert (scheduler.buckets[SEARCH_PROVIDER].rate, scheduler.buckets[SEARCH_PROVIDER].burst) == (1.0, 1)
+    assert build_scheduler({**config, "enabled": False}, shares=4) is None
@@ -0,0 +1,48 @@
+import asyncio
+
+from research.utils import semantic_cache as semantic_cache_module
+from research.utils.semantic_cache import SemanticSearchCache
+
+
+class FakeEmbedding:
+    """Embeds texts as fixed vectors, so similar queries can be set up by hand."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    async def aget_text_embedding_batch(self, texts):
+        return [self.vectors[text] for text in texts]
+
+
+VECTORS = {
+    "rag evaluation": [1.0, 0.0, 0.0],
+    "evaluating rag": [0.99, 0.1, 0.0],
+    "vector databases": [0.0, 1.0, 0.0]
+}
+
+
+def test_semantic_cache_matches_near_duplicate_queries():
+    cache = SemanticSearchCache(FakeEmbedding(VECTORS), threshold=0.9)
+    matrix = asyncio.run(cache.embed(["rag evaluation"]))
+    cache.add("rag evaluation", matrix[0], "basic", 3, [{"url": "https://example.com"}])
+
+    matches = cache.lookup(asyncio.run(cache.embed(["evaluating rag", "vector databases"])), "basic", 3)
+    assert matches == [[{"url": "https://example.com"}], None]
+    assert cache.lookup(matrix, "advanced", 3) == [None]
+
+
+def test_semantic_cache_expires_entries_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache_module.time, "time", lambda: now[0])
+    cache = SemanticSearchCache(FakeEmbedding(VECTORS), threshold=0.9, ttl=60)
+    matrix = asyncio.run(cache.embed(["rag evaluation"]))
+    cache.add("rag evaluation", matrix[0], "basic", 3, [{"url": "https://example.com/old"}])
+    assert cache.lookup(matrix, "basic", 3) == [[{"url": "https://example.com/old"}]]
+
+    now[0] += 61
+    assert cache.lookup(matrix, "basic", 3) == [None]
+
+    # Fresh results replace the expired entry instead of being shadowed by it
+    cache.add("rag evaluation", matrix[0], "basic", 3, [{"url": "https://example.com/new"}])
+    assert cache.lookup(matrix, "basic", 3) == [[{"url": "https://example.com/new"}]]
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from research.utils.single_flight import SingleFlight
+
+
+class Upstream:
+    """Upstream call that blocks until released and records whether it was cancelled or closed."""
+
+    def __init__(self, chunks=("a", "b", "c")):
+        self.chunks = chunks
+        self.calls = 0
+        self.cancelled = False
+        self.closed = False
+        self.release = asyncio.Event()
+
+    async def call(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return "result"
+
+    def open(self):
+        self.calls += 1
+
+        async def generator():
+            try:
+                # The first chunk comes right away, the others once released
+                yield self.chunks[0]
+                for chunk in self.chunks[1:]:
+                    await self.release.wait()
+                    yield chunk
+            finally:
+                self.closed = True
+        return generator()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_run_shares_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        upstream = Upstream()
+        callers = [asyncio.ensure_future(flight.run("key", upstream.call, kind="search")) for _ in range(3)]
+        await settle()
+        upstream.release.set()
+        return flight, upstream, await asyncio.gather(*callers)
+
+    flight, upstream, results = asyncio.run(scenario())
+    assert results == ["result"] * 3
+    assert upstream.calls == 1
+    assert flight.stats() == {"calls": {"search": 1}, "saved": {"search": 2}}
+
+
+def test_run_shares_errors():
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream failed")
+
+    async def scenario():
+        flight = SingleFlight()
+        return await asyncio.gather(flight.run("key", failing), flight.run("key", failing), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_run_keeps_the_call_while_a_caller_waits():
+    async def scenario():
+        flight = SingleFlight()
+        upstream = Upstream()
+        first = asyncio.ensure_future(flight.run("key", upstream.call))
+        second = asyncio.ensure_future(flight.run("key", upstream.call))
+        await settle()
+        first.cancel()
+        await settle()
+        assert not upstream.cancelled
+        upstream.release.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(scenario()) == ("result", True)
+
+
+def test_run_cancels_the_call_when_the_last_caller_leaves():
+    async def scenario():
+        flight = SingleFlight()
+        upstream = Upstream()
+        callers = [asyncio.ensure_future(flight.run("key", upstream.call)) for _ in range(2)]
+        await settle()
+        for caller in callers:
+            caller.cancel()
+        await settle()
+        # A new caller starts a new call rather than joining the cancelled one
+        upstream.release.set()
+        return upstream, await flight.run("key", upstream.call)
+
+    upstream, result = asyncio.run(scenario())
+    assert upstream.cancelled
+    assert result == "result"
+    assert upstream.calls == 2
+
+
+def test_stream_fans_out_to_late_callers():
+    async def collect(flight, upstream):
+        return [chunk async for chunk in flight.stream("key", upstream.open)]
+
+    async def scenario():
+        flight = SingleFlight()
+        upstream = Upstream()
+        first = asyncio.ensure_future(collect(flight, upstream))
+        await settle()
+        # Joins after the first chunk arrived and gets it replayed
+        second = asyncio.ensure_future(collect(flight, upstream))
+        await settle()
+        upstream.release.set()
+        return flight, upstream, await asyncio.gather(first, second)
+
+    flight, upstream, results = asyncio.run(scenario())
+    assert results == [["a", "b", "c"], ["a", "b", "c"]]
+    assert upstream.calls == 1
+    assert flight.stats()["saved"] == {"stream": 1}
+
+
+def test_stream_is_closed_when_the_last_caller_leaves():
+    async def scenario():
+        flight = SingleFlight()
+        upstream = Upstream()
+        first = flight.stream("key", upstream.open)
+        second = flight.stream("key", upstream.open)
+        assert await first.__anext__() == "a"
+        assert await second.__anext__() == "a"
+        await first.aclose()
+        await settle()
+        assert not upstream.closed
+        # The caller waiting for the next chunk gives up
+        reader = asyncio.ensure_future(second.__anext__())
+        await settle()
+        reader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await reader
+        await settle()
+        return upstream
+
+    upstream = asyncio.run(scenario())
+    assert upstream.closed
+    assert upstream.calls == 1
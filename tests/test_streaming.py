@@ -0,0 +1,102 @@
+import asyncio
+
+from llama_index.core.llms import CompletionResponse
+
+from research.models.models import Report, Section
+from research.utils.streaming import MarkerSplicer, ProgressCoalescer, StreamBuffer
+from research.workflows.research_workflow import ResearchWorkflow
+
+
+def splice(chunks, marker="[section]", replacement="SECTIONS"):
+    splicer = MarkerSplicer(marker, replacement)
+    pieces = []
+    for chunk in chunks:
+        pieces.extend(splicer.feed(chunk))
+    pieces.extend(splicer.flush())
+    return pieces
+
+
+def test_marker_splicer_replaces_marker_within_a_chunk():
+    assert "".join(splice(["# Intro\n[section]\n## Conclusion"])) == "# Intro\nSECTIONS\n## Conclusion"
+
+
+def test_marker_splicer_replaces_marker_split_across_chunks():
+    chunks = ["# Intro\n[sec", "ti", "on]\n## Conclusion"]
+    assert "".join(splice(chunks)) == "# Intro\nSECTIONS\n## Conclusion"
+
+
+def test_marker_splicer_replaces_marker_streamed_one_character_at_a_time():
+    text = "Intro [section] middle [section] end"
+    assert "".join(splice(list(text))) == "Intro SECTIONS middle SECTIONS end"
+
+
+def test_marker_splicer_emits_replacement_as_its_own_piece():
+    pieces = splice(["a[sect", "ion]b"])
+    assert "SECTIONS" in pieces
+
+
+def test_marker_splicer_releases_a_false_start():
+    splicer = MarkerSplicer("[section]", "SECTIONS")
+    assert splicer.feed("see [sec") == ["see "]
+    assert splicer.feed("ond]") == ["[second]"]
+
+
+def test_marker_splicer_flushes_a_partial_marker_at_the_end():
+    assert "".join(splice(["text [sect"])) == "text [sect"
+
+
+def test_stream_buffer_drops_oldest_text():
+    buffer = StreamBuffer()
+    for chunk in ("abc", "def", "ghi"):
+        buffer.append(chunk)
+    assert buffer.drop_oldest(4) == 5
+    assert buffer.getvalue() == "fghi"
+    assert len(buffer) == 4
+    assert buffer.drop_oldest(10) == 0
+
+
+def test_progress_coalescer_caps_text_held_back_while_blocked():
+    messages = []
+    blocked = [True]
+    coalescer = ProgressCoalescer(messages.append, interval=0, max_chars=1, blocked=lambda: blocked[0],
+                                  max_buffer=10)
+    for index in range(10):
+        coalescer(f"{index:03d}")
+    assert messages == []
+    assert coalescer.dropped_chars == 20
+
+    blocked[0] = False
+    coalescer("!")
+    assert messages == ["6007008009!"]
+
+
+def test_progress_coalescer_passes_on_large_chunks_when_not_blocked():
+    messages = []
+    coalescer = ProgressCoalescer(messages.append, interval=0, max_chars=1, blocked=lambda: False, max_buffer=4)
+    coalescer("a long chunk")
+    assert messages == ["a long chunk"]
+    assert coalescer.dropped_chars == 0
+
+
+class FinalReportLLM:
+    """LLM streaming a final report whose first and last chunks carry no delta."""
+
+    async def astream_complete(self, prompt, **kwargs):
+        async def generator():
+            yield CompletionResponse(text="", delta=None)
+            text = ""
+            for delta in ("# Report\n[sec", "tion]\n", "## End"):
+                text += delta
+                yield CompletionResponse(text=text, delta=delta)
+            yield CompletionResponse(text=text, delta=None)
+        return generator()
+
+
+def test_final_report_tolerates_chunks_without_delta():
+    workflow = ResearchWorkflow(llm=FinalReportLLM())
+    report = Report(sections=[Section(name="A", description="About A", research=True, content="Section A\n")])
+    emitted = []
+
+    result = asyncio.run(workflow.format_report(report, emitted.append))
+    assert result == "# Report\nSection A\n\n## End"
+    assert "".join(emitted) == result
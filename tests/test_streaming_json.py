@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from research.utils.streaming_json import (JsonArrayStreamParser, ReportPlanParser, StreamValidationError,
+                                           repair_json)
+
+SECTIONS = [
+    {"name": "Introduction", "description": "Overview", "research": False, "content": ""},
+    {"name": "Findings", "description": "What the sources say", "research": True, "content": ""},
+]
+
+
+def feed_in_chunks(parser, text, size=7):
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+
+def test_repair_json_parses_valid_json_after_prose_and_fences():
+    assert repair_json('Here is the plan:\n```json\n[{"a": 1}]\n```\nDone.') == [{"a": 1}]
+
+
+def test_repair_json_fixes_quotes_literals_and_trailing_commas():
+    assert repair_json("[{'a': 'it\\'s', b: True, 'c': None,},]") == [{"a": "it's", "b": True, "c": None}]
+
+
+def test_repair_json_escapes_raw_newlines_in_strings():
+    assert repair_json('{"a": "two\nlines"}') == {"a": "two\nlines"}
+
+
+def test_repair_json_closes_a_truncated_document():
+    assert repair_json('[{"name": "A", "description": "cut o') == [{"name": "A", "description": "cut o"}]
+    # A key cut off before its value is dropped
+    assert repair_json('{"a": 1, "b') == {"a": 1}
+    assert repair_json('{"a": 1, "b":') == {"a": 1, "b": None}
+
+
+def test_repair_json_without_a_document():
+    with pytest.raises(ValueError):
+        repair_json("no JSON here")
+
+
+def test_array_parser_returns_elements_as_they_close():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('[{"name": "A", "note": "a } in a string"}, {"na') == [
+        {"name": "A", "note": "a } in a string"}]
+    assert parser.feed('me": "B"}') == [{"name": "B"}]
+    assert not parser.done
+    assert parser.feed('] and some trailing prose') == []
+    assert parser.done
+
+
+def test_array_parser_finds_a_wrapped_array():
+    parser = JsonArrayStreamParser()
+    text = 'Sure!\n{"sections": ' + json.dumps(SECTIONS) + '}'
+    assert feed_in_chunks(parser, text) == SECTIONS
+    assert parser.done
+
+
+def test_array_parser_rejects_a_long_preamble():
+    parser = JsonArrayStreamParser(max_preamble=20)
+    with pytest.raises(StreamValidationError):
+        parser.feed("This answer is all prose and no JSON.")
+
+
+def test_array_parser_only_limits_the_preamble():
+    parser = JsonArrayStreamParser(max_preamble=20)
+    # A long document without an array is left to the repair at the end
+    assert parser.feed('{"name": "A", "description": "' + "x" * 100 + '"}') == []
+
+
+def test_plan_parser_validates_sections_leniently():
+    parser = ReportPlanParser()
+    text = json.dumps([{"Name": "A", "Description": "About A", "Research": "yes"},
+                       {"name": "B", "description": "About B", "research": "no", "content": None}])
+    sections = feed_in_chunks(parser, text)
+    assert [(section.name, section.research, section.content) for section in sections] == [
+        ("A", True, ""), ("B", False, "")]
+    assert parser.done
+    assert parser.close() == []
+
+
+def test_plan_parser_recovers_a_truncated_plan():
+    parser = ReportPlanParser()
+    text = json.dumps(SECTIONS)
+    # Cut off before the second section's content
+    feed_in_chunks(parser, text[:text.rindex(', "content"')])
+    sections = parser.close()
+    assert [section.name for section in parser.sections] == ["Introduction", "Findings"]
+    assert [section.name for section in sections] == ["Findings"]
+
+
+def test_plan_parser_drops_a_section_cut_off_before_its_fields():
+    parser = ReportPlanParser()
+    text = json.dumps(SECTIONS)
+    feed_in_chunks(parser, text[:text.index("What the")])
+    assert parser.close() == []
+    assert [section.name for section in parser.sections] == ["Introduction"]
+
+
+def test_plan_parser_accepts_a_single_bare_section():
+    parser = ReportPlanParser()
+    assert feed_in_chunks(parser, "```json\n" + json.dumps(SECTIONS[1]) + "\n```") == []
+    sections = parser.close()
+    assert [section.name for section in sections] == ["Findings"]
+    assert sections[0].research is True
+
+
+def test_plan_parser_accepts_sections_keyed_by_name():
+    parser = ReportPlanParser()
+    feed_in_chunks(parser, json.dumps({"A": {"description": "About A", "research": True}}))
+    assert [section.name for section in parser.close()] == ["A"]
+
+
+def test_plan_parser_rejects_an_invalid_section():
+    parser = ReportPlanParser()
+    with pytest.raises(StreamValidationError, match="Section 2"):
+        feed_in_chunks(parser, json.dumps([SECTIONS[0], {"name": "B"}]))
+
+
+def test_plan_parser_rejects_a_response_without_sections():
+    parser = ReportPlanParser()
+    parser.feed("I cannot help with that.")
+    with pytest.raises(StreamValidationError):
+        parser.close()
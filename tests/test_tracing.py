@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from llama_index.core.llms import CompletionResponse
+
+from research.utils.scheduler import Priority
+from research.utils.tracing import JsonlExporter, Tracer
+from research.utils.utils import percentile
+from research.workflows.research_workflow import ResearchWorkflow
+
+
+def test_percentile_uses_nearest_rank():
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 100) == 5.0
+    assert percentile([7.0], 95) == 7.0
+
+
+def test_jsonl_exporter_writes_spans_in_the_background_and_on_shutdown(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonlExporter(str(path), flush_interval=60)
+    tracer = Tracer(enabled=True, exporters=[exporter])
+
+    with tracer.span("report", trace_id="trace"):
+        with tracer.span("llm.complete") as span:
+            span.set(tokens_in=10)
+    tracer.end_trace("trace")
+    # Nothing is written on the calling thread
+    assert not path.exists()
+
+    tracer.shutdown()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record.get("name") for record in records] == ["llm.complete", "report", None]
+    assert records[0]["attributes"] == {"tokens_in": 10}
+    assert records[2]["summary"]["llm.complete"]["tokens_in"] == 10
+
+
+def test_disabled_tracer_exports_nothing(tmp_path):
+    exporter = JsonlExporter(str(tmp_path / "traces.jsonl"))
+    tracer = Tracer(enabled=False, exporters=[exporter])
+    with tracer.span("report") as span:
+        span.set(tokens_in=10)
+    tracer.shutdown()
+    assert not (tmp_path / "traces.jsonl").exists()
+
+
+class ClosingLLM:
+    """LLM whose streams record when they are closed."""
+
+    def __init__(self):
+        self.closed = 0
+
+    async def astream_complete(self, prompt, **kwargs):
+        async def generator():
+            try:
+                text = ""
+                for delta in ("a", "b", "c"):
+                    text += delta
+                    yield CompletionResponse(text=text, delta=delta)
+            finally:
+                self.closed += 1
+        return generator()
+
+
+def test_traced_stream_closed_early_closes_the_upstream_stream():
+    llm = ClosingLLM()
+    workflow = ResearchWorkflow(llm=llm, tracer=Tracer(enabled=True))
+
+    async def read_one():
+        generator = await workflow._astream_complete("prompt", Priority.SECTION_WRITING)
+        chunk = await generator.__anext__()
+        await generator.aclose()
+        return chunk.delta, llm.closed
+
+    assert asyncio.run(read_one()) == ("a", 1)